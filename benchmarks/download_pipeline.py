@@ -0,0 +1,148 @@
+"""Benchmarks the download pipeline against the local stand-in server.
+
+    python benchmarks/download_pipeline.py --sizes 10M 100M [--bandwidth 50M]
+
+Each scenario runs in a fresh interpreter with an empty cache, so timings
+include the whole pipeline and the peak RSS is that of the scenario alone.
+CPU time is reported per GB of archive, the cost of the client's own loops
+once the network keeps up:
+
+    download         the archive transfer alone, without extraction
+    get_from_cache   download and extract, reported as archive MB/s
+    extract          extracting an already downloaded archive
+    load_dataset     download, extract and parse the train split
+    first_batch      time until the first chunk of the train split arrives
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# run from a checkout without installing notia
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCENARIOS = ["download", "get_from_cache", "extract", "load_dataset", "first_batch"]
+
+
+def run_scenario(scenario: str, slug: str) -> dict:
+    """Runs in the child process, notia is configured through the environment"""
+    from notia.download_manager import DownloadManager, load_dataset
+
+    def cpu_time() -> float:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_utime + usage.ru_stime
+
+    start, start_cpu = time.perf_counter(), cpu_time()
+    if scenario == "download":
+        manager = DownloadManager()
+        os.makedirs(manager.cache_dir, exist_ok=True)
+        with open(os.path.join(manager.cache_dir, f"{slug}.zip"), "a+b") as archive:
+            manager.download_from_s3(archive, slug)
+    elif scenario == "get_from_cache":
+        DownloadManager().get_from_cache(slug)
+    elif scenario == "extract":
+        manager = DownloadManager()
+        archive_path = os.path.join(manager.cache_dir, f"{slug}.zip")
+        os.makedirs(manager.cache_dir, exist_ok=True)
+        with open(archive_path, "a+b") as archive:
+            manager.download_from_s3(archive, slug)
+        start, start_cpu = time.perf_counter(), cpu_time()
+        manager.extract(archive_path, os.path.join(manager.cache_dir, slug))
+    elif scenario == "load_dataset":
+        load_dataset(slug, split="train", memoize=False)
+    elif scenario == "first_batch":
+        next(iter(load_dataset(slug, split="train", chunksize=10_000)))
+    else:
+        raise ValueError(f"Unknown scenario {scenario}")
+    elapsed = time.perf_counter() - start
+    cpu_seconds = cpu_time() - start_cpu
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        # reported in kilobytes on Linux, bytes on macOS
+        peak_rss *= 1024
+    return {"seconds": elapsed, "cpu_seconds": cpu_seconds, "peak_rss": peak_rss}
+
+
+def main():
+    from server import Faults, StandInServer, make_dataset
+    from notia.cache import parse_size
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["10M", "100M"])
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--bandwidth", default=None, help="such as 50M per second")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument(
+        "--child", nargs=2, metavar=("SCENARIO", "SLUG"), help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(*args.child)))
+        return
+
+    faults = Faults(
+        latency=args.latency,
+        bandwidth=parse_size(args.bandwidth) or 0,
+        error_rate=args.error_rate,
+        drop_rate=args.drop_rate,
+    )
+    server = StandInServer(faults=faults).start()
+    results = []
+    try:
+        for size in args.sizes:
+            slug = f"bench-{size.lower()}"
+            archive = make_dataset(parse_size(size))
+            server.add_object(slug, archive)
+            for scenario in args.scenarios:
+                for _ in range(args.repeat):
+                    with tempfile.TemporaryDirectory() as cache_dir:
+                        env = dict(
+                            os.environ,
+                            NOTIA_ENDPOINT=server.url,
+                            NOTIA_CACHE=cache_dir,
+                            HOME=cache_dir,
+                        )
+                        output = subprocess.run(
+                            [sys.executable, __file__, "--child", scenario, slug],
+                            env=env,
+                            check=True,
+                            capture_output=True,
+                            text=True,
+                        ).stdout
+                    result = json.loads(output.strip().splitlines()[-1])
+                    result.update(
+                        size=size, scenario=scenario, archive_size=len(archive)
+                    )
+                    results.append(result)
+    finally:
+        server.stop()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(
+        f"{'size':>6}  {'scenario':<15} {'seconds':>8} {'MB/s':>8} "
+        f"{'CPU s/GB':>9} {'peak RSS':>10}"
+    )
+    for result in results:
+        rate = result["archive_size"] / result["seconds"] / 1e6
+        cpu_per_gb = result["cpu_seconds"] / (result["archive_size"] / 1e9)
+        print(
+            f"{result['size']:>6}  {result['scenario']:<15} {result['seconds']:8.3f} "
+            f"{rate:8.1f} {cpu_per_gb:9.2f} {result['peak_rss'] / 2**20:8.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
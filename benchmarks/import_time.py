@@ -0,0 +1,61 @@
+"""Measures how long importing notia takes in a fresh interpreter.
+
+    python benchmarks/import_time.py [--repeat 20]
+
+Each statement runs in a new process, so nothing is cached between runs, and
+the median wall time is reported along with the heavy dependencies the
+statement pulled in.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = [
+    "import notia",
+    "from notia.config import NOTIA_CACHE",
+    "import notia; notia.load_dataset",
+    "import notia; notia.config.Api",
+]
+HEAVY_MODULES = ["pandas", "pyarrow", "requests", "rich", "pydantic", "aiohttp"]
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, [m for m in {heavy!r} if m in sys.modules]]))
+"""
+
+
+def measure(statement: str, repeat: int):
+    timings, loaded = [], []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                _PROBE.format(statement=statement, heavy=HEAVY_MODULES),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        elapsed, loaded = json.loads(output)
+        timings.append(elapsed)
+    return statistics.median(timings), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    for statement in STATEMENTS:
+        elapsed, loaded = measure(statement, args.repeat)
+        print(f"{elapsed * 1000:8.1f} ms  {statement:40}  {', '.join(loaded) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""A local stand-in for the Notia API and the S3 objects it presigns.
+
+    python benchmarks/server.py --port 8000 --dataset bench-10m=10M
+
+Objects honour Range requests and carry an MD5 ETag like single part S3
+uploads. Latency, a bandwidth cap and failures can be injected to see how
+the client copes with slow or flaky networks:
+
+    NOTIA_ENDPOINT=http://127.0.0.1:8000 python -c "import notia; ..."
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zipfile
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+_RANGE_RE = re.compile(r"bytes=(\d+)-(\d*)")
+_SEND_SIZE = 64 * 1024
+
+
+@dataclass
+class Faults:
+    # seconds added before each response
+    latency: float = 0.0
+    # bytes per second of each response body, 0 for no limit
+    bandwidth: float = 0.0
+    # chance of answering an object request with a 503
+    error_rate: float = 0.0
+    # chance of closing the connection halfway through an object
+    drop_rate: float = 0.0
+    # presigned urls are rejected with a 403 once older than this, 0 never
+    url_ttl: float = 0.0
+    rng: random.Random = field(default_factory=lambda: random.Random(0))
+
+
+def make_dataset(size: int, splits=("train", "test"), compress=True) -> bytes:
+    """A zip archive of CSV splits totalling about size bytes uncompressed"""
+    rng = random.Random(size)
+    buffer = io.BytesIO()
+    method = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    with zipfile.ZipFile(buffer, "w", method) as archive:
+        for split in splits:
+            rows = ["id,category,value,label"]
+            written = 0
+            while written < size // len(splits):
+                row = (
+                    f"{len(rows)},c{rng.randrange(20)},"
+                    f"{rng.random():.6f},{rng.choice(['yes', 'no'])}"
+                )
+                rows.append(row)
+                written += len(row) + 1
+            archive.writestr(f"{split}.csv", "\n".join(rows) + "\n")
+    return buffer.getvalue()
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), faults: Optional[Faults] = None):
+        super().__init__(address, _Handler)
+        self.faults = faults or Faults()
+        self.objects: Dict[str, bytes] = {}
+        self.etags: Dict[str, str] = {}
+        self.requests = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_object(self, slug: str, data: bytes) -> None:
+        self.objects[slug] = data
+        self.etags[slug] = f'"{hashlib.md5(data).hexdigest()}"'
+
+    def start(self) -> "StandInServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: StandInServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.server.requests += 1
+        faults = self.server.faults
+        if faults.latency:
+            time.sleep(faults.latency)
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path == "/api/datasets/presign":
+            self._presign(query.get("slug"))
+        elif url.path == "/datasets/filter":
+            self._json({"results": [{"dataset": d} for d in self._catalog()]})
+        elif url.path == "/api/orders":
+            self._json([])
+        elif url.path.startswith("/objects/"):
+            self._object(url.path.rsplit("/", 1)[1], query)
+        else:
+            self._json({"detail": "Not found"}, 404)
+
+    def _catalog(self):
+        return [
+            {
+                "slug": slug,
+                "name": slug,
+                "description": "Generated by the stand-in server",
+                "size": len(data),
+                "created_at": "2022-01-01T00:00:00",
+                "price": None,
+                "status": "confirmed",
+                "license": None,
+            }
+            for slug, data in self.server.objects.items()
+        ]
+
+    def _presign(self, slug: Optional[str]) -> None:
+        if slug not in self.server.objects:
+            self._json({"detail": "Not found"}, 404)
+            return
+        self._json({"url": f"{self.server.url}/objects/{slug}?issued={time.time()}"})
+
+    def _object(self, slug: str, query: dict) -> None:
+        faults = self.server.faults
+        data = self.server.objects.get(slug)
+        if data is None:
+            self._json({"detail": "Not found"}, 404)
+            return
+        issued = float(query.get("issued", 0))
+        if faults.url_ttl and time.time() - issued > faults.url_ttl:
+            self._json({"detail": "Request has expired"}, 403)
+            return
+        if faults.rng.random() < faults.error_rate:
+            self._json({"detail": "Slow down"}, 503)
+            return
+
+        start, end, status = 0, len(data) - 1, 200
+        match = _RANGE_RE.match(self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2) or end), end)
+            status = 206
+        self.send_response(status)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("ETag", self.server.etags[slug])
+        self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.end_headers()
+
+        stop = end + 1
+        body = memoryview(data)[start:stop]
+        drop_at = None
+        if len(body) > 1 and faults.rng.random() < faults.drop_rate:
+            drop_at = len(body) // 2
+        sent, began = 0, time.monotonic()
+        while sent < len(body):
+            if drop_at is not None and sent >= drop_at:
+                self.close_connection = True
+                self.connection.shutdown(2)
+                return
+            chunk_end = sent + _SEND_SIZE
+            chunk = body[sent:chunk_end]
+            self.wfile.write(chunk)
+            sent += len(chunk)
+            if faults.bandwidth:
+                # sleep until the average rate is back under the cap
+                ahead = sent / faults.bandwidth - (time.monotonic() - began)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+    def _json(self, payload, status: int = 200) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from notia.cache import parse_size
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--dataset",
+        action="append",
+        default=[],
+        help="SLUG=SIZE, such as bench=100M, may be repeated",
+    )
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--bandwidth", default=None, help="such as 50M per second")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--url-ttl", type=float, default=0.0)
+    args = parser.parse_args()
+
+    faults = Faults(
+        latency=args.latency,
+        bandwidth=parse_size(args.bandwidth) or 0,
+        error_rate=args.error_rate,
+        drop_rate=args.drop_rate,
+        url_ttl=args.url_ttl,
+    )
+    server = StandInServer(("127.0.0.1", args.port), faults)
+    for dataset in args.dataset or ["bench=10M"]:
+        slug, size = dataset.split("=")
+        server.add_object(slug, make_dataset(parse_size(size)))
+    print(f"Serving {', '.join(server.objects)} on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
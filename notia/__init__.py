@@ -1,5 +1,43 @@
-from .login import login
-from .api import search, my_datasets
-from .download_manager import load_dataset
+import importlib
 
 __version__ = "0.1.0"
+
+# public names and the modules defining them. They are only imported on first
+# use, so importing notia does not pull in pandas, requests or rich.
+_LAZY_ATTRIBUTES = {
+    "login": ".login",
+    "search": ".api",
+    "iter_search": ".api",
+    "my_datasets": ".api",
+    "load_dataset": ".download_manager",
+    "clear_memory_cache": ".memory_cache",
+    "AsyncAPI": ".async_api",
+    "prefetch": ".prefetch",
+    "load_sharded": ".sharding",
+    "ShardedIterableDataset": ".sharding",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+        value = getattr(module, name)
+    else:
+        # submodules such as notia.config, as if imported explicitly
+        try:
+            value = importlib.import_module(f".{name}", __name__)
+        except ModuleNotFoundError as err:
+            if err.name != f"{__name__}.{name}":
+                raise
+            raise AttributeError(
+                f"module {__name__!r} has no attribute {name!r}"
+            ) from None
+    # importing notia.login binds the module to the name, so bind it last
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
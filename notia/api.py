@@ -1,10 +1,19 @@
 from zipfile import BadZipfile
+import json
+import threading
+import time
 import requests
-from typing import Optional
+from functools import partial
+from requests.adapters import HTTPAdapter
+from typing import Any, Callable, Dict, Iterator, List, Optional
 from notia.apikey import api_key_exists
 from notia.models.dataset import DatasetMeta
 from notia.models import Order
+from . import instrumentation, presign
 from .display import Display
+from .metadata_cache import MetadataCache
+from .retry import RetryPolicy
+from .search_index import SearchIndex
 
 
 class API:
@@ -12,12 +21,45 @@ class API:
     Class representing calls to the Notia.ai API
     """
 
-    def __init__(self, api_url: str) -> None:
+    def __init__(
+        self,
+        api_url: str,
+        pool_size: int = 10,
+        pool_per_host: int = 16,
+        timeout: Optional[float] = None,
+        metadata_cache: Optional[MetadataCache] = None,
+        offline: bool = False,
+        retry_policy: Optional[RetryPolicy] = None,
+    ) -> None:
         self._session = requests.Session()
+        # keep-alive connections are reused by API calls and downloads alike
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_per_host)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
         self._api_url = api_url
         self._api_key = api_key_exists(self._api_url)
+        self._timeout = timeout
+        # search results and orders are served from here when not expired
+        self._metadata = metadata_cache
+        # only answer from the metadata cache, never reaching the API
+        self._offline = offline
+        # GET requests throttled or failed with a 5xx are retried
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._search_index: Optional[SearchIndex] = None
+        # presigned urls by request key, reused until shortly before they expire
+        self._presigned: Dict[str, dict] = {}
+        self._presign_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
         self._display = Display()
 
+    @property
+    def session(self) -> requests.Session:
+        return self._session
+
+    @property
+    def metadata(self) -> Optional[MetadataCache]:
+        return self._metadata
+
     @property
     def api_key(self):
         return self._api_key
@@ -25,16 +67,19 @@ class API:
     @api_key.setter
     def api_key(self, new_key):
         self._api_key = new_key
+        # urls presigned for the previous key
+        self._presigned.clear()
 
-    def Search(self, term=None, web_url=None) -> None:
+    def Search(self, term=None, web_url=None, local=False) -> None:
         try:
-            response = self._RequestUrl(
-                self._api_url + "/datasets/filter", "GET", params={"search_query": term}
-            )
-            response_results = response.json()["results"]
-            dataset_list = [
-                DatasetMeta(**dataset["dataset"]) for dataset in response_results
-            ]
+            if local:
+                dataset_list = self.LocalIndex().search(term)
+            else:
+                dataset_list = self._RequestCached(
+                    self._api_url + "/datasets/filter",
+                    params={"search_query": term},
+                    parse=self._ParseDatasets,
+                )
             self._display.datasetsAsTable(dataset_list, web_url)
         except requests.exceptions.RequestException:
             self._display.error(
@@ -46,10 +91,52 @@ class API:
         except Exception as err:
             self._display.error(f"{err}")
 
+    def IterSearch(self, term=None, page_size: int = 100) -> Iterator[DatasetMeta]:
+        """Yields the datasets matching term, requesting the next page of
+        page_size results only once the previous one has been consumed"""
+        seen = set()
+        page = 1
+        while True:
+            dataset_list, has_next = self._RequestCached(
+                self._api_url + "/datasets/filter",
+                params={"search_query": term, "page": page, "page_size": page_size},
+                parse=partial(self._ParseDatasetPage, page_size=page_size),
+            )
+            new_datasets = [d for d in dataset_list if d.slug not in seen]
+            yield from new_datasets
+            # a server ignoring the page parameters sends every result each time
+            if not has_next or not new_datasets or len(dataset_list) > page_size:
+                return
+            seen.update(dataset.slug for dataset in new_datasets)
+            page += 1
+
+    def LocalIndex(self, refresh: bool = False) -> SearchIndex:
+        """Index over the name and description of every dataset, answering
+        queries without a request.
+
+        It is built from a snapshot of the catalog kept in the metadata
+        cache, which is taken on first use or when refresh is set.
+        """
+        if self._search_index is not None and not refresh:
+            return self._search_index
+        catalog = None
+        if self._metadata is not None and not refresh:
+            catalog = self._metadata.read_catalog()
+        if catalog is None:
+            dataset_list = list(self.IterSearch())
+            catalog = [
+                json.loads(dataset.json(by_alias=True)) for dataset in dataset_list
+            ]
+            if self._metadata is not None:
+                self._metadata.write_catalog(catalog)
+        self._search_index = SearchIndex(DatasetMeta(**dataset) for dataset in catalog)
+        return self._search_index
+
     def Orders(self, web_url=None) -> None:
         try:
-            response = self._RequestUrl(f"{self._api_url}/api/orders", "GET")
-            order_list = [Order(**order) for order in response.json()]
+            order_list = self._RequestCached(
+                f"{self._api_url}/api/orders", parse=self._ParseOrders
+            )
 
             self._display.ordersAsTable(order_list, web_url)
         except requests.exceptions.RequestException:
@@ -61,12 +148,60 @@ class API:
             )
             raise
 
-    def GetPresigned(self, slug: str) -> Optional[str]:
+    def GetPresigned(self, slug: str, refresh: bool = False) -> Optional[str]:
+        """A presigned url to download slug from.
+
+        Urls are kept in memory and in the metadata cache under the API key
+        they were presigned for, and reused until shortly before the expiry
+        in their query string. With refresh, the
+        cached url is taken to be rejected and a new one is fetched, unless
+        another thread fetched one during the call.
+        """
+        requested_at = time.time()
+        with self._lock:
+            lock = self._presign_locks.setdefault(slug, threading.Lock())
+        with lock:
+            record = self._CachedPresigned(slug)
+            if record is not None and (
+                not refresh or record["fetched_at"] >= requested_at
+            ):
+                instrumentation.count("presign_cache.hit")
+                return record["url"]
+            instrumentation.count("presign_cache.miss")
+            return self._FetchPresigned(slug)
+
+    def _PresignKey(self, slug: str) -> str:
         request_url = self._api_url + "/api/datasets/presign"
+        return MetadataCache.key(request_url, {"slug": slug}, self._api_key)
+
+    def _CachedPresigned(self, slug: str) -> Optional[dict]:
+        key = self._PresignKey(slug)
+        record = self._presigned.get(key)
+        if record is None and self._metadata is not None:
+            record = self._metadata.presigned(key)
+        if record is None or not presign.is_fresh(record["url"]):
+            return None
+        self._presigned[key] = record
+        return record
+
+    def _FetchPresigned(self, slug: str) -> Optional[str]:
+        request_url = self._api_url + "/api/datasets/presign"
+        key = self._PresignKey(slug)
         try:
-            response = self._RequestUrl(request_url, "GET", params={"slug": slug})
-            response.raise_for_status()
+            with instrumentation.span("presign", slug=slug):
+                response = self._RequestUrl(request_url, "GET", params={"slug": slug})
+                response.raise_for_status()
             presigned_url = response.json()["url"]
+            expires_at = presign.expires_at(presigned_url)
+            if expires_at is not None:
+                record = {
+                    "url": presigned_url,
+                    "fetched_at": time.time(),
+                    "expires_at": expires_at,
+                }
+                self._presigned[key] = record
+                if self._metadata is not None:
+                    self._metadata.record_presigned(key, record)
             return presigned_url
         except requests.exceptions.RequestException:
             self._display.error(
@@ -84,21 +219,161 @@ class API:
             )
             raise
 
+    def _ParseDatasets(self, body) -> List[DatasetMeta]:
+        dataset_list = [
+            DatasetMeta(**dataset["dataset"]) for dataset in body["results"]
+        ]
+        if self._metadata is not None:
+            self._metadata.record_sizes(
+                {dataset.slug: dataset.size for dataset in dataset_list}
+            )
+            self._metadata.record_schemas(
+                {
+                    dataset.slug: dataset.schema_
+                    for dataset in dataset_list
+                    if dataset.schema_
+                }
+            )
+            self._metadata.record_datasets(
+                {
+                    dataset.slug: json.loads(dataset.json(by_alias=True))
+                    for dataset in dataset_list
+                }
+            )
+        return dataset_list
+
+    def _ParseDatasetPage(self, body, page_size: int):
+        dataset_list = self._ParseDatasets(body)
+        if "next" in body:
+            return dataset_list, body["next"] is not None
+        # without a link to the next page, a full page may be followed by another
+        return dataset_list, len(dataset_list) == page_size
+
+    def _ParseOrders(self, body) -> List[Order]:
+        order_list = [Order(**order) for order in body]
+        if self._metadata is not None:
+            self._metadata.record_sizes(
+                {order.dataset_slug: order.purchase_size for order in order_list}
+            )
+        return order_list
+
+    def _RequestCached(
+        self,
+        url: str,
+        params: Optional[dict] = None,
+        parse: Callable[[Any], Any] = lambda body: body,
+    ):
+        """GETs url and returns parse applied to its JSON body, going through
+        the metadata cache when there is one.
+
+        A cached body is used without a request until it expires, then it is
+        revalidated with a conditional request. When the API cannot be
+        reached an expired body is used rather than failing.
+        """
+        if self._metadata is None:
+            response = self._RequestUrl(url, "GET", params=params)
+            response.raise_for_status()
+            return parse(response.json())
+
+        key = self._metadata.key(url, params, self._api_key)
+        entry = self._metadata.get(key)
+        if entry is not None and (self._offline or self._metadata.is_fresh(entry)):
+            instrumentation.count("metadata_cache.hit")
+            return self._metadata.parsed(entry, parse)
+        if self._offline:
+            raise requests.exceptions.ConnectionError(
+                f"{url} is not cached and NOTIA_OFFLINE is set"
+            )
+        try:
+            response = self._RequestUrl(
+                url,
+                "GET",
+                params=params,
+                headers=entry.validators() if entry is not None else None,
+            )
+            if response.status_code == 304 and entry is not None:
+                instrumentation.count("metadata_cache.revalidated")
+                entry = self._metadata.revalidated(key, entry)
+            else:
+                instrumentation.count("metadata_cache.miss")
+                response.raise_for_status()
+                entry = self._metadata.put(key, response.json(), response.headers)
+        except requests.exceptions.RequestException:
+            if entry is None:
+                raise
+            self._display.warning(f"Unable to reach {url}, using cached results")
+        return self._metadata.parsed(entry, parse)
+
     def _RequestUrl(
-        self, url: str, verb: str, params: Optional[dict] = None, json=None
+        self,
+        url: str,
+        verb: str,
+        params: Optional[dict] = None,
+        json=None,
+        headers: Optional[dict] = None,
     ) -> requests.Response:
         if verb == "POST":
-            return self._session.post(url, auth=(self._api_key, ""))
+            # not idempotent, so never retried
+            return self._session.post(
+                url, auth=(self._api_key, ""), timeout=self._timeout, headers=headers
+            )
         elif verb == "GET":
-            return self._session.get(url, params=params, auth=(self._api_key, ""))
+            return self._retry_policy.call(
+                partial(
+                    self._session.get,
+                    url,
+                    params=params,
+                    auth=(self._api_key, ""),
+                    timeout=self._timeout,
+                    headers=headers,
+                ),
+                on_retry=partial(self._LogRetry, url),
+            )
         else:
             raise ValueError("Invalid HTTP operation provided")
 
+    def _LogRetry(self, url: str, tries: int, wait_time: float, reason: str) -> None:
+        instrumentation.count("api.retries")
+        self._display.log(
+            f"Request to {url} failed with {reason}, retrying in {wait_time:.1f}s... "
+            f"[{tries}/{self._retry_policy.max_retries}]"
+        )
 
-def search(term=None) -> None:
+
+def search(term=None, local: bool = False) -> None:
+    """
+    Display the datasets matching term.
+    Arguments:
+        term: (string, optional) search query, lists every dataset if not provided.
+        local: (bool, optional) if True, the query is answered from a local
+            index of the catalog without a request, see iter_search.
+    """
     from .config import Api, NOTIA_WEB
 
-    Api.Search(term, NOTIA_WEB)
+    Api.Search(term, NOTIA_WEB, local)
+
+
+def iter_search(
+    term=None, page_size: int = 100, local: bool = False, refresh: bool = False
+) -> Iterator[DatasetMeta]:
+    """
+    Iterate over the datasets matching term.
+    Arguments:
+        term: (string, optional) search query, yields every dataset if not provided.
+        page_size: (int, optional) number of results requested at a time.
+        local: (bool, optional) if True, matches term against the name and
+            description of each dataset in a snapshot of the catalog, taken
+            on first use. Misspelt and partial words also match, and no
+            request is made once the snapshot exists.
+        refresh: (bool, optional) with local, take a new snapshot first.
+    Returns:
+        An iterator of DatasetMeta, best matches first when local.
+    """
+    from .config import Api
+
+    if local:
+        return iter(Api.LocalIndex(refresh).search(term))
+    return Api.IterSearch(term, page_size)
 
 
 def my_datasets() -> None:
@@ -0,0 +1,163 @@
+"""Reading splits straight out of a dataset's zip archive.
+
+A dataset cached without extraction keeps its archive inside the cache
+entry. Each member stands in for the file it would have been extracted to,
+so a path such as <entry>/train.csv refers to the member train.csv whenever
+no such file exists. Modules that read source files go through
+open_source and source_stat rather than the filesystem, and work the same
+for extracted and archived datasets.
+"""
+
+import io
+import mmap
+import os
+import threading
+from typing import Dict, List, Tuple
+from zipfile import ZipFile, ZipInfo, ZIP_STORED
+
+from .remote_zip import _LOCAL_HEADER
+
+# hidden, so the archive itself is never taken for a split
+ARCHIVE_NAME = ".notia-archive.zip"
+
+# the members of each archive, with the mtime and size they were read at
+_members_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, ZipInfo]]] = {}
+_members_lock = threading.Lock()
+
+
+def archive_path(dataset_path: str) -> str:
+    return os.path.join(dataset_path, ARCHIVE_NAME)
+
+
+def members(dataset_path: str) -> Dict[str, ZipInfo]:
+    """The files at the root of the archive of dataset_path by name, or
+    nothing if it has none. The central directory is read once per archive."""
+    path = archive_path(dataset_path)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _members_lock:
+        cached = _members_cache.get(path)
+        if cached is None or cached[0] != version:
+            # replaces the members of an earlier version of the archive
+            with ZipFile(path) as zip_file:
+                cached = _members_cache[path] = (
+                    version,
+                    {
+                        info.filename: info
+                        for info in zip_file.infolist()
+                        if not info.is_dir() and "/" not in info.filename.strip("/")
+                    },
+                )
+        return cached[1]
+
+
+def list_files(dataset_path: str) -> List[str]:
+    """Names of the files in dataset_path, including archive members"""
+    names = set(members(dataset_path))
+    names.update(name for name in os.listdir(dataset_path) if name != ARCHIVE_NAME)
+    return sorted(names)
+
+
+def exists(path: str) -> bool:
+    """Whether path is a file or an archive member"""
+    return os.path.exists(path) or _member(path) is not None
+
+
+def is_member(path: str) -> bool:
+    """Whether path is an archive member rather than a file"""
+    return not os.path.exists(path) and _member(path) is not None
+
+
+def source_stat(path: str) -> os.stat_result:
+    """os.stat of path, or of the archive holding it. Caches keyed by the
+    mtime and size of a source file are invalidated with the archive."""
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        if _member(path) is None:
+            raise
+        return os.stat(archive_path(os.path.dirname(path)))
+
+
+def source_size(path: str) -> int:
+    """Size of path, or of the archive member standing in for it"""
+    if os.path.exists(path):
+        return os.path.getsize(path)
+    info = _member(path)
+    if info is None:
+        raise FileNotFoundError(path)
+    return info.file_size
+
+
+def open_source(path: str):
+    """Opens path for binary reading, decompressing it from the archive if
+    it was not extracted. Members stored without compression are read from
+    a memory map of the archive rather than through the zip module, behind
+    a buffer so reading line by line is not done a byte at a time."""
+    if os.path.exists(path):
+        return open(path, "rb")
+    info = _member(path)
+    if info is None:
+        raise FileNotFoundError(path)
+    source = archive_path(os.path.dirname(path))
+    if info.compress_type == ZIP_STORED and not info.flag_bits & 0x1:
+        return io.BufferedReader(_MappedMember(source, info))
+    zip_file = ZipFile(source)
+    # the archive file stays open until the member is closed
+    member = zip_file.open(info)
+    zip_file.close()
+    return member
+
+
+def _member(path: str):
+    return members(os.path.dirname(path)).get(os.path.basename(path))
+
+
+class _MappedMember(io.RawIOBase):
+    """A stored member read from a memory map of its archive, so reads copy
+    straight from the page cache"""
+
+    def __init__(self, source: str, info: ZipInfo) -> None:
+        with open(source, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = _LOCAL_HEADER.unpack_from(self._map, info.header_offset)
+        self._start = info.header_offset + _LOCAL_HEADER.size + header[9] + header[10]
+        self._size = info.file_size
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = max(0, offset)
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        start = self._start + self._position
+        count = min(len(view), self._size - self._position)
+        if count <= 0:
+            return 0
+        end = start + count
+        with memoryview(self._map) as mapped:
+            view[:count] = mapped[start:end]
+        self._position += count
+        return count
+
+    def close(self) -> None:
+        if not self.closed:
+            self._map.close()
+        super().close()
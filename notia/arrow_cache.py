@@ -0,0 +1,172 @@
+import os
+import glob
+import uuid
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+from . import archive
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.feather as feather
+    from pyarrow import fs
+except ImportError:  # pragma: no cover
+    pa = None
+
+# converted splits are kept in a hidden directory next to the extracted files
+ARROW_CACHE_DIR = ".arrow"
+
+_OPERATORS = {
+    "==": lambda field, value: field == value,
+    "=": lambda field, value: field == value,
+    "!=": lambda field, value: field != value,
+    "<": lambda field, value: field < value,
+    "<=": lambda field, value: field <= value,
+    ">": lambda field, value: field > value,
+    ">=": lambda field, value: field >= value,
+    "in": lambda field, value: field.isin(value),
+    "not in": lambda field, value: ~field.isin(value),
+}
+
+
+def is_available() -> bool:
+    return pa is not None
+
+
+def cached_path(source_path: str) -> str:
+    """Path of the Arrow IPC file for source_path, keyed by its mtime and size
+    so a modified source is parsed again"""
+    stat = archive.source_stat(source_path)
+    return os.path.join(
+        os.path.dirname(source_path),
+        ARROW_CACHE_DIR,
+        f"{os.path.basename(source_path)}.{stat.st_mtime_ns}-{stat.st_size}.arrow",
+    )
+
+
+def read(
+    source_path: str,
+    columns: Optional[List[str]] = None,
+    filters=None,
+) -> Optional[pd.DataFrame]:
+    """Reads the converted copy of source_path, or returns None if there is
+    none. Only the requested columns and the rows matching filters are read
+    from the memory mapped file."""
+    table = read_table(source_path, columns, filters)
+    return None if table is None else table.to_pandas()
+
+
+def read_table(
+    source_path: str,
+    columns: Optional[List[str]] = None,
+    filters=None,
+):
+    """Like read, but returns the Arrow table. Without filters the table's
+    buffers point straight into the memory mapped file."""
+    dataset = _open(source_path)
+    if dataset is None:
+        return None
+    return dataset.to_table(columns=columns, filter=to_expression(filters))
+
+
+def count_rows(source_path: str, filters=None) -> Optional[int]:
+    """Number of rows in the converted copy of source_path, read from the
+    file's metadata when there are no filters"""
+    dataset = _open(source_path)
+    if dataset is None:
+        return None
+    return dataset.count_rows(filter=to_expression(filters))
+
+
+def head(
+    source_path: str,
+    num_rows: int,
+    columns: Optional[List[str]] = None,
+    filters=None,
+):
+    """First num_rows rows of the converted copy of source_path, reading no
+    further into the file than needed"""
+    dataset = _open(source_path)
+    if dataset is None:
+        return None
+    return dataset.head(num_rows, columns=columns, filter=to_expression(filters))
+
+
+def iter_batches(
+    source_path: str,
+    chunksize: int,
+    columns: Optional[List[str]] = None,
+    filters=None,
+) -> Optional[Iterator[pd.DataFrame]]:
+    """Like read, but yields DataFrames of at most chunksize rows"""
+    dataset = _open(source_path)
+    if dataset is None:
+        return None
+    batches = dataset.to_batches(
+        columns=columns, filter=to_expression(filters), batch_size=chunksize
+    )
+    return (batch.to_pandas() for batch in batches if batch.num_rows)
+
+
+def write(source_path: str, frame: pd.DataFrame) -> bool:
+    """Stores frame as the converted copy of source_path, replacing copies of
+    earlier versions of the file. Returns False if frame has columns Arrow
+    cannot represent."""
+    path = cached_path(source_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return False
+    # uncompressed so the file can be memory mapped without a copy
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    feather.write_feather(table, temp_path, compression="uncompressed")
+    os.replace(temp_path, path)
+    for stale_path in glob.glob(
+        os.path.join(
+            os.path.dirname(path), f"{glob.escape(os.path.basename(source_path))}.*"
+        )
+    ):
+        if stale_path != path and not stale_path.endswith(".tmp"):
+            os.remove(stale_path)
+    return True
+
+
+def to_expression(filters):
+    """Converts filters to a pyarrow expression, see to_predicate"""
+    if isinstance(filters, ds.Expression):
+        return filters
+    return to_predicate(filters, ds.field)
+
+
+def to_predicate(filters, field):
+    """Combines filters into a single predicate.
+
+    filters is a list of (column, op, value) tuples that must all match, or a
+    list of such lists any of which must match, as accepted by
+    pandas.read_parquet. field maps a column name to an object supporting
+    comparisons, such as a pyarrow field or a pandas Series.
+    """
+    if not filters:
+        return None
+    if not isinstance(filters[0], list):
+        filters = [filters]
+    predicate = None
+    for conjunction in filters:
+        clause = None
+        for column, op, value in conjunction:
+            if op not in _OPERATORS:
+                raise ValueError(f"Unsupported filter operator {op}")
+            condition = _OPERATORS[op](field(column), value)
+            clause = condition if clause is None else clause & condition
+        predicate = clause if predicate is None else predicate | clause
+    return predicate
+
+
+def _open(source_path: str):
+    path = cached_path(source_path)
+    if not os.path.exists(path):
+        return None
+    return ds.dataset(path, format="ipc", filesystem=fs.LocalFileSystem(use_mmap=True))
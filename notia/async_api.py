@@ -0,0 +1,116 @@
+import asyncio
+import aiohttp
+from typing import List, Optional
+from notia.apikey import api_key_exists
+from notia.models import DatasetMeta, Order
+from .config import (
+    NOTIA_API_RETRIES,
+    NOTIA_ENDPOINT,
+    NOTIA_POOL_SIZE,
+    NOTIA_POOL_PER_HOST,
+    NOTIA_TIMEOUT,
+)
+from .retry import RETRY_STATUSES, RetryPolicy
+
+
+class AsyncAPI:
+    """
+    Asynchronous client for the Notia.ai API.
+
+    Every request made through a client shares one pooled connector, so
+    concurrent calls reuse keep-alive connections rather than paying for a
+    new TLS handshake each time. Use it as an async context manager, or call
+    close when done. Requests throttled or failed with a 5xx are retried
+    following retry_policy.
+    """
+
+    def __init__(
+        self,
+        api_url: str = NOTIA_ENDPOINT,
+        limit: int = NOTIA_POOL_SIZE,
+        limit_per_host: int = NOTIA_POOL_PER_HOST,
+        timeout: float = NOTIA_TIMEOUT,
+        keepalive_timeout: float = 30.0,
+        retry_policy: Optional[RetryPolicy] = None,
+    ) -> None:
+        self._api_url = api_url
+        self._api_key = api_key_exists(self._api_url)
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._timeout = timeout
+        self._keepalive_timeout = keepalive_timeout
+        self._retry_policy = retry_policy or RetryPolicy(NOTIA_API_RETRIES)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def api_key(self):
+        return self._api_key
+
+    @api_key.setter
+    def api_key(self, new_key):
+        self._api_key = new_key
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        # created lazily as aiohttp sessions must be created inside a running loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._limit,
+                limit_per_host=self._limit_per_host,
+                keepalive_timeout=self._keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self._timeout),
+            )
+        return self._session
+
+    async def __aenter__(self) -> "AsyncAPI":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def Search(self, term=None) -> List[DatasetMeta]:
+        params = {"search_query": term} if term is not None else None
+        response_json = await self._RequestJson(
+            self._api_url + "/datasets/filter", params=params
+        )
+        return [
+            DatasetMeta(**dataset["dataset"])
+            for dataset in response_json.get("results", [])
+        ]
+
+    async def Orders(self) -> List[Order]:
+        response_json = await self._RequestJson(f"{self._api_url}/api/orders")
+        return [Order(**order) for order in response_json]
+
+    async def GetPresigned(self, slug: str) -> str:
+        response_json = await self._RequestJson(
+            self._api_url + "/api/datasets/presign", params={"slug": slug}
+        )
+        return response_json["url"]
+
+    async def _RequestJson(self, url: str, params: Optional[dict] = None):
+        auth = aiohttp.BasicAuth(self._api_key, "") if self._api_key else None
+        policy, tries = self._retry_policy, 0
+        while True:
+            try:
+                async with self.session.get(url, params=params, auth=auth) as response:
+                    if response.status in RETRY_STATUSES and tries < policy.max_retries:
+                        tries += 1
+                        wait_time = policy.wait_time(tries, response)
+                    else:
+                        response.raise_for_status()
+                        return await response.json(content_type=None)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if tries >= policy.max_retries:
+                    raise
+                tries += 1
+                wait_time = policy.wait_time(tries)
+            await asyncio.sleep(wait_time)
@@ -0,0 +1,242 @@
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Union
+
+from . import manifest
+from .config import (
+    NOTIA_CACHE,
+    NOTIA_CACHE_MAX_SIZE,
+    NOTIA_CACHE_POLICY,
+    EXTRACTED_DATASETS_DIR,
+    DOWNLOADED_DATASETS_DIR,
+    LOCKS_DIR,
+)
+from .lock import FileLock
+
+INDEX_NAME = ".index.json"
+# partial files untouched for this long are assumed to be left by a crash
+STALE_AFTER = 24 * 60 * 60
+
+_SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGTP]?)(?:i?B)?\s*$", re.IGNORECASE)
+_SIZE_UNITS = {"": 0, "K": 1, "M": 2, "G": 3, "T": 4, "P": 5}
+
+
+def parse_size(size: Union[int, str, None]) -> Optional[int]:
+    """Parses a size such as 500M or 20GB into bytes, with 1K = 1024 bytes"""
+    if size is None or isinstance(size, int):
+        return size
+    match = _SIZE_RE.match(size)
+    if match is None:
+        raise ValueError(f"Invalid size {size}, expected a value such as 500M or 20G")
+    return int(float(match.group(1)) * 1024 ** _SIZE_UNITS[match.group(2).upper()])
+
+
+@dataclass
+class CacheEntry:
+    slug: str
+    path: str
+    size: int
+    last_access: float
+    hits: int
+    pinned: bool
+
+
+class CacheManager:
+    """Tracks usage of the datasets in the cache and evicts them to keep the
+    cache under a maximum size.
+
+    Accesses are recorded in an index file at the root of the cache, which
+    drives least recently (lru) or least frequently (lfu) used eviction.
+    Pinned datasets are never evicted.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_size: Union[int, str, None] = None,
+        policy: Optional[str] = None,
+    ) -> None:
+        self.cache_dir = str(cache_dir or NOTIA_CACHE)
+        self.max_size = parse_size(
+            NOTIA_CACHE_MAX_SIZE if max_size is None else max_size
+        )
+        self.policy = (policy or NOTIA_CACHE_POLICY).lower()
+        if self.policy not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction policy {self.policy}, use lru or lfu")
+        self.index_path = os.path.join(self.cache_dir, INDEX_NAME)
+        self.downloads_dir = os.path.join(self.cache_dir, DOWNLOADED_DATASETS_DIR)
+        self.extract_dir = os.path.join(self.cache_dir, EXTRACTED_DATASETS_DIR)
+
+    def touch(self, slug: str) -> None:
+        """Records an access to slug"""
+        with self._index() as index:
+            record = index.setdefault(slug, {"hits": 0, "pinned": False})
+            record["hits"] += 1
+            record["last_access"] = time.time()
+
+    def pin(self, slug: str) -> None:
+        with self._index() as index:
+            index.setdefault(slug, {"hits": 0, "last_access": time.time()})
+            index[slug]["pinned"] = True
+
+    def unpin(self, slug: str) -> None:
+        with self._index() as index:
+            if slug in index:
+                index[slug]["pinned"] = False
+
+    def entries(self) -> List[CacheEntry]:
+        """Every complete dataset in the cache"""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        index = self._read_index()
+        entries = []
+        for slug in sorted(os.listdir(self.cache_dir)):
+            path = os.path.join(self.cache_dir, slug)
+            if not manifest.is_complete(path):
+                continue
+            record = index.get(slug, {})
+            entries.append(
+                CacheEntry(
+                    slug=slug,
+                    path=path,
+                    size=_directory_size(path),
+                    last_access=record.get("last_access", os.path.getmtime(path)),
+                    hits=record.get("hits", 0),
+                    pinned=record.get("pinned", False),
+                )
+            )
+        return entries
+
+    def size(self) -> int:
+        return sum(entry.size for entry in self.entries())
+
+    def remove(self, slug: str) -> bool:
+        """Deletes slug from the cache unless it is being downloaded.
+        Returns whether it was removed."""
+        path = os.path.join(self.cache_dir, slug)
+        lock = FileLock(os.path.join(self.cache_dir, LOCKS_DIR, f"{slug}.lock"), 0)
+        try:
+            lock.acquire()
+        except TimeoutError:
+            return False
+        try:
+            if not os.path.exists(path):
+                return False
+            # move aside first, so the entry disappears atomically
+            os.makedirs(self.extract_dir, exist_ok=True)
+            removed_path = os.path.join(self.extract_dir, f"{slug}.{uuid.uuid4().hex}")
+            os.replace(path, removed_path)
+            shutil.rmtree(removed_path, ignore_errors=True)
+        finally:
+            lock.release()
+        with self._index() as index:
+            index.pop(slug, None)
+        return True
+
+    def prune(
+        self,
+        max_size: Union[int, str, None] = None,
+        keep: Iterable[str] = (),
+        dry_run: bool = False,
+    ) -> List[CacheEntry]:
+        """Evicts unpinned datasets until the cache fits in max_size bytes,
+        defaulting to the manager's max_size. Datasets in keep are never
+        evicted. Returns the evicted entries."""
+        max_size = self.max_size if max_size is None else parse_size(max_size)
+        if max_size is None:
+            return []
+        entries = self.entries()
+        total = sum(entry.size for entry in entries)
+        keep = set(keep)
+        if self.policy == "lfu":
+            candidates = sorted(entries, key=lambda e: (e.hits, e.last_access))
+        else:
+            candidates = sorted(entries, key=lambda e: e.last_access)
+        evicted = []
+        for entry in candidates:
+            if total <= max_size:
+                break
+            if entry.pinned or entry.slug in keep:
+                continue
+            if dry_run or self.remove(entry.slug):
+                evicted.append(entry)
+                total -= entry.size
+        return evicted
+
+    def gc(self, max_age: float = STALE_AFTER) -> List[str]:
+        """Removes partial downloads and extractions left behind by crashed
+        processes, once untouched for max_age seconds. Returns their paths."""
+        removed = []
+        now = time.time()
+        for directory in (self.downloads_dir, self.extract_dir):
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if now - _last_modified(path) < max_age:
+                    continue
+                # partial files are named after their slug, skip those in use
+                slug = name.split(".")[0]
+                lock = FileLock(
+                    os.path.join(self.cache_dir, LOCKS_DIR, f"{slug}.lock"), 0
+                )
+                try:
+                    lock.acquire()
+                except TimeoutError:
+                    continue
+                try:
+                    if os.path.isdir(path):
+                        shutil.rmtree(path, ignore_errors=True)
+                    else:
+                        os.remove(path)
+                    removed.append(path)
+                finally:
+                    lock.release()
+        return removed
+
+    def _read_index(self) -> Dict[str, dict]:
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @contextmanager
+    def _index(self):
+        """Yields the index for modification under a lock, writing it back
+        atomically at the end of the block"""
+        with FileLock(os.path.join(self.cache_dir, LOCKS_DIR, f"{INDEX_NAME}.lock")):
+            index = self._read_index()
+            yield index
+            temp_path = f"{self.index_path}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(index, f)
+            os.replace(temp_path, self.index_path)
+
+
+def _directory_size(path: str) -> int:
+    total = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _last_modified(path: str) -> float:
+    latest = os.path.getmtime(path)
+    for root, _, names in os.walk(path):
+        for name in names:
+            try:
+                latest = max(latest, os.path.getmtime(os.path.join(root, name)))
+            except OSError:
+                pass
+    return latest
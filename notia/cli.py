@@ -0,0 +1,88 @@
+import click
+
+from .cache import CacheManager
+from .display import Display
+
+
+@click.group()
+def cli():
+    """Command line interface to Notia.ai"""
+
+
+@cli.group()
+@click.option("--cache-dir", default=None, help="Defaults to NOTIA_CACHE.")
+@click.pass_context
+def cache(ctx, cache_dir):
+    """Inspect and prune the local dataset cache."""
+    ctx.obj = CacheManager(cache_dir)
+
+
+@cache.command("list")
+@click.pass_obj
+def list_entries(cache_manager: CacheManager):
+    """List cached datasets."""
+    display = Display()
+    entries = cache_manager.entries()
+    display.cacheAsTable(entries)
+    display.log(
+        f"Total {display._displayFileSize(sum(entry.size for entry in entries))}"
+    )
+
+
+@cache.command()
+@click.option(
+    "--max-size", default=None, help="Such as 50G, defaults to NOTIA_CACHE_MAX_SIZE."
+)
+@click.option("--dry-run", is_flag=True, help="Only list what would be evicted.")
+@click.pass_obj
+def prune(cache_manager: CacheManager, max_size, dry_run):
+    """Evict datasets until the cache fits in its maximum size."""
+    display = Display()
+    if max_size is None and cache_manager.max_size is None:
+        raise click.UsageError("Provide --max-size or set NOTIA_CACHE_MAX_SIZE")
+    for entry in cache_manager.prune(max_size, dry_run=dry_run):
+        display.log(f"{'Would evict' if dry_run else 'Evicted'} {entry.slug}")
+
+
+@cache.command()
+@click.argument("slug")
+@click.pass_obj
+def pin(cache_manager: CacheManager, slug):
+    """Never evict SLUG."""
+    cache_manager.pin(slug)
+
+
+@cache.command()
+@click.argument("slug")
+@click.pass_obj
+def unpin(cache_manager: CacheManager, slug):
+    """Allow SLUG to be evicted again."""
+    cache_manager.unpin(slug)
+
+
+@cache.command()
+@click.argument("slug")
+@click.pass_obj
+def remove(cache_manager: CacheManager, slug):
+    """Delete SLUG from the cache."""
+    if not cache_manager.remove(slug):
+        raise click.ClickException(f"{slug} is not cached or is being downloaded")
+
+
+@cache.command()
+@click.option(
+    "--max-age",
+    default=24 * 60 * 60,
+    show_default=True,
+    help="Seconds a partial file must be untouched before it is removed.",
+)
+@click.pass_obj
+def gc(cache_manager: CacheManager, max_age):
+    """Remove partial files left behind by interrupted downloads."""
+    display = Display()
+    for path in cache_manager.gc(max_age):
+        display.log(f"Removed {path}")
+
+
+if __name__ == "__main__":
+    cli()
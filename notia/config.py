@@ -1,14 +1,101 @@
-from .api import API as InternalAPI
-from .display import Display as InternalDisplay
 import os
+import threading
 
 NOTIA_ENDPOINT = os.environ.get("NOTIA_ENDPOINT", "https://notia.api.notia.ai")
 NOTIA_WEB = os.environ.get("NOTIA_WEB", "https://notia.ai")
-Api = InternalAPI(api_url=NOTIA_ENDPOINT)
-Display = InternalDisplay()
+# connection pool shared by API calls and downloads, and request timeout in seconds
+NOTIA_POOL_SIZE = int(os.getenv("NOTIA_POOL_SIZE", 100))
+NOTIA_POOL_PER_HOST = int(os.getenv("NOTIA_POOL_PER_HOST", 16))
+NOTIA_TIMEOUT = float(os.getenv("NOTIA_TIMEOUT", 100.0))
 
 NOTIA_CACHE = "~/.cache/notia/datasets"
 NOTIA_CACHE = os.path.expanduser(os.getenv("NOTIA_CACHE", NOTIA_CACHE))
 
+# seconds search results and orders are used before being revalidated
+NOTIA_METADATA_TTL = float(os.getenv("NOTIA_METADATA_TTL", 300))
+# answer from cached metadata only, without reaching the API
+NOTIA_OFFLINE = os.getenv("NOTIA_OFFLINE", "0") != "0"
+# no console output or progress bars, messages still go to the notia logger
+NOTIA_QUIET = os.getenv("NOTIA_QUIET", "0") != "0"
+
 EXTRACTED_DATASETS_DIR = "extracted"
 DOWNLOADED_DATASETS_DIR = "downloads"
+LOCKS_DIR = ".locks"
+
+# evict least recently (lru) or least frequently (lfu) used datasets once the
+# cache grows beyond this size, such as 50G, unset for no limit
+NOTIA_CACHE_MAX_SIZE = os.getenv("NOTIA_CACHE_MAX_SIZE")
+NOTIA_CACHE_POLICY = os.getenv("NOTIA_CACHE_POLICY", "lru")
+# memory budget for DataFrames kept between load_dataset calls, 0 disables
+NOTIA_MEMORY_CACHE_SIZE = os.getenv("NOTIA_MEMORY_CACHE_SIZE", "1G")
+
+# number of concurrent ranged requests used to fetch a single dataset
+NOTIA_DOWNLOAD_WORKERS = int(os.getenv("NOTIA_DOWNLOAD_WORKERS", 8))
+# size of each byte range requested when downloading in parallel
+DOWNLOAD_PART_SIZE = 16 * 1024 * 1024
+# archives with a larger member, compressed, are downloaded to a resumable
+# partial file before extraction rather than extracted as they stream in, as
+# an interrupted member is streamed again from its first byte
+NOTIA_STREAM_MAX_MEMBER_SIZE = int(
+    os.getenv("NOTIA_STREAM_MAX_MEMBER_SIZE", DOWNLOAD_PART_SIZE)
+)
+# largest single read from a response, see download_manager._iter_into
+DOWNLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+# retries per request, interrupted transfers resume from their last byte
+NOTIA_DOWNLOAD_RETRIES = int(os.getenv("NOTIA_DOWNLOAD_RETRIES", 5))
+# a transfer receiving nothing for this many seconds is resumed
+NOTIA_STALL_TIMEOUT = float(os.getenv("NOTIA_STALL_TIMEOUT", 30))
+# retries of API requests throttled or failed with a 5xx
+NOTIA_API_RETRIES = int(os.getenv("NOTIA_API_RETRIES", 3))
+# extract downloaded archives, otherwise splits are read from the zip itself
+NOTIA_EXTRACT = os.getenv("NOTIA_EXTRACT", "1") != "0"
+# number of splits parsed at the same time by Dataset.to_pandas
+NOTIA_LOAD_WORKERS = int(os.getenv("NOTIA_LOAD_WORKERS", min(32, os.cpu_count() or 1)))
+# target size of the blocks split files are cut into for sharded reading
+NOTIA_SHARD_BLOCK_SIZE = os.getenv("NOTIA_SHARD_BLOCK_SIZE", "64M")
+# store parsed splits as Arrow files so later loads can memory map them
+NOTIA_ARROW_CACHE = os.getenv("NOTIA_ARROW_CACHE", "1") != "0"
+# also store Arrow files and schemas for splits read from an unextracted archive
+NOTIA_ARCHIVE_ARROW_CACHE = os.getenv("NOTIA_ARCHIVE_ARROW_CACHE", "0") != "0"
+# compare the size and mtime of cached files with their manifest on every load
+NOTIA_VERIFY_CACHE = os.getenv("NOTIA_VERIFY_CACHE", "1") != "0"
+
+_lock = threading.RLock()
+
+
+def _create_api():
+    from .api import API
+    from .metadata_cache import MetadataCache, METADATA_DIR
+    from .retry import RetryPolicy
+
+    return API(
+        api_url=NOTIA_ENDPOINT,
+        pool_size=NOTIA_POOL_SIZE,
+        pool_per_host=NOTIA_POOL_PER_HOST,
+        timeout=NOTIA_TIMEOUT,
+        metadata_cache=MetadataCache(
+            os.path.join(NOTIA_CACHE, METADATA_DIR), NOTIA_METADATA_TTL
+        ),
+        offline=NOTIA_OFFLINE,
+        retry_policy=RetryPolicy(NOTIA_API_RETRIES),
+    )
+
+
+def _create_display():
+    from .display import Display
+
+    return Display()
+
+
+# shared instances, created on first access as they read the API key and
+# import requests and rich
+_SINGLETONS = {"Api": _create_api, "Display": _create_display}
+
+
+def __getattr__(name: str):
+    if name not in _SINGLETONS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _lock:
+        if name not in globals():
+            globals()[name] = _SINGLETONS[name]()
+    return globals()[name]
@@ -1,25 +1,38 @@
+import logging
+from datetime import datetime
+from notia import config
 from notia.models import DatasetMeta, Order
 from rich.console import Console
 from rich.table import Table
 from rich import box
 from typing import List, Optional
 
+# messages are also logged, for when console output is off with NOTIA_QUIET
+logger = logging.getLogger("notia")
+logger.addHandler(logging.NullHandler())
+
 
 class Display:
     def __init__(self) -> None:
         self._console = Console()
 
     def log(self, msg_obj=None) -> None:
-        self._console.print(msg_obj, style="bold green")
+        self._print(logging.INFO, msg_obj, style="bold green")
 
     def warning(self, msg_obj=None) -> None:
-        self._console.print(msg_obj, style="bold yellow")
+        self._print(logging.WARNING, msg_obj, style="bold yellow")
 
     def error(self, msg_obj=None) -> None:
-        self._console.print(msg_obj, style="bold red")
+        self._print(logging.ERROR, msg_obj, style="bold red")
 
     def log_styled(self, msg_obj=None, style: Optional[str] = None) -> None:
-        self._console.print(msg_obj, style=style)
+        self._print(logging.INFO, msg_obj, style=style)
+
+    def _print(self, level: int, msg_obj, style: Optional[str] = None) -> None:
+        if isinstance(msg_obj, str):
+            logger.log(level, msg_obj)
+        if not config.NOTIA_QUIET:
+            self._console.print(msg_obj, style=style)
 
     def datasetsAsTable(self, datasets: List[DatasetMeta], web_url: str) -> None:
         table = Table(show_header=True, expand=True, box=box.ROUNDED)
@@ -48,6 +61,23 @@ class Display:
             )
         self._console.print(table)
 
+    def cacheAsTable(self, entries) -> None:
+        table = Table(show_header=True, expand=True, box=box.ROUNDED)
+        table.add_column("ID")
+        table.add_column("Size", justify="right")
+        table.add_column("Last used")
+        table.add_column("Hits", justify="right")
+        table.add_column("Pinned")
+        for entry in entries:
+            table.add_row(
+                entry.slug,
+                self._displayFileSize(entry.size),
+                datetime.fromtimestamp(entry.last_access).strftime("%Y-%m-%d %H:%M"),
+                str(entry.hits),
+                "yes" if entry.pinned else "",
+            )
+        self._console.print(table)
+
     def _displayFileSize(self, filesize: float, suffix="B") -> str:
         for unit in ["", "Ki", "Mi", "Gi", "Ti", "Pi", "Ei", "Zi"]:
             if abs(filesize) < 1024.0:
@@ -1,5 +1,6 @@
-from typing import Optional
+from typing import Dict, Iterator, List, Optional
 import requests
+import re
 
 from .display import Display
 import time
@@ -7,20 +8,106 @@ from pathlib import Path
 import os
 import copy
 import pandas as pd
-from rich.progress import track
-import tempfile
+from rich.progress import (
+    BarColumn,
+    DownloadColumn,
+    Progress,
+    TextColumn,
+    TimeRemainingColumn,
+    TransferSpeedColumn,
+)
+import io
+import errno
+import threading
+from contextlib import contextmanager, nullcontext
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
-from zipfile import BadZipfile, ZipFile
+from zipfile import BadZipfile, ZipFile, ZipInfo
 import shutil
 import json
-from .config import NOTIA_CACHE, Api, EXTRACTED_DATASETS_DIR, DOWNLOADED_DATASETS_DIR
+import hashlib
+import uuid
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+from . import (
+    archive,
+    arrow_cache,
+    config,
+    instrumentation,
+    json_reader,
+    manifest,
+    memory_cache,
+    presign,
+)
+from . import remote_zip
+from . import schema as dataset_schema
+from .errors import IntegrityError, InsufficientDiskSpaceError
+from .cache import CacheManager
+from .lock import FileLock
+from .models import Dataset, DatasetMeta
+from .retry import THROTTLE_STATUSES, RetryPolicy
+from .throttle import BandwidthLimiter, ConcurrencyLimiter
+from .config import (
+    NOTIA_CACHE,
+    Api,
+    EXTRACTED_DATASETS_DIR,
+    DOWNLOADED_DATASETS_DIR,
+    LOCKS_DIR,
+    NOTIA_DOWNLOAD_WORKERS,
+    DOWNLOAD_PART_SIZE,
+    DOWNLOAD_CHUNK_SIZE,
+    NOTIA_DOWNLOAD_RETRIES,
+    NOTIA_STALL_TIMEOUT,
+    NOTIA_STREAM_MAX_MEMBER_SIZE,
+    NOTIA_ARROW_CACHE,
+    NOTIA_ARCHIVE_ARROW_CACHE,
+    NOTIA_VERIFY_CACHE,
+    NOTIA_EXTRACT,
+)
+
+_CONTENT_RANGE_RE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+# the ETag of an object uploaded in a single part is the MD5 of its content
+_MD5_ETAG_RE = re.compile(r'^(?:W/)?"?([0-9a-f]{32})"?$')
+# reads from a response start at this size and grow while they take less
+# than half of _READ_INTERVAL seconds, up to DOWNLOAD_CHUNK_SIZE
+_MIN_READ_SIZE = 64 * 1024
+_READ_INTERVAL = 0.1
+# errors after which a transfer is resumed from the last byte received
+_STREAM_ERRORS = (
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+)
 
 
 class DownloadManager:
     """A class for managing caching & downloads from Notia.ai"""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        part_size: Optional[int] = None,
+        progress: Optional[Progress] = None,
+        bandwidth_limiter: Optional[BandwidthLimiter] = None,
+        description: str = "Downloading...",
+        concurrency_limiter: Optional[ConcurrencyLimiter] = None,
+    ) -> None:
         self._display = Display()
+        # number of byte ranges fetched concurrently, 1 disables parallel downloads
+        self.max_workers = max_workers or NOTIA_DOWNLOAD_WORKERS
+        self.part_size = part_size or DOWNLOAD_PART_SIZE
+        # a progress display shared with other managers, one is created per
+        # download if not provided
+        self.progress = progress
+        # caps the combined rate of every manager sharing the limiter
+        self.bandwidth_limiter = bandwidth_limiter
+        # caps the requests in flight across every manager sharing the
+        # limiter, halving the cap while the server throttles
+        self.concurrency_limiter = concurrency_limiter or ConcurrencyLimiter(
+            self.max_workers
+        )
+        self.description = description
         # cache_dir ~/.cache/notia/datasets
         self.cache_dir = NOTIA_CACHE
         # downloads_dir ~/.cache/notia/datasets/downloads
@@ -28,7 +115,21 @@ class DownloadManager:
         # extract_dir ~/.cache/notia/datasets/extracted
         self.extract_dir = os.path.join(self.cache_dir, EXTRACTED_DATASETS_DIR)
 
-    def get_from_cache(self, slug: str, force_download=False):
+    def get_from_cache(
+        self,
+        slug: str,
+        force_download=False,
+        presigned_url: Optional[str] = None,
+        extract: Optional[bool] = None,
+    ):
+        """Returns the cache path of slug, fetching it first unless cached.
+
+        Without extract, defaulting to NOTIA_EXTRACT, the archive is kept as
+        it was downloaded and splits are read out of it. A dataset cached
+        that way is extracted locally once extract is requested.
+        """
+        if extract is None:
+            extract = NOTIA_EXTRACT
         if self.cache_dir is None:
             self.cache_dir = NOTIA_CACHE
 
@@ -39,83 +140,616 @@ class DownloadManager:
 
         cache_path = os.path.join(self.cache_dir, slug)
 
-        if os.path.exists(cache_path) and not force_download:
-            return cache_path
+        with instrumentation.span("get_from_cache", slug=slug) as span:
+            cache_manager = CacheManager(self.cache_dir)
+            if self._is_cached(cache_path, extract) and not force_download:
+                instrumentation.count("cache.hit")
+                span.set_attribute("cache_hit", True)
+                cache_manager.touch(slug)
+                return cache_path
 
-        os.makedirs(self.cache_dir, exist_ok=True)
-        os.makedirs(self.downloads_dir, exist_ok=True)
+            # one process fetches a slug while any others wait for its result
+            with FileLock(os.path.join(self.cache_dir, LOCKS_DIR, f"{slug}.lock")):
+                if self._is_cached(cache_path, extract) and not force_download:
+                    # fetched by another process while this one waited
+                    instrumentation.count("cache.hit")
+                    span.set_attribute("cache_hit", True)
+                    cache_manager.touch(slug)
+                    return cache_path
+                instrumentation.count("cache.miss")
+                span.set_attribute("cache_hit", False)
+                self._check_disk_space(slug)
+                checksums = self._fetch(slug, presigned_url, extract, force_download)
+                self._publish(slug, cache_path, **checksums)
+            cache_manager.touch(slug)
+        if cache_manager.max_size is not None:
+            for entry in cache_manager.prune(keep=[slug]):
+                self._display.log(f"Evicted {entry.slug} from the cache")
+        return cache_path
+
+    def verify(self, slug: str, deep: bool = False) -> bool:
+        """Checks the cached files of slug against its manifest.
 
-        temp_file_manager = partial(
-            tempfile.NamedTemporaryFile, dir=self.downloads_dir, delete=False
+        By default only the size and mtime of each file are compared, which
+        costs a stat per file. With deep, every file's CRC-32 is recomputed
+        and compared with the one recorded from the archive.
+        """
+        cache_path = os.path.join(self.cache_dir, slug)
+        return manifest.is_complete(cache_path) and not manifest.verify(
+            cache_path, deep
         )
 
-        try:
-            with temp_file_manager() as temp_file:
-                self.download_from_s3(temp_file, slug)
-                shutil.move(temp_file.name, os.path.join(self.downloads_dir, slug))
-                temp_file.close()
-        except requests.exceptions.RequestException:
-            # propagate upwards
-            raise
+    def _check_disk_space(self, slug: str) -> None:
+        """Fails before downloading if the cache cannot hold slug, using the
+        size declared by an earlier search or orders request"""
+        declared_size = Api.metadata and Api.metadata.declared_size(slug)
+        if not declared_size:
+            return
+        free = shutil.disk_usage(self.cache_dir).free
+        if free < declared_size:
+            raise InsufficientDiskSpaceError(
+                (
+                    f"{slug} needs {declared_size} bytes but only {free} are free "
+                    f"in {self.cache_dir}, free some space with notia cache prune"
+                )
+            )
 
-        # extract the file from the download dir to the extract dir
-        self.extract(
-            os.path.join(self.downloads_dir, slug), os.path.join(self.extract_dir, slug)
-        )
+    def _is_cached(self, cache_path: str, extract: bool = True) -> bool:
+        if not manifest.is_complete(cache_path):
+            return False
+        if extract and manifest.read(cache_path).get("mode") == "archive":
+            return False
+        if not NOTIA_VERIFY_CACHE:
+            return True
+        mismatched = manifest.verify(cache_path)
+        if mismatched:
+            self._display.warning(
+                f"Cached files {', '.join(mismatched)} have changed, downloading again"
+            )
+        return not mismatched
 
-        shutil.move(os.path.join(self.extract_dir, slug), cache_path)
-        os.remove(os.path.join(self.downloads_dir, slug))
-        return cache_path
+    def _fetch(
+        self,
+        slug: str,
+        presigned_url: Optional[str] = None,
+        extract: bool = True,
+        force_download: bool = False,
+    ) -> dict:
+        """Downloads and extracts slug into extract_dir, returning the
+        checksums to record in its manifest. Without extract, the archive is
+        placed in extract_dir instead. Unless force_download, an archive
+        already cached is extracted rather than downloaded again, and members
+        extracted by an interrupted attempt are kept."""
+        os.makedirs(self.downloads_dir, exist_ok=True)
+
+        extract_path = os.path.join(self.extract_dir, slug)
+        cache_path = os.path.join(self.cache_dir, slug)
+        cached_archive = archive.archive_path(cache_path)
+        if force_download:
+            # may be corrupt or outdated, so they are replaced rather than reused
+            shutil.rmtree(extract_path, ignore_errors=True)
+            if os.path.exists(cached_archive):
+                os.remove(cached_archive)
+        elif extract and os.path.exists(cached_archive):
+            # cached without extraction so far, no need to download it again
+            members = self.extract(cached_archive, extract_path)
+            return {
+                "archive_md5": (manifest.read(cache_path) or {}).get("archive_md5"),
+                "checksums": remote_zip.member_checksums(members),
+            }
+        # partial downloads keep a fixed name so an interrupted transfer can resume
+        partial_path = os.path.join(self.downloads_dir, f"{slug}.part")
+        if os.path.exists(partial_path):
+            # resumed with the url recorded alongside the partial download
+            presigned_url = None
+        elif presigned_url is None:
+            presigned_url = Api.GetPresigned(slug)
+            if presigned_url is None:
+                raise ValueError(f"Unable to fetch resource at {slug}")
 
-    def extract(self, input_path: str, output_path: str):
+        if not extract:
+            return self._fetch_archive(slug, partial_path, presigned_url)
+
+        members, archive_md5 = None, None
+        if presigned_url is not None:
+            members = self._stream_extract(
+                presigned_url,
+                extract_path,
+                refresh_url=partial(Api.GetPresigned, slug, refresh=True),
+            )
+        if members is None:
+            try:
+                with open(partial_path, "a+b") as temp_file:
+                    archive_md5 = self.download_from_s3(temp_file, slug, presigned_url)
+                os.replace(partial_path, os.path.join(self.downloads_dir, slug))
+            except requests.exceptions.RequestException:
+                # propagate upwards
+                raise
+
+            # extract the file from the download dir to the extract dir
+            members = self.extract(os.path.join(self.downloads_dir, slug), extract_path)
+            os.remove(os.path.join(self.downloads_dir, slug))
+        return {
+            "archive_md5": archive_md5,
+            "checksums": remote_zip.member_checksums(members),
+        }
+
+    def _fetch_archive(
+        self, slug: str, partial_path: str, presigned_url: Optional[str]
+    ) -> dict:
+        with open(partial_path, "a+b") as temp_file:
+            archive_md5 = self.download_from_s3(temp_file, slug, presigned_url)
+        extract_path = os.path.join(self.extract_dir, slug)
+        # drop what an interrupted extraction may have left
+        shutil.rmtree(extract_path, ignore_errors=True)
+        os.makedirs(extract_path)
+        archive_path = archive.archive_path(extract_path)
+        os.replace(partial_path, archive_path)
+        with ZipFile(archive_path) as zip_file:
+            # members are checked against their CRC-32 as they are read
+            bad_member = zip_file.testzip() if archive_md5 is None else None
+        if bad_member is not None:
+            raise IntegrityError(f"Bad CRC-32 for {bad_member} in {slug}")
+        return {"archive_md5": archive_md5, "mode": "archive"}
+
+    def _publish(self, slug: str, cache_path: str, **manifest_fields) -> None:
+        """Atomically replaces cache_path with the extracted dataset.
+
+        The manifest is written into the extracted directory before it is
+        renamed into place, so a cache entry with a manifest is complete.
+        """
+        extract_path = os.path.join(self.extract_dir, slug)
+        manifest.write(extract_path, slug, **manifest_fields)
+        if os.path.exists(cache_path):
+            # an outdated or incomplete entry, move it aside then delete it
+            stale_path = os.path.join(self.extract_dir, f"{slug}.{uuid.uuid4().hex}")
+            os.replace(cache_path, stale_path)
+            shutil.rmtree(stale_path, ignore_errors=True)
+        # both directories live under cache_dir, so this is a rename
+        os.replace(extract_path, cache_path)
+
+    def stream_extract(self, url: str, output_path: str, refresh_url=None) -> bool:
+        """Extracts the zip archive at url into output_path while it downloads,
+        without writing the archive itself to disk.
+
+        The central directory is read with Range requests first, then the
+        member data is fetched as parallel byte ranges and decompressed in
+        order as it arrives. Members extracted by an earlier, interrupted
+        call are not fetched again.
+
+        Returns False, having extracted nothing, if the server does not honour
+        Range requests, a member cannot be decompressed from a stream or one
+        is larger than NOTIA_STREAM_MAX_MEMBER_SIZE compressed. An interrupted
+        member is streamed again from its start, so large members are better
+        downloaded to a partial file, which resumes from its last byte.
+        """
+        return self._stream_extract(url, output_path, refresh_url) is not None
+
+    def _stream_extract(
+        self, url: str, output_path: str, refresh_url=None
+    ) -> Optional[List[ZipInfo]]:
+        """stream_extract, returning the archive's members or None if it
+        could not be streamed"""
+        timeout, max_retries = 100.0, NOTIA_DOWNLOAD_RETRIES
+        url, size, _ = self._probe(url, {}, timeout, max_retries, refresh_url)
+        if size is None:
+            return None
+        remote_file = _RemoteFile(self, url, size, timeout, max_retries, refresh_url)
+        with self._refresh_ahead(remote_file, refresh_url):
+            return self._extract_remote(remote_file, output_path)
+
+    def _extract_remote(
+        self, remote_file: "_RemoteFile", output_path: str
+    ) -> Optional[List[ZipInfo]]:
+        members, end = remote_zip.read_members(remote_file)
+        if not remote_zip.is_streamable(members):
+            return None
+        largest = max((member.compress_size for member in members), default=0)
+        if largest > NOTIA_STREAM_MAX_MEMBER_SIZE:
+            return None
+
+        os.makedirs(output_path, exist_ok=True)
+        pending = remote_zip.pending_members(members, output_path)
+        if not pending:
+            return members
+        start = pending[0].header_offset
+        self._display.log(f"Downloading and extracting to {output_path}")
+        with instrumentation.span(
+            "stream_extract", bytes=end - start, members=len(pending)
+        ), self._progress_task(end - start) as advance:
+            chunks = remote_file.iter_ranges(
+                start, end - 1, self.part_size, self.max_workers, on_chunk=advance
+            )
+            # every member's CRC-32 is checked as it is decompressed
+            remote_zip.extract_stream(chunks, pending, start, output_path)
+        return members
+
+    def extract(self, input_path: str, output_path: str) -> List[ZipInfo]:
+        """Extracts the archive at input_path into output_path, checking the
+        CRC-32 of every member, and returns its members"""
         try:
-            os.makedirs(output_path, exist_ok=True)
-            with ZipFile(input_path, "r") as zip_file:
-                zip_file.extractall(path=output_path)
-                zip_file.close()
+            with instrumentation.span("extract") as span:
+                os.makedirs(output_path, exist_ok=True)
+                with ZipFile(input_path, "r") as zip_file:
+                    members = zip_file.infolist()
+                span.set_attribute("members", len(members))
+                for member in members:
+                    # create directories up front as the workers would race on them
+                    target = remote_zip.member_path(output_path, member.filename)
+                    if member.is_dir():
+                        os.makedirs(target, exist_ok=True)
+                    else:
+                        os.makedirs(os.path.dirname(target), exist_ok=True)
+                # zlib releases the GIL, so members decompress in parallel
+                workers = self.max_workers
+                members = sorted(members, key=lambda member: -member.file_size)
+                batches = [members[i::workers] for i in range(workers)]
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    list(
+                        executor.map(
+                            partial(self._extract_members, input_path, output_path),
+                            [batch for batch in batches if batch],
+                        )
+                    )
+                return members
         except BadZipfile:
             # propagate upwards
             raise
 
-    def download_from_s3(self, temp_file, slug: str) -> None:
-        presigned_url = Api.GetPresigned(slug)
-        if presigned_url is not None:
+    def _extract_members(self, input_path: str, output_path: str, members) -> None:
+        with ZipFile(input_path, "r") as zip_file:
+            for member in members:
+                zip_file.extract(member, path=output_path)
+
+    def download_from_s3(
+        self, temp_file, slug: str, presigned_url: Optional[str] = None
+    ) -> Optional[str]:
+        state = _DownloadState.load(temp_file.name)
+        if state is not None:
+            # the refresh callback below takes care of an expired url
+            presigned_url = state.url
             self._display.log(
                 (
-                    f"{slug} not found in cache or force_download set to True,"
-                    f"downloading to {temp_file.name}"
+                    f"Resuming download of {slug} to {temp_file.name} "
+                    f"from byte {state.completed}"
                 )
             )
-            self.http_get(presigned_url, temp_file)
         else:
+            presigned_url = presigned_url or Api.GetPresigned(slug)
+            if presigned_url is not None:
+                self._display.log(
+                    (
+                        f"{slug} not found in cache or force_download set to True,"
+                        f"downloading to {temp_file.name}"
+                    )
+                )
+        if presigned_url is None:
             raise ValueError(f"Unable to fetch resource at {slug}")
 
+        return self.http_get(
+            presigned_url,
+            temp_file,
+            max_retries=NOTIA_DOWNLOAD_RETRIES,
+            refresh_url=partial(Api.GetPresigned, slug, refresh=True),
+        )
+
     def http_get(
-        self, url, temp_file, resume_size=0, headers=None, timeout=100.0, max_retries=0
+        self,
+        url,
+        temp_file,
+        resume_size=0,
+        headers=None,
+        timeout=100.0,
+        max_retries=0,
+        refresh_url=None,
     ):
+        """Download url into temp_file, fetching byte ranges in parallel when
+        the server supports them.
+
+        Progress is recorded in a sidecar next to temp_file so a later call
+        with the same file continues where an interrupted one stopped, as long
+        as the remote object's size and ETag are unchanged.
+
+        Args:
+            url (str): The URL of the resource to fetch.
+            temp_file: Binary file object to download into.
+            resume_size (int): Number of bytes already in temp_file, used
+                               when no sidecar exists.
+            headers (dict): Extra headers to send with every request.
+            timeout (float): Timeout for each request, in seconds.
+            max_retries (int): Retries per request, a stream interrupted
+                               mid-transfer is resumed from its last byte.
+            refresh_url (callable): Called to obtain a new url when the
+                                    current one is rejected with a 403, such
+                                    as when a presigned url has expired.
+
+        Returns:
+            The MD5 digest of the download if the server's ETag is one, after
+            checking the two match. The size of the download is always checked
+            against the size announced by the server.
+
+        Raises:
+            IntegrityError: if the download does not match the size or ETag
+                            announced by the server. The partial download is
+                            discarded so the next attempt starts over.
+        """
         headers = copy.deepcopy(headers) or {}
-        if resume_size > 0:
-            headers["Range"] = f"bytes={resume_size:d}-"
+        state = _DownloadState.load(temp_file.name)
+        if state is not None:
+            url = state.url
+
+        url, size, etag = self._probe(url, headers, timeout, max_retries, refresh_url)
+        if state is None or (state.size, state.etag) != (size, etag):
+            ranges = self._plan_ranges(size, resume_size)
+            state = _DownloadState(temp_file.name, url, etag, size, ranges)
+            if resume_size == 0:
+                temp_file.truncate(0)
+            if size is not None:
+                # preallocate so every part can be written in place
+                _preallocate(temp_file, size)
+            temp_file.flush()
+        state.url = url
+
+        resumed_from = state.completed
+        # a long transfer switches to a new url before the current one expires
+        refresh_ahead = self._refresh_ahead(state, refresh_url)
+        with refresh_ahead, instrumentation.span(
+            "download", parts=len(state.pending()), resumed_from=resumed_from
+        ) as span, self._progress_task(state.size, state.completed) as advance:
+            fetch = partial(
+                self._fetch_range,
+                state,
+                headers=headers,
+                timeout=timeout,
+                max_retries=max_retries,
+                refresh_url=refresh_url,
+                on_chunk=advance,
+            )
+            pending = state.pending()
+            expected_md5 = _etag_md5(state.etag)
+            digest = None
+            try:
+                if len(pending) == 1 and state.completed == 0:
+                    # a single stream from the first byte is hashed as it arrives
+                    digest = fetch(
+                        pending[0], hasher=hashlib.md5() if expected_md5 else None
+                    )
+                elif len(pending) == 1:
+                    fetch(pending[0])
+                elif pending:
+                    self._fetch_parallel(fetch, pending)
+            finally:
+                state.save()
+                span.set_attribute("bytes", state.completed - resumed_from)
+        try:
+            return self._verify_download(state, expected_md5, digest)
+        except IntegrityError:
+            temp_file.truncate(0)
+            raise
+        finally:
+            state.discard()
+
+    def _verify_download(
+        self,
+        state: "_DownloadState",
+        expected_md5: Optional[str],
+        digest: Optional[str] = None,
+    ) -> Optional[str]:
+        size = os.path.getsize(state.path)
+        if state.size is not None and size != state.size:
+            raise IntegrityError(
+                f"Downloaded {size} bytes of {state.url} but expected {state.size}"
+            )
+        if expected_md5 is None:
+            return None
+        if digest is None:
+            # parts arrived out of order or across attempts, hash the file
+            digest = _file_md5(state.path)
+        if digest != expected_md5:
+            raise IntegrityError(
+                f"Checksum of {state.url} is {digest} but expected {expected_md5}"
+            )
+        return digest
+
+    def _fetch_parallel(self, fetch, indices) -> None:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(fetch, index) for index in indices]
+            try:
+                for future in futures:
+                    # surface the first failure
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def _plan_ranges(self, size: Optional[int], resume_size: int = 0) -> list:
+        if size is None:
+            return [[0, None, resume_size]]
+        if self.max_workers <= 1 or size <= self.part_size or resume_size > 0:
+            return [[0, size - 1, resume_size]]
+        return [
+            [start, min(start + self.part_size, size) - 1, 0]
+            for start in range(0, size, self.part_size)
+        ]
+
+    def _probe(
+        self,
+        url: str,
+        headers: dict,
+        timeout: float,
+        max_retries: int,
+        refresh_url=None,
+    ):
+        """Returns the (possibly refreshed) url together with the size and
+        ETag of the resource. The size is None if the server does not honour
+        Range requests.
+
+        A single byte GET is used rather than HEAD as presigned S3 urls are
+        only signed for the GET verb.
+        """
+        probe_headers = dict(headers, Range="bytes=0-0")
+        response, url = self._open(
+            url, probe_headers, timeout, max_retries, refresh_url
+        )
+        response.close()
+        etag = response.headers.get("ETag")
+        if response.status_code != 206:
+            return url, None, etag
+        match = _CONTENT_RANGE_RE.match(response.headers.get("Content-Range", ""))
+        if match is None:
+            return url, None, etag
+        return url, int(match.group(3)), etag
+
+    def _open(
+        self,
+        url: str,
+        headers: dict,
+        timeout: float,
+        max_retries: int,
+        refresh_url=None,
+    ):
+        # a body that stops arriving for the read timeout is resumed elsewhere
+        timeout = (timeout, min(timeout, NOTIA_STALL_TIMEOUT))
         response = self.request_with_retry(
             method="GET",
             url=url,
             max_retries=max_retries,
             timeout=timeout,
+            headers=headers,
+            stream=True,
         )
-        if response.status_code == 416:  # Range not satisfiable
-            return
+        if response.status_code == 403 and refresh_url is not None:
+            # most likely an expired presigned url
+            instrumentation.count("presign.refresh")
+            new_url = refresh_url()
+            if new_url is not None:
+                response.close()
+                url = new_url
+                response = self.request_with_retry(
+                    method="GET",
+                    url=url,
+                    max_retries=max_retries,
+                    timeout=timeout,
+                    headers=headers,
+                    stream=True,
+                )
+        if response.status_code != 416:  # Range not satisfiable
+            response.raise_for_status()
+        return response, url
+
+    def _fetch_range(
+        self,
+        state: "_DownloadState",
+        index: int,
+        headers: dict,
+        timeout: float,
+        max_retries: int,
+        refresh_url=None,
+        on_chunk=None,
+        hasher=None,
+    ) -> Optional[str]:
+        """Fetches one range of state into its file, resuming from the last
+        byte written. If a hasher is given the range must start at the first
+        byte, and its hex digest of the range is returned."""
+        start, end, _ = state.ranges[index]
+        whole_file = start == 0 and (end is None or end + 1 == state.size)
+        tries = 0
+        # reused by every read, chunks are views into it
+        buffer = bytearray(DOWNLOAD_CHUNK_SIZE)
+        with self.concurrency_limiter, open(
+            state.path, "r+b", buffering=0
+        ) as part_file:
+            while True:
+                offset = start + state.ranges[index][2]
+                range_headers = dict(headers)
+                if offset > 0 or not whole_file:
+                    last = "" if end is None else f"{end:d}"
+                    range_headers["Range"] = f"bytes={offset:d}-{last}"
+                try:
+                    response, state.url = self._open(
+                        state.url, range_headers, timeout, max_retries, refresh_url
+                    )
+                    if response.status_code == 416:  # Range not satisfiable
+                        state.finish(index)
+                        return None
+                    if response.status_code != 206 and "Range" in range_headers:
+                        if not whole_file:
+                            raise requests.exceptions.ContentDecodingError(
+                                f"Server ignored range request for bytes {start}-{end}"
+                            )
+                        # the full body was sent, start over
+                        if on_chunk is not None:
+                            on_chunk(-state.ranges[index][2])
+                        state.reset(index)
+                        offset = 0
+                        if hasher is not None:
+                            hasher = hashlib.md5()
+                    part_file.seek(offset)
+                    for chunk in _iter_into(response, buffer):
+                        self._throttle(len(chunk))
+                        part_file.write(chunk)
+                        if hasher is not None:
+                            hasher.update(chunk)
+                        state.advance(index, len(chunk))
+                        if on_chunk is not None:
+                            on_chunk(len(chunk))
+                    if end is None:
+                        state.finish(index)
+                        return hasher and hasher.hexdigest()
+                    if index not in state.pending():
+                        return hasher and hasher.hexdigest()
+                    raise requests.exceptions.ChunkedEncodingError(
+                        f"Connection closed before byte {end} of {state.url}"
+                    )
+                except _STREAM_ERRORS as err:
+                    tries += 1
+                    self._resume_or_raise(err, tries, max_retries, offset, end)
+
+    def _resume_or_raise(
+        self, err: Exception, tries: int, max_retries: int, offset: int, end
+    ) -> None:
+        if isinstance(err, requests.exceptions.Timeout):
+            # a stalled stream, most likely too many transfers for the link
+            instrumentation.count("download.stalls")
+            self.concurrency_limiter.record_throttle()
+        if tries > max_retries:
+            raise err
+        instrumentation.count("download.retries")
+        self._display.log(
+            (
+                f"Transfer of bytes {offset}-{end} interrupted, "
+                f"resuming... [{tries}/{max_retries}]"
+            )
+        )
+        time.sleep(RetryPolicy(max_retries).wait_time(tries))
 
-        content_length = response.headers.get("Content-Length")
-        total = (
-            resume_size + int(content_length) if content_length is not None else None
+    @contextmanager
+    def _progress_task(self, total: Optional[int], completed: int = 0):
+        """Adds a task to the progress display for the duration of the block,
+        yielding a callback that advances it by a number of bytes"""
+        owned = self.progress is None
+        with transfer_progress() if owned else nullcontext(self.progress) as progress:
+            task = progress.add_task(self.description, total=total, completed=completed)
+            advance = _BatchedAdvance(progress, task)
+            try:
+                yield advance
+            finally:
+                advance.flush()
+                instrumentation.count("download.bytes", advance.received)
+
+    def _refresh_ahead(self, transfer, refresh_url=None):
+        """Keeps the url attribute of transfer from expiring while the block
+        runs, see presign.refresh_ahead"""
+        if refresh_url is None:
+            return nullcontext()
+        return presign.refresh_ahead(
+            lambda: transfer.url, partial(setattr, transfer, "url"), refresh_url
         )
-        for chunk in track(
-            response.iter_content(chunk_size=1024),
-            description="Downloading...",
-            total=total,
-        ):
-            if chunk:  # filter out keep-alive new chunks
-                temp_file.write(chunk)
+
+    def _throttle(self, nbytes: int) -> None:
+        if self.bandwidth_limiter is not None:
+            self.bandwidth_limiter.consume(nbytes)
 
     def request_with_retry(
         self,
@@ -123,102 +757,721 @@ class DownloadManager:
         url: str,
         max_retries: int = 0,
         base_wait_time: float = 0.5,
-        max_wait_time: float = 2,
+        max_wait_time: float = 30.0,
         timeout: float = 10.0,
         **params,
     ) -> requests.Response:
-        """Wrapper around requests to retry in case it fails with a
-           ConnectTimeout, with exponential backoff.
+        """Wrapper around requests to retry connection errors, timeouts and
+        throttled or failed responses (429 and 5xx) following a RetryPolicy.
+
+        Throttled responses also halve the concurrency_limiter's cap, and
+        successful ones slowly raise it again.
 
         Args:
             method (str): HTTP method, such as 'GET' or 'HEAD'.
             url (str): The URL of the resource to fetch.
             max_retries (int): Maximum number of retries, defaults to
                                0 (no retries).
-            base_wait_time (float): Duration (in seconds) to wait before
-                                    retrying the first time. Wait time between
-                                    retries then grows exponentially,
-                                    capped by max_wait_time.
+            base_wait_time (float): Cap (in seconds) on the jittered wait
+                                    before the first retry. The cap then
+                                    doubles with every retry, up to
+                                    max_wait_time.
             max_wait_time (float): Maximum amount of time between
-                                   two retries, in seconds.
-            **params: Params to pass to :obj:`requests.request`.
+                                   two retries, in seconds. A Retry-After
+                                   header is honoured instead when sent.
+            **params: Params to pass to :obj:`requests.Session.request`.
         """
-        tries, success = 0, False
-        while not success:
-            tries += 1
-            try:
-                response = requests.request(
+        policy = RetryPolicy(max_retries, base_wait_time, max_wait_time)
+
+        def send() -> requests.Response:
+            # the time to the response headers, a streamed body is read later
+            with instrumentation.span("connect", method=method.upper()) as span:
+                # the API session pools connections across requests
+                response = Api.session.request(
                     method=method.upper(), url=url, timeout=timeout, **params
                 )
-                success = True
-            except (
-                requests.exceptions.ConnectTimeout,
-                requests.exceptions.ConnectionError,
-            ) as err:
-                if tries > max_retries:
-                    raise err
-                else:
-                    self._display.log(
-                        (
-                            f"{method} request to {url} timed out,"
-                            "retrying... [{tries/max_retries}]"
-                        )
+                span.set_attribute("status", response.status_code)
+            if response.status_code in THROTTLE_STATUSES:
+                self.concurrency_limiter.record_throttle()
+            elif response.ok:
+                self.concurrency_limiter.record_success()
+            return response
+
+        def on_retry(tries: int, wait_time: float, reason: str) -> None:
+            instrumentation.count("download.retries")
+            self._display.log(
+                f"{method} request to {url} failed with {reason}, "
+                f"retrying in {wait_time:.1f}s... [{tries}/{max_retries}]"
+            )
+
+        return policy.call(send, on_retry)
+
+
+def _etag_md5(etag: Optional[str]) -> Optional[str]:
+    match = _MD5_ETAG_RE.match(etag or "")
+    return match.group(1) if match else None
+
+
+def _file_md5(path: str) -> str:
+    hasher = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(partial(f.read, DOWNLOAD_CHUNK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def _preallocate(temp_file, size: int) -> None:
+    """Sizes temp_file to size bytes and reserves its blocks where the
+    filesystem allows, so a full disk fails here rather than part way
+    through the download"""
+    temp_file.truncate(size)
+    if size == 0 or not hasattr(os, "posix_fallocate"):
+        return
+    temp_file.flush()
+    try:
+        os.posix_fallocate(temp_file.fileno(), 0, size)
+    except OSError as err:
+        if err.errno == errno.ENOSPC:
+            raise
+        # not supported by the filesystem, the file is left sparse
+
+
+def _iter_into(response: requests.Response, buffer) -> Iterator[memoryview]:
+    """Reads the body of response into buffer, yielding a view of the bytes
+    read each time. The views are only valid until the next one is taken.
+
+    Reads start small so the first bytes arrive quickly, then double up to
+    the size of buffer while they complete quickly, and shrink again when
+    the connection slows down. Bytes are written as sent, a Range request
+    addresses them before any Content-Encoding is undone.
+    """
+    view = memoryview(buffer).cast("B")
+    size = min(_MIN_READ_SIZE, len(view))
+    while True:
+        started = time.monotonic()
+        count = _readinto(response, view[:size])
+        if not count:
+            return
+        elapsed = time.monotonic() - started
+        if count == size and elapsed < _READ_INTERVAL / 2:
+            size = min(size * 2, len(view))
+        elif elapsed > _READ_INTERVAL * 2:
+            size = max(size // 2, _MIN_READ_SIZE)
+        yield view[:count]
+
+
+def _readinto(response: requests.Response, view: memoryview) -> int:
+    """response.raw.readinto, raising the errors iter_content would"""
+    try:
+        return response.raw.readinto(view)
+    except ProtocolError as err:
+        raise requests.exceptions.ChunkedEncodingError(err)
+    except ReadTimeoutError as err:
+        raise requests.exceptions.ReadTimeout(err)
+
+
+class _BatchedAdvance:
+    """Advances a progress task by the bytes received, touching the display
+    at most every interval seconds however small the chunks are"""
+
+    def __init__(self, progress: Progress, task, interval: float = 0.1) -> None:
+        self.received = 0
+        self._progress = progress
+        self._task = task
+        self._interval = interval
+        self._pending = 0
+        self._advanced_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __call__(self, nbytes: int) -> None:
+        with self._lock:
+            self.received += nbytes
+            self._pending += nbytes
+            if time.monotonic() - self._advanced_at < self._interval:
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            nbytes, self._pending = self._pending, 0
+            self._advanced_at = time.monotonic()
+        if nbytes:
+            self._progress.advance(self._task, nbytes)
+
+
+def transfer_progress() -> Progress:
+    """A progress display with transfer size, speed and time remaining"""
+    return Progress(
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        DownloadColumn(),
+        TransferSpeedColumn(),
+        TimeRemainingColumn(),
+        disable=config.NOTIA_QUIET,
+    )
+
+
+class _RemoteFile(io.RawIOBase):
+    """A read only, seekable view of a remote resource served with Range
+    requests, so ZipFile can read the central directory without the whole
+    archive being downloaded"""
+
+    # ZipFile looks for the end of central directory record in the last 64KiB
+    TAIL_SIZE = 64 * 1024 + 22
+
+    def __init__(
+        self,
+        manager: DownloadManager,
+        url: str,
+        size: int,
+        timeout: float,
+        max_retries: int,
+        refresh_url=None,
+    ) -> None:
+        self.url = url
+        self._manager = manager
+        self._size = size
+        self._timeout = timeout
+        self._max_retries = max_retries
+        self._refresh_url = refresh_url
+        self._pos = 0
+        self._tail_start = size
+        self._tail = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        end = self._size if size is None or size < 0 else self._pos + size
+        end = min(end, self._size)
+        if end <= self._pos:
+            return b""
+        if self._pos < self._tail_start and end > self._size - self.TAIL_SIZE:
+            # the central directory is read in a handful of small reads
+            # towards the end of the archive, fetch them all at once
+            self._tail_start = max(0, min(self._pos, self._size - self.TAIL_SIZE))
+            self._tail = bytes(self.read_range(self._tail_start, self._size - 1))
+        if self._pos >= self._tail_start:
+            tail_pos, tail_end = self._pos - self._tail_start, end - self._tail_start
+            data = self._tail[tail_pos:tail_end]
+        else:
+            data = bytes(self.read_range(self._pos, end - 1))
+        self._pos += len(data)
+        return data
+
+    def read_range(self, start: int, end: int) -> bytearray:
+        with self._manager.concurrency_limiter:
+            return self._read_range(start, end)
+
+    def _read_range(self, start: int, end: int) -> bytearray:
+        data = bytearray(end - start + 1)
+        view = memoryview(data)
+        received = 0
+        tries = 0
+        while True:
+            offset = start + received
+            try:
+                response, self.url = self._manager._open(
+                    self.url,
+                    {"Range": f"bytes={offset:d}-{end:d}"},
+                    self._timeout,
+                    self._max_retries,
+                    self._refresh_url,
+                )
+                if response.status_code != 206:
+                    raise requests.exceptions.ContentDecodingError(
+                        f"Server ignored range request for bytes {start}-{end}"
                     )
-                    sleep_time = min(
-                        max_wait_time, base_wait_time * 2 ** (tries - 1)
-                    )  # Exponential backoff
-                    time.sleep(sleep_time)
-        return response
+                # read straight into place, the part is never copied
+                while received < len(data):
+                    stop = received + DOWNLOAD_CHUNK_SIZE
+                    count = _readinto(response, view[received:stop])
+                    if not count:
+                        break
+                    self._manager._throttle(count)
+                    received += count
+                if received == len(data):
+                    return data
+                raise requests.exceptions.ChunkedEncodingError(
+                    f"Connection closed before byte {end} of {self.url}"
+                )
+            except _STREAM_ERRORS as err:
+                tries += 1
+                self._manager._resume_or_raise(
+                    err, tries, self._max_retries, offset, end
+                )
 
+    def iter_ranges(
+        self, start: int, end: int, part_size: int, max_workers: int, on_chunk=None
+    ) -> Iterator[bytes]:
+        """Yields the bytes from start to end in order, while up to
+        max_workers parts of part_size bytes are fetched ahead in parallel"""
+        ranges = (
+            (part_start, min(part_start + part_size - 1, end))
+            for part_start in range(start, end + 1, part_size)
+        )
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            window = deque(
+                executor.submit(self.read_range, *part_range)
+                for part_range in islice(ranges, max_workers)
+            )
+            while window:
+                data = window.popleft().result()
+                for part_range in islice(ranges, 1):
+                    window.append(executor.submit(self.read_range, *part_range))
+                if on_chunk is not None:
+                    on_chunk(len(data))
+                yield data
 
-def _handle_tsv(tsv_path: str):
-    return pd.read_csv(tsv_path, sep="\t")
 
+class _DownloadState:
+    """Sidecar record of the byte ranges written to a partial download, so
+    an interrupted transfer can continue from its last byte"""
 
-def _handle_csv(csv_path: str):
-    return pd.read_csv(csv_path)
+    SAVE_INTERVAL = 1.0
 
+    def __init__(
+        self,
+        path: str,
+        url: str,
+        etag: Optional[str] = None,
+        size: Optional[int] = None,
+        ranges: Optional[list] = None,
+    ) -> None:
+        self.path = path
+        self.url = url
+        self.etag = etag
+        self.size = size
+        # [start, end, bytes done] for each part, end is None if unknown
+        self.ranges = ranges or []
+        self._lock = threading.Lock()
+        self._saved_at = 0.0
 
-def _handle_json(json_path: str):
-    return json.loads(json_path)
+    @property
+    def sidecar_path(self) -> str:
+        return f"{self.path}.json"
 
+    @property
+    def completed(self) -> int:
+        return sum(done for _, _, done in self.ranges)
 
-def _handle_split(local_path: str, ext: str, split: str):
-    fpath = os.path.join(local_path, split)
-    if os.path.exists(f"{fpath}.csv"):
-        return _handle_csv(f"{fpath}.csv")
-    elif os.path.exists(f"{fpath}.tsv"):
-        return _handle_tsv(f"{fpath}.tsv")
-    elif os.path.exists(f"{fpath}.json"):
-        return _handle_json(f"{fpath}.json")
-    else:
-        raise ValueError(
-            (
-                f"Load was true but {ext} was provided. Notia can automatically "
-                "load CSV, JSON or TSV files. Please set load=False and manually "
-                "load the file."
+    @classmethod
+    def load(cls, path: str) -> Optional["_DownloadState"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(f"{path}.json") as f:
+                record = json.load(f)
+            return cls(
+                path, record["url"], record["etag"], record["size"], record["ranges"]
             )
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def pending(self) -> list:
+        return [
+            index
+            for index, (start, end, done) in enumerate(self.ranges)
+            if end is None or start + done <= end
+        ]
+
+    def advance(self, index: int, nbytes: int) -> None:
+        with self._lock:
+            self.ranges[index][2] += nbytes
+            if time.monotonic() - self._saved_at > self.SAVE_INTERVAL:
+                self._save()
+
+    def reset(self, index: int) -> None:
+        with self._lock:
+            self.ranges[index][2] = 0
+
+    def finish(self, index: int) -> None:
+        with self._lock:
+            start, _, done = self.ranges[index]
+            self.ranges[index][1] = start + done - 1
+
+    def save(self) -> None:
+        with self._lock:
+            self._save()
+
+    def discard(self) -> None:
+        if os.path.exists(self.sidecar_path):
+            os.remove(self.sidecar_path)
+
+    def _save(self) -> None:
+        record = {
+            "url": self.url,
+            "etag": self.etag,
+            "size": self.size,
+            "ranges": self.ranges,
+        }
+        with open(f"{self.sidecar_path}.tmp", "w") as f:
+            json.dump(record, f)
+        os.replace(f"{self.sidecar_path}.tmp", self.sidecar_path)
+        self._saved_at = time.monotonic()
+
+
+def _handle_tsv(
+    tsv_path: str,
+    chunksize: Optional[int] = None,
+    schema: Optional[Dict[str, str]] = None,
+    usecols: Optional[List[str]] = None,
+):
+    return _read_delimited(tsv_path, "\t", chunksize, schema, usecols)
+
+
+def _handle_csv(
+    csv_path: str,
+    chunksize: Optional[int] = None,
+    schema: Optional[Dict[str, str]] = None,
+    usecols: Optional[List[str]] = None,
+):
+    return _read_delimited(csv_path, ",", chunksize, schema, usecols)
+
+
+def _handle_json(
+    json_path: str,
+    chunksize: Optional[int] = None,
+    schema: Optional[Dict[str, str]] = None,
+    usecols: Optional[List[str]] = None,
+):
+    return _apply_schema(json_reader.read_json(json_path, chunksize), schema)
+
+
+def _handle_jsonl(
+    jsonl_path: str,
+    chunksize: Optional[int] = None,
+    schema: Optional[Dict[str, str]] = None,
+    usecols: Optional[List[str]] = None,
+):
+    return _apply_schema(json_reader.read_json_lines(jsonl_path, chunksize), schema)
+
+
+def _read_delimited(
+    path: str,
+    sep: str,
+    chunksize: Optional[int] = None,
+    schema: Optional[Dict[str, str]] = None,
+    usecols: Optional[List[str]] = None,
+):
+    open_source = partial(archive.open_source, path)
+    options = _delimited_options(open_source, sep, schema, usecols)
+    if chunksize:
+        return _iter_chunks(path, sep=sep, chunksize=chunksize, **options)
+    return _parse_delimited(open_source, sep, **options)
+
+
+def _delimited_options(
+    open_source,
+    sep: str,
+    schema: Optional[Dict[str, str]] = None,
+    usecols: Optional[List[str]] = None,
+) -> dict:
+    """pandas.read_csv arguments for the file opened by open_source"""
+    options = {}
+    if schema:
+        with open_source() as f:
+            header = list(pd.read_csv(f, sep=sep, nrows=0).columns)
+        options.update(dataset_schema.read_options(schema, header))
+    if usecols is not None:
+        options["usecols"] = usecols
+    return options
+
+
+def _parse_delimited(open_source, sep: str, **options) -> pd.DataFrame:
+    if arrow_cache.is_available():
+        # the pyarrow engine parses in parallel but cannot read in chunks
+        try:
+            with open_source() as f:
+                return pd.read_csv(f, sep=sep, engine="pyarrow", **options)
+        except (ValueError, NotImplementedError):
+            # such as quoting the pyarrow parser does not support
+            pass
+    with open_source() as f:
+        return pd.read_csv(f, sep=sep, **options)
+
+
+def _iter_chunks(path: str, **options) -> Iterator[pd.DataFrame]:
+    # the file is closed once every chunk has been read
+    with archive.open_source(path) as f, pd.read_csv(f, **options) as reader:
+        yield from reader
+
+
+def _apply_schema(data, schema: Optional[Dict[str, str]]):
+    if not schema:
+        return data
+    if isinstance(data, pd.DataFrame):
+        return dataset_schema.apply(data, schema)
+    return (dataset_schema.apply(chunk, schema) for chunk in data)
+
+
+# extensions Notia can load, in order of preference when a split has several
+_HANDLERS = {
+    ".csv": _handle_csv,
+    ".tsv": _handle_tsv,
+    ".json": _handle_json,
+    ".jsonl": _handle_jsonl,
+}
+
+
+def _handle_split(
+    local_path: str,
+    ext: str,
+    split: str,
+    chunksize: Optional[int] = None,
+    columns: Optional[List[str]] = None,
+    filters=None,
+    schema: Optional[Dict[str, str]] = None,
+):
+    fpath = _split_path(local_path, split)
+    if fpath is not None:
+        return load_file(fpath, None, chunksize, columns, filters, schema)
+    raise ValueError(
+        (
+            f"Load was true but {ext} was provided. Notia can automatically "
+            "load CSV, JSON, JSON lines or TSV files. Please set load=False "
+            "and manually load the file."
+        )
+    )
+
+
+def _split_path(local_path: str, split: str) -> Optional[str]:
+    """The file split loads from, in order of preference of _HANDLERS"""
+    fpath = os.path.join(local_path, split)
+    for handler_ext in _HANDLERS:
+        # archive members count as files when the dataset was not extracted
+        if archive.exists(f"{fpath}{handler_ext}"):
+            return f"{fpath}{handler_ext}"
+    return None
+
+
+def split_files(local_path: str) -> Dict[str, str]:
+    """Maps the name of each split in local_path to the file it loads from"""
+    splits = {}
+    files = archive.list_files(local_path)
+    for handler_ext in _HANDLERS:
+        for file in files:
+            stem, ext = os.path.splitext(file)
+            if ext == handler_ext and not stem.startswith(".") and stem not in splits:
+                splits[stem] = os.path.join(local_path, file)
+    return splits
+
+
+def load_file(
+    fpath: str,
+    handler=None,
+    chunksize: Optional[int] = None,
+    columns: Optional[List[str]] = None,
+    filters=None,
+    schema: Optional[Dict[str, str]] = None,
+):
+    handler = handler or _HANDLERS[os.path.splitext(fpath)[1]]
+    use_arrow_cache = arrow_cache_enabled(fpath)
+    if use_arrow_cache and chunksize:
+        batches = arrow_cache.iter_batches(fpath, chunksize, columns, filters)
+        if batches is not None:
+            instrumentation.count("arrow_cache.hit")
+            return _apply_schema(batches, schema)
+    elif use_arrow_cache:
+        frame = arrow_cache.read(fpath, columns, filters)
+        if frame is not None:
+            instrumentation.count("arrow_cache.hit")
+            return _apply_schema(frame, schema)
+    if use_arrow_cache:
+        instrumentation.count("arrow_cache.miss")
+
+    # a schema recorded by an earlier parse saves inferring types again
+    recorded_schema = None if schema else dataset_schema.recorded(fpath)
+    # the Arrow cache holds every column, otherwise only parse those requested
+    usecols = None if use_arrow_cache or filters else columns
+    with instrumentation.span(
+        "parse", file=os.path.basename(fpath), chunked=bool(chunksize)
+    ) as span:
+        # with chunksize only the reader is created, batches are parsed lazily
+        data = handler(fpath, chunksize, schema or recorded_schema, usecols)
+        if isinstance(data, pd.DataFrame):
+            span.set_attribute("rows", len(data))
+    if chunksize:
+        if columns is None and filters is None:
+            return data
+        return (select(chunk, columns, filters) for chunk in data)
+    if not isinstance(data, pd.DataFrame):
+        return data
+    if usecols is None and not schema and not recorded_schema and _stores_copies(fpath):
+        dataset_schema.record(fpath, data)
+    if use_arrow_cache and arrow_cache.write(fpath, data):
+        if columns is None and filters is None:
+            return data
+        # read back so projection and filters behave as on later loads
+        return arrow_cache.read(fpath, columns, filters)
+    return select(data, columns, filters)
+
+
+def arrow_cache_enabled(fpath: str) -> bool:
+    return NOTIA_ARROW_CACHE and arrow_cache.is_available() and _stores_copies(fpath)
+
+
+def _stores_copies(fpath: str) -> bool:
+    """Whether Arrow files and schemas of fpath may be stored next to it. A
+    dataset kept as an archive is meant to save disk space, and an
+    uncompressed Arrow copy would take more than extracting it."""
+    return NOTIA_ARCHIVE_ARROW_CACHE or not archive.is_member(fpath)
+
+
+def select(
+    frame: pd.DataFrame, columns: Optional[List[str]] = None, filters=None
+) -> pd.DataFrame:
+    if filters:
+        frame = frame[arrow_cache.to_predicate(filters, frame.__getitem__)]
+    if columns is not None:
+        frame = frame[columns]
+    return frame
+
+
+def load_dataset(
+    ID: str,
+    split: Optional[str] = None,
+    load: Optional[bool] = True,
+    chunksize: Optional[int] = None,
+    columns: Optional[List[str]] = None,
+    filters=None,
+    memoize: Optional[bool] = None,
+    schema: Optional[dict] = None,
+    extract: Optional[bool] = None,
+):
+    """
+    Load a dataset from Notia, downloading it to the cache if required.
+    Arguments:
+        ID: (string) the dataset ID.
+        split: (string, optional) name of the split to load, loads every
+            split if not provided.
+        load: (bool, optional) if False, returns the local path of the dataset.
+        chunksize: (int, optional) if provided, each split is returned as an
+            iterator of DataFrames with at most chunksize rows, so memory use
+            stays flat regardless of the split size. Only JSON lines are read
+            incrementally, a JSON document is parsed whole first.
+        columns: (list, optional) names of the columns to load.
+        filters: (list, optional) row filters as (column, op, value) tuples,
+            in the format accepted by pandas.read_parquet.
+        memoize: (bool, optional) if False, the split is parsed again rather
+            than served from memory. Defaults to True when pandas copies on
+            write, as it always does from pandas 3.
+        schema: (dict, optional) dtype of columns, such as int32, category or
+            datetime64[ns], used instead of inferring types. May also map
+            split names to such dicts. Defaults to the schema the dataset
+            was listed with by search or my_datasets, if any.
+        extract: (bool, optional) if False, the downloaded zip is kept as is
+            and splits are read straight out of it, saving the disk space and
+            time of extraction. Defaults to NOTIA_EXTRACT, on unless set to 0.
+            Such splits are not stored in the Arrow cache, nor are their
+            types recorded, unless NOTIA_ARCHIVE_ARROW_CACHE is set to 1.
+
+    Each parsed split is also stored as an Arrow file next to the dataset
+    when pyarrow is installed, so later loads memory map it rather than
+    parsing the text again, reading only the requested columns and rows.
+    Set NOTIA_ARROW_CACHE=0 to disable this. CSV and TSV splits are parsed
+    with the pyarrow engine when possible, and the types inferred on the
+    first parse are recorded so later parses skip inference.
+
+    A loaded split is also kept in memory, up to NOTIA_MEMORY_CACHE_SIZE
+    bytes, and returned again while its file is unchanged. Each call gets its
+    own copy-on-write frame, so changes made by one caller are not seen by
+    others. Without copy-on-write, memoize=True returns the same frame to
+    every call instead. Use notia.clear_memory_cache to release it.
+    Returns:
+        A DataFrame, or an iterator of DataFrames if chunksize was provided,
+        when a split is given. Otherwise a Dataset mapping each split name to
+        a DatasetSplit which is only parsed when first accessed. Its meta is
+        the dataset as listed by an earlier search, if any. Splits are
+        named after their file stem, a split stored in several formats is
+        read from one of them. Dataset.to_pandas parses every split in
+        parallel.
+    """
+    with instrumentation.span("load_dataset", slug=ID, split=split):
+        return _load_dataset(
+            ID, split, load, chunksize, columns, filters, memoize, schema, extract
         )
 
 
-def load_dataset(ID: str, split: Optional[str] = None, load: Optional[bool] = True):
+def _load_dataset(
+    ID: str,
+    split: Optional[str],
+    load: Optional[bool],
+    chunksize: Optional[int],
+    columns: Optional[List[str]],
+    filters,
+    memoize: Optional[bool],
+    schema: Optional[dict],
+    extract: Optional[bool],
+):
+    if memoize is None:
+        # callers may otherwise change the frames other calls are given
+        memoize = memory_cache._copy_on_write()
+    memoize = bool(memoize and load and split and not chunksize)
+    if memoize:
+        key = (
+            NOTIA_CACHE,
+            ID,
+            split,
+            None if columns is None else tuple(columns),
+            repr(filters),
+            repr(schema),
+        )
+        frame = memory_cache.frames.get(key)
+        if frame is not None:
+            instrumentation.count("memory_cache.hit")
+            return frame
+        instrumentation.count("memory_cache.miss")
+
     download_manager = DownloadManager()
-    local_path = download_manager.get_from_cache(ID)
+    local_path = download_manager.get_from_cache(ID, extract=extract)
     if not load:
         return local_path
 
+    if schema is None and Api.metadata is not None:
+        schema = Api.metadata.declared_schema(ID)
     if split:
         # this should know the ext
-        return _handle_split(local_path, "", split)
-    else:
-        datasets = []
-        for file in os.listdir(local_path):
-            # we pass the local path and the file stem so we can match on ext
-            datasets.append(
-                _handle_split(local_path, Path(file).suffix, Path(file).stem)
-            )
-        if len(datasets) == 1:
-            # no need to tuple if single elem
-            return datasets[0]
-        else:
-            return tuple(datasets)
+        data = _handle_split(
+            local_path,
+            "",
+            split,
+            chunksize,
+            columns,
+            filters,
+            dataset_schema.for_split(schema, split),
+        )
+        if memoize and isinstance(data, pd.DataFrame):
+            return memory_cache.frames.put(key, _split_path(local_path, split), data)
+        return data
+    if chunksize:
+        raise ValueError(
+            "chunksize requires a split, or use Dataset[split].iter_batches"
+        )
+    return Dataset(
+        meta=_declared_meta(ID),
+        path=local_path,
+        columns=columns,
+        filters=filters,
+        schema=schema,
+    )
+
+
+def _declared_meta(ID: str) -> Optional[DatasetMeta]:
+    """ID as listed by an earlier search, if the metadata cache has it"""
+    dataset = Api.metadata and Api.metadata.declared_dataset(ID)
+    return DatasetMeta(**dataset) if dataset else None
@@ -7,3 +7,11 @@ class Error(Exception):
     def __init__(self, message):
         super().__init__(message)
         self.message = message
+
+
+class IntegrityError(Error):
+    """Downloaded or cached data does not match its expected size or checksum"""
+
+
+class InsufficientDiskSpaceError(Error):
+    """The cache does not have enough free space for a dataset"""
@@ -0,0 +1,193 @@
+"""Timing spans and counters for each stage of loading a dataset.
+
+Events are delivered to hooks, which see them whether or not anything is
+printed to the console:
+
+    collector = MetricsCollector()
+    add_hook(collector)
+    notia.load_dataset("my-dataset", split="train")
+    collector.summary()
+
+Spans: load_dataset, get_from_cache, presign, connect, download,
+stream_extract, extract and parse.
+Counters: cache.hit, cache.miss, memory_cache.hit, memory_cache.miss,
+arrow_cache.hit, arrow_cache.miss, metadata_cache.hit, metadata_cache.miss,
+metadata_cache.revalidated, download.bytes, download.retries,
+download.stalls, api.retries, presign.refresh, presign_cache.hit and
+presign_cache.miss.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+
+@dataclass
+class Span:
+    name: str
+    attributes: Dict[str, Any]
+    # seconds since the epoch
+    start_time: float
+    duration: Optional[float] = None
+    error: Optional[BaseException] = None
+    # hooks may keep their own state for the span here
+    context: Dict[Any, Any] = field(default_factory=dict, repr=False)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+
+class Hook:
+    """Receives instrumentation events, override the methods of interest.
+    Methods may be called from several threads at once."""
+
+    def on_span_start(self, span: Span) -> None:
+        pass
+
+    def on_span_end(self, span: Span) -> None:
+        pass
+
+    def on_counter(self, name: str, value: float, attributes: Dict[str, Any]) -> None:
+        pass
+
+
+# replaced rather than modified, so events are delivered without a lock
+_hooks: List[Hook] = []
+_lock = threading.Lock()
+
+
+def add_hook(hook: Hook) -> None:
+    global _hooks
+    with _lock:
+        _hooks = _hooks + [hook]
+
+
+def remove_hook(hook: Hook) -> None:
+    global _hooks
+    with _lock:
+        _hooks = [h for h in _hooks if h is not hook]
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """Times the block as a span, which is passed to the hooks when the
+    block starts and ends"""
+    hooks = _hooks
+    current = Span(name, attributes, time.time())
+    for hook in hooks:
+        hook.on_span_start(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as err:
+        current.error = err
+        raise
+    finally:
+        current.duration = time.perf_counter() - start
+        for hook in reversed(hooks):
+            hook.on_span_end(current)
+
+
+def count(name: str, value: float = 1, **attributes) -> None:
+    for hook in _hooks:
+        hook.on_counter(name, value, attributes)
+
+
+class MetricsCollector(Hook):
+    """Aggregates events in memory, such as to export them periodically"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counters: Dict[str, float] = {}
+        self.spans: Dict[str, Dict[str, float]] = {}
+
+    def on_span_end(self, span: Span) -> None:
+        with self._lock:
+            stats = self.spans.setdefault(
+                span.name, {"count": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0}
+            )
+            stats["count"] += 1
+            stats["errors"] += span.error is not None
+            stats["seconds"] += span.duration
+            stats["max_seconds"] = max(stats["max_seconds"], span.duration)
+            if "bytes" in span.attributes:
+                stats["bytes"] = stats.get("bytes", 0) + span.attributes["bytes"]
+
+    def on_counter(self, name: str, value: float, attributes: Dict[str, Any]) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self) -> Dict[str, Any]:
+        """Counters and span statistics, with the cache hit rate and the
+        download rate in bytes per second where known"""
+        with self._lock:
+            counters = dict(self.counters)
+            spans = {name: dict(stats) for name, stats in self.spans.items()}
+        for stats in spans.values():
+            if "bytes" in stats and stats["seconds"]:
+                stats["bytes_per_second"] = stats["bytes"] / stats["seconds"]
+        summary: Dict[str, Any] = {"counters": counters, "spans": spans}
+        lookups = counters.get("cache.hit", 0) + counters.get("cache.miss", 0)
+        if lookups:
+            summary["cache_hit_rate"] = counters.get("cache.hit", 0) / lookups
+        return summary
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.spans.clear()
+
+
+class OpenTelemetryHook(Hook):
+    """Forwards spans to an OpenTelemetry tracer and counters to a meter.
+
+    Spans are made current while they run, so spans started by the
+    application around notia calls become their parents. Requires the
+    opentelemetry-api package.
+    """
+
+    def __init__(self, tracer=None, meter=None) -> None:
+        from opentelemetry import context, metrics, trace
+
+        self._context = context
+        self._trace = trace
+        self._tracer = tracer or trace.get_tracer("notia")
+        self._meter = meter or metrics.get_meter("notia")
+        self._counters: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def on_span_start(self, span: Span) -> None:
+        otel_span = self._tracer.start_span(
+            span.name,
+            attributes=_attributes(span.attributes),
+            start_time=int(span.start_time * 1e9),
+        )
+        token = self._context.attach(self._trace.set_span_in_context(otel_span))
+        span.context[self] = (otel_span, token)
+
+    def on_span_end(self, span: Span) -> None:
+        otel_span, token = span.context.pop(self)
+        otel_span.set_attributes(_attributes(span.attributes))
+        if span.error is not None:
+            otel_span.record_exception(span.error)
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+        self._context.detach(token)
+        otel_span.end()
+
+    def on_counter(self, name: str, value: float, attributes: Dict[str, Any]) -> None:
+        with self._lock:
+            if name not in self._counters:
+                self._counters[name] = self._meter.create_counter(f"notia.{name}")
+            counter = self._counters[name]
+        counter.add(value, _attributes(attributes))
+
+
+def _attributes(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    # OpenTelemetry only accepts primitive attribute values
+    return {
+        key: value if isinstance(value, (bool, int, float, str)) else str(value)
+        for key, value in attributes.items()
+        if value is not None
+    }
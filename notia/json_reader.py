@@ -0,0 +1,120 @@
+import io
+import json
+from functools import partial
+from itertools import islice
+from typing import Iterator, Optional, Union
+
+import pandas as pd
+
+from . import archive
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover
+    _loads = json.loads
+
+try:
+    import pyarrow as pa
+    import pyarrow.json as pa_json
+except ImportError:  # pragma: no cover
+    pa = None
+
+
+def is_json_lines(path: str) -> bool:
+    """Whether path holds one JSON value per line rather than a single
+    JSON document"""
+    with archive.open_source(path) as f:
+        lines = (line for line in f if line.strip())
+        first_line = next(lines, b"")
+        if not first_line.lstrip().startswith(b"{"):
+            return False
+        if next(lines, None) is None:
+            # a lone object is read as a document, which covers a single record
+            return False
+    try:
+        _loads(first_line)
+    except ValueError:
+        # a document spread over several lines
+        return False
+    return True
+
+
+def read_json(
+    path: str, chunksize: Optional[int] = None
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """Reads a JSON or JSON lines file into a DataFrame, or an iterator of
+    DataFrames of at most chunksize rows.
+
+    A document is either a list of records, an object holding such a list
+    under its only key, an object mapping column names to lists of values,
+    or a single record.
+    """
+    if is_json_lines(path):
+        return read_json_lines(path, chunksize)
+    with archive.open_source(path) as f:
+        document = _loads(f.read())
+    frame = _document_frame(document)
+    if chunksize:
+        # a document cannot be parsed incrementally, only split up afterwards
+        return _iter_slices(frame, chunksize)
+    return frame
+
+
+def read_json_lines(
+    path: str, chunksize: Optional[int] = None
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """Reads a JSON lines file. With chunksize the file is read lazily, at
+    most chunksize lines at a time."""
+    if chunksize:
+        return _iter_json_lines(path, chunksize)
+    return _parse_json_lines(partial(archive.open_source, path))
+
+
+def parse_json_lines(data: bytes) -> pd.DataFrame:
+    """Reads JSON lines held in memory, such as a block of a larger file"""
+    return _parse_json_lines(partial(io.BytesIO, data))
+
+
+def _parse_json_lines(open_source) -> pd.DataFrame:
+    if pa is not None:
+        try:
+            # parsed in parallel straight into columns
+            with open_source() as f:
+                return pa_json.read_json(f).to_pandas()
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            # such as a field holding values of different types
+            pass
+    with open_source() as f:
+        return pd.DataFrame.from_records([_loads(line) for line in f if line.strip()])
+
+
+def _iter_json_lines(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    with archive.open_source(path) as f:
+        lines = (line for line in f if line.strip())
+        while True:
+            records = [_loads(line) for line in islice(lines, chunksize)]
+            if not records:
+                return
+            yield pd.DataFrame.from_records(records)
+
+
+def _iter_slices(frame: pd.DataFrame, chunksize: int) -> Iterator[pd.DataFrame]:
+    for start in range(0, len(frame), chunksize):
+        end = start + chunksize
+        yield frame.iloc[start:end]
+
+
+def _document_frame(document) -> pd.DataFrame:
+    if isinstance(document, dict) and len(document) == 1:
+        (values,) = document.values()
+        if isinstance(values, list):
+            document = values
+    if isinstance(document, dict) and not any(
+        isinstance(values, list) for values in document.values()
+    ):
+        document = [document]
+    if isinstance(document, list):
+        return pd.DataFrame.from_records(document)
+    return pd.DataFrame(document)
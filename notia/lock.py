@@ -0,0 +1,62 @@
+import os
+import time
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """An exclusive lock on a file, held across threads and processes.
+
+    The lock file itself is never removed, as deleting it while another
+    process waits on it would let a third process lock a different file.
+    """
+
+    def __init__(
+        self, path: str, timeout: Optional[float] = None, poll_interval: float = 0.1
+    ) -> None:
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._file = None
+
+    def acquire(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        lock_file = open(self.path, "a+")
+        start = time.monotonic()
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if self.timeout is not None and time.monotonic() - start > self.timeout:
+                    lock_file.close()
+                    raise TimeoutError(f"Timed out waiting for lock on {self.path}")
+                time.sleep(self.poll_interval)
+        self._file = lock_file
+
+    def release(self) -> None:
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
@@ -0,0 +1,88 @@
+import json
+import os
+import time
+import zlib
+from typing import Dict, List, Optional
+
+# written last into a dataset directory, its presence marks the dataset complete
+MANIFEST_NAME = ".notia-manifest.json"
+
+
+def manifest_path(dataset_path: str) -> str:
+    return os.path.join(dataset_path, MANIFEST_NAME)
+
+
+def is_complete(dataset_path: str) -> bool:
+    return os.path.isfile(manifest_path(dataset_path))
+
+
+def read(dataset_path: str) -> Optional[dict]:
+    try:
+        with open(manifest_path(dataset_path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write(
+    dataset_path: str,
+    slug: str,
+    checksums: Optional[Dict[str, int]] = None,
+    **extra,
+) -> dict:
+    """Records every file under dataset_path with its size and mtime, and
+    its CRC-32 if given in checksums"""
+    checksums = checksums or {}
+    files = {}
+    for root, _, names in os.walk(dataset_path):
+        for name in names:
+            path = os.path.join(root, name)
+            relative_path = os.path.relpath(path, dataset_path)
+            if relative_path == MANIFEST_NAME:
+                continue
+            relative_path = relative_path.replace(os.path.sep, "/")
+            stat = os.stat(path)
+            files[relative_path] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "crc32": checksums.get(relative_path),
+            }
+    record = dict(slug=slug, created_at=time.time(), files=files, **extra)
+    temp_path = f"{manifest_path(dataset_path)}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(record, f)
+    os.replace(temp_path, manifest_path(dataset_path))
+    return record
+
+
+def verify(dataset_path: str, deep: bool = False) -> List[str]:
+    """Returns the files under dataset_path that no longer match its manifest.
+
+    Files are compared on size and mtime, so nothing is read. With deep, the
+    CRC-32 of each file with a recorded checksum is also recomputed.
+    """
+    record = read(dataset_path)
+    if record is None:
+        return []
+    mismatched = []
+    for relative_path, expected in record["files"].items():
+        path = os.path.join(dataset_path, *relative_path.split("/"))
+        try:
+            stat = os.stat(path)
+        except OSError:
+            mismatched.append(relative_path)
+            continue
+        if (stat.st_size, stat.st_mtime_ns) != (expected["size"], expected["mtime_ns"]):
+            mismatched.append(relative_path)
+        elif deep and expected.get("crc32") is not None:
+            if _file_crc32(path) != expected["crc32"]:
+                mismatched.append(relative_path)
+    return mismatched
+
+
+def _file_crc32(path: str) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            crc = zlib.crc32(block, crc)
+    return crc
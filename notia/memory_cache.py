@@ -0,0 +1,110 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Optional
+
+import pandas as pd
+
+from . import archive
+from .cache import parse_size
+from .config import NOTIA_MEMORY_CACHE_SIZE
+
+
+@dataclass
+class _Entry:
+    path: str
+    mtime_ns: int
+    size: int
+    frame: pd.DataFrame
+    nbytes: int
+
+
+class MemoryCache:
+    """Keeps recently loaded DataFrames in memory so loading the same split
+    again skips the cache lookup and parsing.
+
+    Each frame is stored with the mtime and size of the file it was parsed
+    from, and is only returned while the file is unchanged. The least
+    recently used frames are dropped once their total size exceeds max_size.
+    """
+
+    def __init__(self, max_size=NOTIA_MEMORY_CACHE_SIZE) -> None:
+        self.max_size = parse_size(max_size) or 0
+        self.nbytes = 0
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        """The frame stored under key, if the file it came from is unchanged"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            try:
+                stat = archive.source_stat(entry.path)
+            except OSError:
+                stat = None
+            if stat is None or (stat.st_mtime_ns, stat.st_size) != (
+                entry.mtime_ns,
+                entry.size,
+            ):
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+        return _share(entry.frame)
+
+    def put(self, key: Hashable, path: str, frame: pd.DataFrame) -> pd.DataFrame:
+        """Stores frame, parsed from path, under key. Returns the frame the
+        caller should use in place of frame."""
+        nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+        if nbytes > self.max_size:
+            return frame
+        stat = archive.source_stat(path)
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = _Entry(
+                path, stat.st_mtime_ns, stat.st_size, frame, nbytes
+            )
+            self.nbytes += nbytes
+            while self.nbytes > self.max_size:
+                self._pop(next(iter(self._entries)))
+        return _share(frame)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def _pop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry.nbytes
+
+
+def _copy_on_write() -> bool:
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    try:
+        return bool(pd.get_option("mode.copy_on_write"))
+    except KeyError:  # pandas < 1.5
+        return False
+
+
+def _share(frame: pd.DataFrame) -> pd.DataFrame:
+    """With copy-on-write, a frame callers may modify without changing the
+    cached one, sharing the underlying data until either is written. Without
+    it the cached frame itself, as a deep copy on every load would cost more
+    than parsing saves, so changes made by one caller are seen by the next."""
+    return frame.copy(deep=False) if _copy_on_write() else frame
+
+
+# frames returned by load_dataset
+frames = MemoryCache()
+
+
+def clear_memory_cache() -> None:
+    """Drops every DataFrame held in memory by load_dataset"""
+    frames.clear()
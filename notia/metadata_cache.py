@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+# cached API responses are kept in a hidden directory of the dataset cache
+METADATA_DIR = ".metadata"
+SIZES_NAME = "sizes.json"
+SCHEMAS_NAME = "schemas.json"
+DATASETS_NAME = "datasets.json"
+CATALOG_NAME = "catalog.json"
+PRESIGNED_NAME = "presigned.json"
+
+
+@dataclass
+class MetadataEntry:
+    body: Any
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # the body converted to models, only kept in memory
+    parsed: Any = field(default=None, repr=False, compare=False)
+
+    def validators(self) -> Dict[str, str]:
+        """Headers making a request conditional on the body having changed"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class MetadataCache:
+    """Keeps API responses in memory and on disk.
+
+    Entries younger than ttl seconds are used without a request, older ones
+    are revalidated with the ETag and Last-Modified headers they were served
+    with. Every entry stays usable when the API cannot be reached.
+    """
+
+    def __init__(self, path: str, ttl: float = 300.0) -> None:
+        self.path = path
+        self.ttl = ttl
+        self._entries: Dict[str, MetadataEntry] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str, params: Optional[dict] = None, api_key: Optional[str] = None):
+        """Identifies a request, responses differ between users so the API
+        key is part of it"""
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        identity = json.dumps([url, params, api_key], sort_keys=True, default=str)
+        return hashlib.sha256(identity.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[MetadataEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._read(key)
+                if entry is not None:
+                    self._entries[key] = entry
+            return entry
+
+    def is_fresh(self, entry: MetadataEntry) -> bool:
+        return time.time() - entry.fetched_at < self.ttl
+
+    def put(self, key: str, body, headers=None) -> MetadataEntry:
+        """Stores the body of a response along with its validators"""
+        headers = headers or {}
+        entry = MetadataEntry(
+            body=body,
+            fetched_at=time.time(),
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+        )
+        self._store(key, entry)
+        return entry
+
+    def revalidated(self, key: str, entry: MetadataEntry) -> MetadataEntry:
+        """Marks entry as fresh after the server reported it unchanged"""
+        entry.fetched_at = time.time()
+        self._store(key, entry)
+        return entry
+
+    def parsed(self, entry: MetadataEntry, parse: Callable[[Any], Any]):
+        """parse(entry.body), converted once per entry"""
+        if entry.parsed is None:
+            entry.parsed = parse(entry.body)
+        return entry.parsed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if os.path.isdir(self.path):
+                for name in os.listdir(self.path):
+                    os.remove(os.path.join(self.path, name))
+
+    def record_sizes(self, sizes: Dict[str, int]) -> None:
+        """Remembers the declared size in bytes of each dataset slug"""
+        self._merge(SIZES_NAME, sizes)
+
+    def declared_size(self, slug: str) -> Optional[int]:
+        """Size of slug as listed by an earlier search or orders request"""
+        return (self._read_json(SIZES_NAME) or {}).get(slug)
+
+    def record_schemas(self, schemas: Dict[str, dict]) -> None:
+        """Remembers the declared schema of each dataset slug"""
+        self._merge(SCHEMAS_NAME, schemas)
+
+    def declared_schema(self, slug: str) -> Optional[dict]:
+        """Schema of slug as listed by an earlier search request"""
+        return (self._read_json(SCHEMAS_NAME) or {}).get(slug)
+
+    def record_datasets(self, datasets: Dict[str, dict]) -> None:
+        """Remembers the listing of each dataset slug"""
+        self._merge(DATASETS_NAME, datasets)
+
+    def declared_dataset(self, slug: str) -> Optional[dict]:
+        """slug as listed by an earlier search request, or in the catalog
+        snapshot"""
+        dataset = (self._read_json(DATASETS_NAME) or {}).get(slug)
+        if dataset is None:
+            catalog = self.read_catalog() or []
+            dataset = next((item for item in catalog if item["slug"] == slug), None)
+        return dataset
+
+    def record_presigned(self, key: str, record: dict) -> None:
+        """Remembers a presigned url, with when it was fetched and when it
+        expires, under the key of the request that returned it"""
+        with self._lock:
+            known = {
+                key: value
+                for key, value in (self._read_json(PRESIGNED_NAME) or {}).items()
+                if value.get("expires_at", 0) > time.time()
+            }
+            known[key] = record
+            self._write_json(PRESIGNED_NAME, known)
+
+    def presigned(self, key: str) -> Optional[dict]:
+        """The presigned url recorded under key by record_presigned, if any"""
+        return (self._read_json(PRESIGNED_NAME) or {}).get(key)
+
+    def read_catalog(self) -> Optional[List[dict]]:
+        """The datasets of the last complete catalog snapshot"""
+        return self._read_json(CATALOG_NAME)
+
+    def write_catalog(self, datasets: List[dict]) -> None:
+        with self._lock:
+            self._write_json(CATALOG_NAME, datasets)
+
+    def _merge(self, name: str, values: Dict[str, Any]) -> None:
+        if not values:
+            return
+        with self._lock:
+            known = self._read_json(name) or {}
+            if all(known.get(key) == value for key, value in values.items()):
+                return
+            known.update(values)
+            self._write_json(name, known)
+
+    def _store(self, key: str, entry: MetadataEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._write_json(
+                f"{key}.json",
+                {
+                    "body": entry.body,
+                    "fetched_at": entry.fetched_at,
+                    "etag": entry.etag,
+                    "last_modified": entry.last_modified,
+                },
+            )
+
+    def _read(self, key: str) -> Optional[MetadataEntry]:
+        record = self._read_json(f"{key}.json")
+        return None if record is None else MetadataEntry(**record)
+
+    def _read_json(self, name: str):
+        try:
+            with open(os.path.join(self.path, name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, name: str, record) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, name)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(record, f)
+        os.replace(temp_path, path)
@@ -1,2 +1,2 @@
-from .dataset import DatasetMeta
+from .dataset import Dataset, DatasetMeta, DatasetSplit
 from .order import Order
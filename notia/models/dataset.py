@@ -1,5 +1,12 @@
+import os
+from collections.abc import Mapping
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
     Optional,
 )
 from pydantic import BaseModel, Field
@@ -20,13 +27,206 @@ class DatasetMeta(BaseModel):
     price: Optional[int]
     status: StatusEnum
     license_: Optional[str] = Field(None, alias="license")
+    # dtype of each column, or of each column of each split
+    schema_: Optional[Dict[str, Any]] = Field(None, alias="schema")
 
 
-class Dataset:
-    """A Dataset backed by an Arrow table."""
+class Dataset(Mapping):
+    """A Dataset backed by Arrow tables, mapping each split name to a
+    DatasetSplit which is only parsed and memory mapped on first access."""
 
     def __init__(
         self,
         meta: Optional[DatasetMeta] = None,
+        path: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        filters=None,
+        schema: Optional[dict] = None,
     ):
         self._meta = meta
+        self._path = path
+        self._columns = columns
+        self._filters = filters
+        self._schema = schema if schema is not None else meta and meta.schema_
+        self._splits: Optional[Dict[str, DatasetSplit]] = None
+
+    @property
+    def meta(self) -> Optional[DatasetMeta]:
+        return self._meta
+
+    @property
+    def path(self) -> Optional[str]:
+        return self._path
+
+    def __getitem__(self, split: str) -> "DatasetSplit":
+        return self._discover()[split]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._discover())
+
+    def __len__(self) -> int:
+        return len(self._discover())
+
+    def __repr__(self) -> str:
+        slug = self._meta.slug if self._meta else self._path
+        return f"Dataset({slug}, splits={list(self)})"
+
+    def to_pandas(self, num_workers: Optional[int] = None) -> Dict[str, Any]:
+        """Parses every split in parallel, returning a DataFrame per split name.
+        Loading takes about as long as the largest split.
+        Arguments:
+            num_workers: (int, optional) number of splits parsed at the same
+                time, defaults to NOTIA_LOAD_WORKERS.
+        """
+        from notia.config import NOTIA_LOAD_WORKERS
+
+        splits = self._discover()
+        with ThreadPoolExecutor(
+            max_workers=num_workers or NOTIA_LOAD_WORKERS
+        ) as executor:
+            # parsing and Arrow reads release the GIL, so threads run in parallel
+            frames = list(executor.map(DatasetSplit.to_pandas, splits.values()))
+        return dict(zip(splits, frames))
+
+    def _discover(self) -> Dict[str, "DatasetSplit"]:
+        if self._splits is None:
+            from notia.download_manager import split_files
+            from notia.schema import for_split
+
+            files = split_files(self._path) if self._path else {}
+            self._splits = {
+                name: DatasetSplit(
+                    name,
+                    path,
+                    self._columns,
+                    self._filters,
+                    for_split(self._schema, name),
+                )
+                for name, path in files.items()
+            }
+        return self._splits
+
+
+class DatasetSplit:
+    """A lazy handle on one split of a Dataset.
+
+    The source file is parsed once, on first access, into the Arrow cache.
+    After that the split is read from the memory mapped Arrow file, so
+    selecting columns or taking the head only touches the bytes required.
+    Without pyarrow the split is parsed into a DataFrame instead.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        path: str,
+        columns: Optional[List[str]] = None,
+        filters=None,
+        schema: Optional[Dict[str, str]] = None,
+    ):
+        self.name = name
+        self.path = path
+        self._columns = columns
+        self._filters = filters
+        self._schema = schema
+        self._frame = None
+
+    def __len__(self) -> int:
+        from notia import arrow_cache
+
+        if self._converted():
+            return arrow_cache.count_rows(self.path, self._filters)
+        return len(self._selected())
+
+    def __repr__(self) -> str:
+        return f"DatasetSplit({self.name}, path={self.path})"
+
+    @property
+    def columns(self) -> List[str]:
+        from notia import arrow_cache
+
+        if self._converted():
+            return arrow_cache.head(self.path, 0, self._columns).column_names
+        return list(self._selected().columns)
+
+    def select(self, columns: List[str]) -> "DatasetSplit":
+        """Returns a view of the split with only the given columns"""
+        split = DatasetSplit(self.name, self.path, columns, self._filters, self._schema)
+        split._frame = self._frame
+        return split
+
+    def filter(self, filters) -> "DatasetSplit":
+        """Returns a view of the split with only the rows matching filters,
+        given as (column, op, value) tuples"""
+        split = DatasetSplit(self.name, self.path, self._columns, filters, self._schema)
+        split._frame = self._frame
+        return split
+
+    def head(self, n: int = 5):
+        from notia import arrow_cache
+
+        if self._converted():
+            frame = arrow_cache.head(self.path, n, self._columns, self._filters)
+            return self._typed(frame.to_pandas())
+        return self._selected().head(n)
+
+    def iter_batches(self, chunksize: int):
+        """Yields DataFrames of at most chunksize rows"""
+        from notia.download_manager import load_file
+
+        return load_file(
+            self.path, None, chunksize, self._columns, self._filters, self._schema
+        )
+
+    def to_arrow(self):
+        from notia import arrow_cache
+
+        if self._converted() and not self._schema:
+            return arrow_cache.read_table(self.path, self._columns, self._filters)
+        import pyarrow as pa
+
+        # the schema is applied to the DataFrame, as load_file does
+        return pa.Table.from_pandas(self.to_pandas(), preserve_index=False)
+
+    def to_pandas(self):
+        from notia import arrow_cache
+
+        if self._converted():
+            frame = arrow_cache.read(self.path, self._columns, self._filters)
+            return self._typed(frame)
+        return self._selected()
+
+    def to_numpy(self):
+        return self.to_pandas().to_numpy()
+
+    def _selected(self):
+        """The parsed frame restricted to the split's columns and filters"""
+        from notia.download_manager import select
+
+        return select(self._frame, self._columns, self._filters)
+
+    def _typed(self, frame):
+        """frame cast to the split's schema. The Arrow copy is shared by every
+        schema, so it holds the types the split was first parsed with."""
+        from notia import schema as dataset_schema
+
+        if not self._schema:
+            return frame
+        return dataset_schema.apply(frame, self._schema)
+
+    def _converted(self) -> bool:
+        """Parses the split if it has not been yet, returns whether it can be
+        read from the Arrow cache"""
+        from notia import arrow_cache
+        from notia.download_manager import load_file, arrow_cache_enabled
+
+        if self._frame is not None:
+            return False
+        use_arrow_cache = arrow_cache_enabled(self.path)
+        if use_arrow_cache and os.path.exists(arrow_cache.cached_path(self.path)):
+            return True
+        frame = load_file(self.path, schema=self._schema)
+        if use_arrow_cache and os.path.exists(arrow_cache.cached_path(self.path)):
+            return True
+        self._frame = frame
+        return False
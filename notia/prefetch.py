@@ -0,0 +1,88 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+from . import manifest
+from .config import Api, NOTIA_CACHE, NOTIA_DOWNLOAD_WORKERS, NOTIA_POOL_PER_HOST
+from .display import Display
+from .download_manager import DownloadManager, transfer_progress
+from .throttle import BandwidthLimiter, ConcurrencyLimiter
+
+
+def prefetch(
+    ids: Iterable[str],
+    max_concurrency: int = 4,
+    bandwidth_limit: Optional[float] = None,
+    force_download: bool = False,
+) -> Dict[str, str]:
+    """
+    Download and extract many datasets into the cache without loading them.
+    Arguments:
+        ids: (iterable of strings) the dataset IDs to fetch.
+        max_concurrency: (int, optional) number of datasets downloaded and
+            extracted at the same time.
+        bandwidth_limit: (float, optional) cap on the combined download rate
+            of all datasets, in bytes per second.
+        Every dataset's byte range requests share one cap on the requests
+        in flight, at most NOTIA_POOL_PER_HOST, halved whenever the server
+        throttles them, so a throttled prefetch slows down rather than
+        failing.
+        force_download: (bool, optional) if True, datasets already in the
+            cache are downloaded again.
+    Returns:
+        dict: the cache path of each dataset that was fetched. Failures are
+            reported and left out.
+    """
+    display = Display()
+    slugs = list(dict.fromkeys(ids))
+    pending = [
+        slug
+        for slug in slugs
+        if force_download or not manifest.is_complete(os.path.join(NOTIA_CACHE, slug))
+    ]
+    paths = {
+        slug: os.path.join(NOTIA_CACHE, slug) for slug in slugs if slug not in pending
+    }
+    if not pending:
+        return paths
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        # presign every dataset up front over the pooled API session
+        presigned_urls = dict(zip(pending, executor.map(Api.GetPresigned, pending)))
+
+        bandwidth_limiter = (
+            BandwidthLimiter(bandwidth_limit) if bandwidth_limit else None
+        )
+        # no more requests in flight than the session keeps connections to
+        # the storage host, beyond which connections are opened and dropped
+        concurrency_limiter = ConcurrencyLimiter(
+            min(max_concurrency * NOTIA_DOWNLOAD_WORKERS, NOTIA_POOL_PER_HOST)
+        )
+        with transfer_progress() as progress:
+
+            def fetch(slug: str) -> str:
+                download_manager = DownloadManager(
+                    progress=progress,
+                    bandwidth_limiter=bandwidth_limiter,
+                    concurrency_limiter=concurrency_limiter,
+                    description=slug,
+                )
+                return download_manager.get_from_cache(
+                    slug, force_download, presigned_urls[slug]
+                )
+
+            futures = {
+                slug: executor.submit(fetch, slug)
+                for slug in pending
+                if presigned_urls[slug] is not None
+            }
+            for slug, future in futures.items():
+                try:
+                    paths[slug] = future.result()
+                except Exception as err:
+                    display.error(f"Failed to prefetch {slug}: {err}")
+
+    for slug in pending:
+        if presigned_urls[slug] is None:
+            display.error(f"Failed to prefetch {slug}: unable to fetch resource")
+    return paths
@@ -0,0 +1,77 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+# presigned urls are replaced this many seconds before they expire
+REFRESH_MARGIN = 120.0
+
+_SIGNED_AT_FORMAT = "%Y%m%dT%H%M%SZ"
+
+
+def expires_at(url: str) -> Optional[float]:
+    """When url stops being accepted, as a Unix time, read from its query
+    string. Understands S3 signature version 4 (X-Amz-Date and X-Amz-Expires),
+    its GCS equivalent and version 2 (Expires). None if url is not presigned
+    in any of these ways."""
+    params = {key.lower(): value for key, value in parse_qsl(urlsplit(url).query)}
+    for prefix in ("x-amz-", "x-goog-"):
+        signed_at = params.get(f"{prefix}date")
+        lifetime = params.get(f"{prefix}expires")
+        if signed_at is None or lifetime is None:
+            continue
+        try:
+            signed = datetime.strptime(signed_at, _SIGNED_AT_FORMAT)
+            return signed.replace(tzinfo=timezone.utc).timestamp() + int(lifetime)
+        except ValueError:
+            return None
+    try:
+        return float(params["expires"])
+    except (KeyError, ValueError):
+        return None
+
+
+def is_fresh(url: str, margin: float = REFRESH_MARGIN) -> bool:
+    """Whether url is known to stay valid for at least margin seconds"""
+    expiry = expires_at(url)
+    return expiry is not None and time.time() < expiry - margin
+
+
+@contextmanager
+def refresh_ahead(
+    get_url: Callable[[], str],
+    set_url: Callable[[str], None],
+    refresh: Callable[[], Optional[str]],
+    margin: float = REFRESH_MARGIN,
+):
+    """Replaces the url of a transfer shortly before it expires for the
+    duration of the block.
+
+    A background thread waits until margin seconds before the expiry of
+    get_url(), then passes the url returned by refresh to set_url. Requests
+    made after that use the new url, so a long transfer never runs into an
+    expired one. Nothing happens for urls without a known expiry.
+    """
+    stopped = threading.Event()
+
+    def run() -> None:
+        while True:
+            expiry = expires_at(get_url())
+            if expiry is None or stopped.wait(max(0.0, expiry - margin - time.time())):
+                return
+            new_url = refresh()
+            new_expiry = expires_at(new_url) if new_url is not None else None
+            if new_expiry is None or new_expiry <= expiry:
+                # nothing better on offer, a request rejected with a 403
+                # refreshes the url on its own
+                return
+            set_url(new_url)
+
+    thread = threading.Thread(target=run, name="notia-presign-refresh", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
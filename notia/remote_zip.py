@@ -0,0 +1,169 @@
+import os
+import struct
+import zlib
+from typing import Dict, Iterator, List, Tuple
+from zipfile import BadZipfile, ZipFile, ZipInfo, ZIP_STORED, ZIP_DEFLATED
+
+# signature, version, flags, method, mtime, mdate, crc, csize, usize, name & extra length
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+_STREAMABLE_METHODS = (ZIP_STORED, ZIP_DEFLATED)
+_CHUNK_SIZE = 1024 * 1024
+
+
+def read_members(fileobj) -> Tuple[List[ZipInfo], int]:
+    """Reads the central directory of the archive in fileobj.
+
+    Returns the members ordered by their position in the archive, and the
+    offset of the central directory which marks the end of member data.
+    """
+    with ZipFile(fileobj, "r") as zip_file:
+        members = sorted(zip_file.infolist(), key=lambda member: member.header_offset)
+        return members, zip_file.start_dir
+
+
+def is_streamable(members: List[ZipInfo]) -> bool:
+    """Whether every member can be decompressed straight from a byte stream"""
+    return all(
+        member.compress_type in _STREAMABLE_METHODS and not member.flag_bits & 0x1
+        for member in members
+    )
+
+
+def member_path(output_path: str, filename: str) -> str:
+    """Mirrors the path sanitisation of ZipFile.extract"""
+    arcname = filename.replace("/", os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    invalid_path_parts = ("", os.path.curdir, os.path.pardir)
+    arcname = os.path.sep.join(
+        part for part in arcname.split(os.path.sep) if part not in invalid_path_parts
+    )
+    return os.path.join(output_path, arcname)
+
+
+def member_checksums(members: List[ZipInfo]) -> Dict[str, int]:
+    """CRC-32 of each file member, keyed by its path relative to the
+    extraction directory with forward slashes"""
+    checksums = {}
+    for member in members:
+        if not member.is_dir():
+            relative_path = member_path("", member.filename)
+            checksums[relative_path.replace(os.path.sep, "/")] = member.CRC
+    return checksums
+
+
+def pending_members(members: List[ZipInfo], output_path: str) -> List[ZipInfo]:
+    """Members not yet extracted into output_path by an earlier attempt.
+
+    An existing file only counts as extracted if its size and CRC-32 match
+    the member, as the archive may have changed since that attempt.
+    """
+    pending = []
+    for member in members:
+        target = member_path(output_path, member.filename)
+        if member.is_dir():
+            if not os.path.isdir(target):
+                pending.append(member)
+        elif not _is_extracted(member, target):
+            pending.append(member)
+    return pending
+
+
+def _is_extracted(member: ZipInfo, target: str) -> bool:
+    if not os.path.isfile(target) or os.path.getsize(target) != member.file_size:
+        return False
+    crc = 0
+    with open(target, "rb") as f:
+        for data in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            crc = zlib.crc32(data, crc)
+    return crc == member.CRC
+
+
+def extract_stream(
+    chunks: Iterator[bytes], members: List[ZipInfo], offset: int, output_path: str
+) -> None:
+    """Decompresses members into output_path as the archive bytes arrive.
+
+    Args:
+        chunks (Iterator[bytes]): Archive bytes in order, starting at offset.
+        members (List[ZipInfo]): Members to extract, ordered by header_offset.
+        offset (int): Position in the archive of the first byte in chunks.
+        output_path (str): Directory to extract into.
+    """
+    stream = _ByteStream(chunks, offset)
+    for member in members:
+        stream.skip(member.header_offset - stream.offset)
+        header = _LOCAL_HEADER.unpack(stream.read_exact(_LOCAL_HEADER.size))
+        if header[0] != _LOCAL_HEADER_SIGNATURE:
+            raise BadZipfile(f"Bad magic number for file header of {member.filename}")
+        # the local extra field may differ from the central directory's
+        stream.skip(header[9] + header[10])
+
+        target = member_path(output_path, member.filename)
+        if member.is_dir():
+            os.makedirs(target, exist_ok=True)
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        _extract_member(stream, member, target)
+
+
+def _extract_member(stream: "_ByteStream", member: ZipInfo, target: str) -> None:
+    decompressor = (
+        zlib.decompressobj(-zlib.MAX_WBITS)
+        if member.compress_type == ZIP_DEFLATED
+        else None
+    )
+    crc, size = 0, 0
+    remaining = member.compress_size
+    with open(f"{target}.part", "wb") as out_file:
+        while remaining:
+            data = stream.read(min(remaining, _CHUNK_SIZE))
+            remaining -= len(data)
+            if decompressor is not None:
+                data = decompressor.decompress(data)
+            crc = zlib.crc32(data, crc)
+            size += len(data)
+            out_file.write(data)
+        if decompressor is not None:
+            data = decompressor.flush()
+            crc = zlib.crc32(data, crc)
+            size += len(data)
+            out_file.write(data)
+    if crc != member.CRC or size != member.file_size:
+        os.remove(f"{target}.part")
+        raise BadZipfile(f"Bad CRC-32 for file {member.filename}")
+    os.replace(f"{target}.part", target)
+
+
+class _ByteStream:
+    """Sequential reader over an iterator of byte chunks"""
+
+    def __init__(self, chunks: Iterator[bytes], offset: int = 0) -> None:
+        self._chunks = chunks
+        self._buffer = memoryview(b"")
+        self.offset = offset
+
+    def read(self, size: int) -> memoryview:
+        """Returns between 1 and size bytes, raising BadZipfile at the end of
+        the stream"""
+        if not self._buffer:
+            self._buffer = memoryview(next(self._chunks, b""))
+            if not self._buffer:
+                raise BadZipfile("Archive ended before all members were read")
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        self.offset += len(data)
+        return data
+
+    def read_exact(self, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            data += self.read(size - len(data))
+        return bytes(data)
+
+    def skip(self, size: int) -> None:
+        if size < 0:
+            raise BadZipfile("Overlapping members in archive")
+        while size:
+            size -= len(self.read(size))
@@ -0,0 +1,102 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+import requests
+
+# statuses worth retrying, the server is throttling or briefly unavailable
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# statuses meaning too many requests are in flight
+THROTTLE_STATUSES = frozenset({429, 503})
+RETRY_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+
+class RetryPolicy:
+    """When to retry a request and how long to wait first.
+
+    Connection errors, timeouts and responses with a status in RETRY_STATUSES
+    are retried up to max_retries times. The wait before each retry is drawn
+    uniformly up to an exponentially growing cap, so clients throttled at the
+    same moment do not all come back at the same moment. A Retry-After header
+    is honoured instead when the response has one.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_wait_time: float = 0.5,
+        max_wait_time: float = 30.0,
+        max_retry_after: float = 300.0,
+    ) -> None:
+        """
+        Args:
+            max_retries (int): Retries after the first attempt.
+            base_wait_time (float): Cap on the wait before the first retry, in
+                                    seconds. It doubles with every retry.
+            max_wait_time (float): Largest cap on the wait between retries.
+            max_retry_after (float): Longest Retry-After honoured, in seconds.
+        """
+        self.max_retries = max_retries
+        self.base_wait_time = base_wait_time
+        self.max_wait_time = max_wait_time
+        self.max_retry_after = max_retry_after
+
+    def wait_time(self, tries: int, response=None) -> float:
+        """Seconds to wait before retry number tries, response being the
+        requests or aiohttp response that is retried, if any"""
+        retry_after = _retry_after(response) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        cap = min(self.max_wait_time, self.base_wait_time * 2 ** (tries - 1))
+        return random.uniform(0, cap)
+
+    def call(
+        self,
+        send: Callable[[], requests.Response],
+        on_retry: Optional[Callable[[int, float, str], None]] = None,
+    ) -> requests.Response:
+        """Calls send until it returns a response that is not worth retrying
+        or the retries run out, in which case the last response is returned
+        or the last error raised.
+
+        on_retry is called with the number of the retry, the wait before it
+        and the reason, before waiting.
+        """
+        tries = 0
+        while True:
+            try:
+                response = send()
+            except RETRY_ERRORS as err:
+                if tries >= self.max_retries:
+                    raise
+                tries += 1
+                wait_time, reason = self.wait_time(tries), type(err).__name__
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                if tries >= self.max_retries:
+                    return response
+                tries += 1
+                wait_time = self.wait_time(tries, response)
+                reason = f"HTTP {response.status_code}"
+                response.close()
+            if on_retry is not None:
+                on_retry(tries, wait_time, reason)
+            time.sleep(wait_time)
+
+
+def _retry_after(response) -> Optional[float]:
+    """The wait asked for by the Retry-After header of response, given either
+    in seconds or as an HTTP date"""
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
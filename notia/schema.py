@@ -0,0 +1,106 @@
+import json
+import os
+import uuid
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from . import archive
+
+# inferred schemas are kept in a hidden directory next to the extracted files
+SCHEMA_DIR = ".schema"
+
+Schema = Dict[str, str]
+
+
+def for_split(schema: Optional[dict], split: str) -> Optional[Schema]:
+    """The part of schema for split.
+
+    A schema maps column names to dtypes, such as int32, category or
+    datetime64[ns], and applies to every split. It may also map split names
+    to such mappings instead.
+    """
+    if not schema:
+        return None
+    if all(isinstance(value, dict) for value in schema.values()):
+        return schema.get(split)
+    return schema
+
+
+def infer(frame: pd.DataFrame) -> Schema:
+    return {str(column): str(dtype) for column, dtype in frame.dtypes.items()}
+
+
+def read_options(schema: Schema, columns: Optional[List[str]] = None) -> dict:
+    """Keyword arguments making pandas.read_csv parse with schema instead of
+    inferring types, restricted to the file's columns when known"""
+    dtype, parse_dates = {}, []
+    for column, kind in schema.items():
+        if columns is not None and column not in columns:
+            continue
+        if _is_date(kind):
+            parse_dates.append(column)
+        else:
+            dtype[column] = kind
+    options = {"dtype": dtype}
+    if parse_dates:
+        options["parse_dates"] = parse_dates
+    return options
+
+
+def apply(frame: pd.DataFrame, schema: Schema) -> pd.DataFrame:
+    """Casts the columns of frame whose dtype differs from schema"""
+    casts = {}
+    for column, kind in schema.items():
+        if column not in frame.columns or str(frame[column].dtype) == kind:
+            continue
+        if _is_date(kind):
+            frame = frame.assign(**{column: pd.to_datetime(frame[column])})
+        else:
+            casts[column] = kind
+    return frame.astype(casts) if casts else frame
+
+
+def recorded_path(source_path: str) -> str:
+    return os.path.join(
+        os.path.dirname(source_path),
+        SCHEMA_DIR,
+        f"{os.path.basename(source_path)}.json",
+    )
+
+
+def recorded(source_path: str) -> Optional[Schema]:
+    """The schema inferred when source_path was last parsed, if the file has
+    not changed since"""
+    try:
+        with open(recorded_path(source_path)) as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    stat = archive.source_stat(source_path)
+    if (record.get("mtime_ns"), record.get("size")) != (stat.st_mtime_ns, stat.st_size):
+        return None
+    return record.get("schema")
+
+
+def record(source_path: str, frame: pd.DataFrame) -> None:
+    """Stores the schema of frame, parsed from source_path, so later parses
+    skip type inference"""
+    path = recorded_path(source_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    stat = archive.source_stat(source_path)
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(
+            {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "schema": infer(frame),
+            },
+            f,
+        )
+    os.replace(temp_path, path)
+
+
+def _is_date(kind: str) -> bool:
+    return kind == "date" or kind.startswith("datetime")
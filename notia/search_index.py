@@ -0,0 +1,88 @@
+import difflib
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from notia.models import DatasetMeta
+
+_TOKEN_RE = re.compile(r"\w+")
+# terms shorter than this only match whole words, longer ones also fuzzily
+_MIN_FUZZY_LENGTH = 4
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+class SearchIndex:
+    """Inverted index over the name and description of datasets.
+
+    Every term of a query must match a word of a dataset, either exactly or
+    as a prefix, falling back to close spellings for longer terms. Results
+    are ranked by how well and how often the terms match, matches in the
+    name counting double.
+    """
+
+    def __init__(self, datasets: Iterable[DatasetMeta]) -> None:
+        self._datasets: Dict[str, DatasetMeta] = {}
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        for dataset in datasets:
+            self._datasets[dataset.slug] = dataset
+            for weight, text in ((2.0, dataset.name), (1.0, dataset.description)):
+                for token in tokenize(text):
+                    postings = self._postings[token]
+                    postings[dataset.slug] = postings.get(dataset.slug, 0.0) + weight
+        self._vocabulary = sorted(self._postings)
+
+    def __len__(self) -> int:
+        return len(self._datasets)
+
+    def search(self, query: Optional[str], limit: Optional[int] = None):
+        """Datasets matching query, best first. An empty query matches every
+        dataset."""
+        terms = tokenize(query)
+        if not terms:
+            return list(self._datasets.values())[:limit]
+        scores: Optional[Dict[str, float]] = None
+        for term in terms:
+            term_scores = self._match(term)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    slug: score + term_scores[slug]
+                    for slug, score in scores.items()
+                    if slug in term_scores
+                }
+            if not scores:
+                return []
+        ranked = sorted(scores, key=lambda slug: (-scores[slug], slug))
+        return [self._datasets[slug] for slug in ranked[:limit]]
+
+    def _match(self, term: str) -> Dict[str, float]:
+        """Score of every dataset containing a word matching term"""
+        words: Dict[str, float] = {}
+        if term in self._postings:
+            words[term] = 1.0
+        for word in self._prefixed(term):
+            words.setdefault(word, 0.5)
+        if not words and len(term) >= _MIN_FUZZY_LENGTH:
+            for word in difflib.get_close_matches(term, self._vocabulary, n=5):
+                words.setdefault(word, 0.25)
+        scores: Dict[str, float] = defaultdict(float)
+        for word, quality in words.items():
+            for slug, weight in self._postings[word].items():
+                scores[slug] += quality * weight
+        return scores
+
+    def _prefixed(self, term: str) -> Set[str]:
+        # the vocabulary is sorted, so words starting with term are contiguous
+        start = bisect_left(self._vocabulary, term)
+        words = set()
+        for word in self._vocabulary[start:]:
+            if not word.startswith(term):
+                break
+            if word != term:
+                words.add(word)
+        return words
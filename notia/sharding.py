@@ -0,0 +1,345 @@
+"""Reading a share of a dataset per worker of a distributed job.
+
+Every split file is cut into blocks: byte ranges of whole lines for CSV, TSV
+and JSON lines files, and whole files for JSON documents. The blocks of the
+requested splits are dealt out in turn to the world_size * num_workers
+workers of a job, after an optional shuffle seeded with the epoch. Every
+worker plans the same blocks from the same files, so they agree on the
+assignment without communicating and each only parses its own blocks.
+"""
+
+import io
+import math
+import os
+import random
+from dataclasses import dataclass
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+import pandas as pd
+
+from . import archive, instrumentation, json_reader
+from . import schema as dataset_schema
+from .cache import parse_size
+from .config import NOTIA_SHARD_BLOCK_SIZE
+from .download_manager import (
+    DownloadManager,
+    _apply_schema,
+    _delimited_options,
+    _parse_delimited,
+    select,
+    split_files,
+)
+
+# files are cut into at least one block per worker, down to this size
+MIN_BLOCK_SIZE = 64 * 1024
+
+_DELIMITERS = {".csv": ",", ".tsv": "\t"}
+
+
+@dataclass(frozen=True)
+class Block:
+    """Lines of path starting in [start, end), or the whole file if end is
+    None"""
+
+    split: str
+    path: str
+    start: int = 0
+    end: Optional[int] = None
+
+
+class ShardedReader:
+    """The share of a dataset's splits read by one worker of a distributed
+    job, identified by its rank among world_size processes and its
+    worker_id among the num_workers data loading workers of that process.
+
+    Iterating yields a DataFrame per block. Blocks are parsed independently,
+    so give a schema, or load the split in full once to record one, for
+    every block to be parsed with the same dtypes. Lines of a CSV or TSV
+    file must not hold quoted line breaks, as blocks are cut at line breaks.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        rank: int = 0,
+        world_size: int = 1,
+        worker_id: int = 0,
+        num_workers: int = 1,
+        split: Union[str, Sequence[str], None] = None,
+        columns: Optional[List[str]] = None,
+        filters=None,
+        schema: Optional[dict] = None,
+        shuffle: bool = False,
+        seed: int = 0,
+        block_size: Union[int, str, None] = None,
+    ) -> None:
+        if not 0 <= rank < world_size:
+            raise ValueError(f"rank {rank} is not in [0, {world_size})")
+        if not 0 <= worker_id < num_workers:
+            raise ValueError(f"worker_id {worker_id} is not in [0, {num_workers})")
+        self.path = path
+        self.rank = rank
+        self.world_size = world_size
+        self.worker_id = worker_id
+        self.num_workers = num_workers
+        self.columns = columns
+        self.filters = filters
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+        self.block_size = parse_size(block_size or NOTIA_SHARD_BLOCK_SIZE)
+        files = split_files(path)
+        splits = sorted(files) if split is None else _as_list(split)
+        missing = [name for name in splits if name not in files]
+        if missing:
+            raise ValueError(f"No split named {', '.join(missing)} in {path}")
+        self._files = {name: files[name] for name in splits}
+        self._schema = schema
+
+    @property
+    def shard_index(self) -> int:
+        return self.rank * self.num_workers + self.worker_id
+
+    @property
+    def num_shards(self) -> int:
+        return self.world_size * self.num_workers
+
+    def set_epoch(self, epoch: int) -> None:
+        """Changes the shuffled order of the blocks, call with the same epoch
+        on every worker"""
+        self.epoch = epoch
+
+    def blocks(self) -> List[Block]:
+        """The blocks this worker reads, in order"""
+        blocks = [
+            block
+            for name, path in self._files.items()
+            for block in self._plan(name, path)
+        ]
+        if self.shuffle:
+            random.Random(f"{self.seed}:{self.epoch}").shuffle(blocks)
+        first, step = self.shard_index, self.num_shards
+        return blocks[first::step]
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        for block in self.blocks():
+            with instrumentation.span(
+                "parse", file=os.path.basename(block.path), shard=self.shard_index
+            ) as span:
+                frame = self._read(block)
+                span.set_attribute("rows", len(frame))
+            if len(frame):
+                yield frame
+
+    def to_pandas(self) -> pd.DataFrame:
+        """Every block of this worker in one DataFrame"""
+        frames = list(self)
+        if not frames:
+            return pd.DataFrame(columns=self.columns)
+        return pd.concat(frames, ignore_index=True)
+
+    def _plan(self, split: str, path: str) -> List[Block]:
+        ext = os.path.splitext(path)[1]
+        if ext == ".json" and not json_reader.is_json_lines(path):
+            # a document can only be parsed whole
+            return [Block(split, path)]
+        start = len(_header(path)) if ext in _DELIMITERS else 0
+        size = archive.source_size(path) - start
+        count = math.ceil(size / self.block_size)
+        if count < self.num_shards:
+            # spread small files over every worker, within reason
+            count = min(self.num_shards, math.ceil(size / MIN_BLOCK_SIZE))
+        count = max(count, 1)
+        bounds = [start + size * index // count for index in range(count + 1)]
+        return [Block(split, path, bounds[i], bounds[i + 1]) for i in range(count)]
+
+    def _read(self, block: Block) -> pd.DataFrame:
+        schema = dataset_schema.for_split(self._schema, block.split)
+        schema = schema or dataset_schema.recorded(block.path)
+        ext = os.path.splitext(block.path)[1]
+        if block.end is None:
+            frame = _apply_schema(json_reader.read_json(block.path), schema)
+        elif ext in _DELIMITERS:
+            # the header line is parsed with every block
+            open_block = partial(io.BytesIO, _header(block.path) + _read_lines(block))
+            usecols = None if self.filters else self.columns
+            options = _delimited_options(open_block, _DELIMITERS[ext], schema, usecols)
+            frame = _parse_delimited(open_block, _DELIMITERS[ext], **options)
+        else:
+            data = _read_lines(block)
+            frame = json_reader.parse_json_lines(data) if data else pd.DataFrame()
+            frame = _apply_schema(frame, schema)
+        return select(frame, self.columns, self.filters)
+
+
+def load_sharded(
+    ID: str,
+    rank: int = 0,
+    world_size: int = 1,
+    worker_id: int = 0,
+    num_workers: int = 1,
+    split: Union[str, Sequence[str], None] = None,
+    columns: Optional[List[str]] = None,
+    filters=None,
+    schema: Optional[dict] = None,
+    shuffle: bool = False,
+    seed: int = 0,
+    block_size: Union[int, str, None] = None,
+    extract: Optional[bool] = None,
+) -> ShardedReader:
+    """
+    Load the share of a dataset belonging to one worker of a distributed job,
+    downloading the dataset to the cache if required.
+    Arguments:
+        ID: (string) the dataset ID.
+        rank: (int, optional) index of this process among world_size.
+        world_size: (int, optional) number of processes in the job.
+        worker_id: (int, optional) index of this data loading worker among
+            the num_workers of its process.
+        num_workers: (int, optional) data loading workers per process.
+        split: (string or list, optional) splits to read, every split if
+            not provided.
+        columns: (list, optional) names of the columns to load.
+        filters: (list, optional) row filters as (column, op, value) tuples,
+            in the format accepted by pandas.read_parquet.
+        schema: (dict, optional) dtype of columns, as for load_dataset.
+        shuffle: (bool, optional) if True, the order in which blocks are
+            dealt out is shuffled, differently for each epoch set with
+            ShardedReader.set_epoch. Rows within a block keep their order.
+        seed: (int, optional) seed of the shuffle, the same on every worker.
+        block_size: (int or string, optional) target size of the blocks
+            files are cut into, such as 64M. Defaults to
+            NOTIA_SHARD_BLOCK_SIZE.
+        extract: (bool, optional) as for load_dataset.
+
+    Processes downloading the same dataset wait for a single download.
+    Returns:
+        A ShardedReader yielding a DataFrame per block of this worker.
+    """
+    from .config import Api
+
+    path = DownloadManager().get_from_cache(ID, extract=extract)
+    if schema is None and Api.metadata is not None:
+        schema = Api.metadata.declared_schema(ID)
+    return ShardedReader(
+        path,
+        rank,
+        world_size,
+        worker_id,
+        num_workers,
+        split,
+        columns,
+        filters,
+        schema,
+        shuffle,
+        seed,
+        block_size,
+    )
+
+
+def _as_list(split: Union[str, Sequence[str]]) -> List[str]:
+    return [split] if isinstance(split, str) else list(split)
+
+
+def _header(path: str) -> bytes:
+    with archive.open_source(path) as f:
+        return f.readline()
+
+
+def _read_lines(block: Block) -> bytes:
+    """The lines of block.path starting in [block.start, block.end). A line
+    starting before block.start belongs to the previous block."""
+    with archive.open_source(block.path) as f:
+        if block.start > 0:
+            # skip the rest of a line started in the previous block
+            f.seek(block.start - 1)
+            f.readline()
+        position = f.tell()
+        if position >= block.end:
+            return b""
+        data = f.read(block.end - position)
+        if data and not data.endswith(b"\n"):
+            # finish the last line, it started in this block
+            data += f.readline()
+        return data
+
+
+def _iterable_dataset_class():
+    from torch.utils.data import IterableDataset, get_worker_info
+
+    class ShardedIterableDataset(IterableDataset):
+        """A PyTorch IterableDataset reading one shard of a Notia dataset per
+        data loading worker.
+
+        The rank and world size default to those of torch.distributed when
+        it is initialised, and the worker of each DataLoader process is
+        found with get_worker_info. Yields a dict per row, or with
+        batch_size, a dict mapping each column to an array of at most
+        batch_size values, for use with DataLoader(batch_size=None).
+        Call set_epoch before each epoch to reshuffle.
+        """
+
+        def __init__(
+            self,
+            ID: str,
+            split: Union[str, Sequence[str], None] = None,
+            rank: Optional[int] = None,
+            world_size: Optional[int] = None,
+            batch_size: Optional[int] = None,
+            **options,
+        ) -> None:
+            """options are passed to load_sharded"""
+            self.ID = ID
+            self.split = split
+            self.rank = rank
+            self.world_size = world_size
+            self.batch_size = batch_size
+            self.options = options
+            self.epoch = 0
+
+        def set_epoch(self, epoch: int) -> None:
+            self.epoch = epoch
+
+        def __iter__(self) -> Iterator[Dict[str, object]]:
+            rank, world_size = _distributed_rank()
+            worker = get_worker_info()
+            reader = load_sharded(
+                self.ID,
+                rank=self.rank if self.rank is not None else rank,
+                world_size=self.world_size or world_size,
+                worker_id=worker.id if worker is not None else 0,
+                num_workers=worker.num_workers if worker is not None else 1,
+                split=self.split,
+                **self.options,
+            )
+            reader.set_epoch(self.epoch)
+            for frame in reader:
+                if self.batch_size is None:
+                    yield from frame.to_dict("records")
+                    continue
+                for start in range(0, len(frame), self.batch_size):
+                    end = start + self.batch_size
+                    batch = frame.iloc[start:end]
+                    yield {column: batch[column].to_numpy() for column in batch}
+
+    # so pickling, as done by DataLoader workers, finds it through __getattr__
+    ShardedIterableDataset.__module__ = __name__
+    ShardedIterableDataset.__qualname__ = "ShardedIterableDataset"
+    return ShardedIterableDataset
+
+
+def _distributed_rank():
+    import torch.distributed as dist
+
+    if dist.is_available() and dist.is_initialized():
+        return dist.get_rank(), dist.get_world_size()
+    return 0, 1
+
+
+def __getattr__(name: str):
+    # defined on first use, as it subclasses a torch class and torch is large
+    if name == "ShardedIterableDataset":
+        globals()[name] = _iterable_dataset_class()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,101 @@
+import threading
+import time
+from typing import Optional
+
+
+class BandwidthLimiter:
+    """Token bucket capping the combined rate of every transfer sharing it.
+
+    Transfers report the bytes they receive with consume, which sleeps for as
+    long as it takes the bucket to pay back whatever the transfer overdrew.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        """
+        Args:
+            rate (float): Maximum sustained rate, in bytes per second.
+            burst (float): Bytes that may be consumed at once after a period
+                           of inactivity, defaults to one second's worth.
+        """
+        if rate <= 0:
+            raise ValueError("Bandwidth limit must be positive")
+        self.rate = rate
+        self.burst = burst or rate
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, nbytes: int) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= nbytes
+            wait_time = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait_time:
+            time.sleep(wait_time)
+
+
+class ConcurrencyLimiter:
+    """Caps the number of transfers in flight, adapting the cap to the
+    server: it grows by one for every cap's worth of successful requests and
+    halves when the server throttles, so parallel transfers back off
+    together rather than retrying into the same limit.
+
+    Transfers hold a slot for their duration by using the limiter as a
+    context manager.
+    """
+
+    def __init__(
+        self, max_concurrency: int, min_concurrency: int = 1, cooldown: float = 1.0
+    ) -> None:
+        """
+        Args:
+            max_concurrency (int): Largest and initial cap.
+            min_concurrency (int): Smallest cap.
+            cooldown (float): Seconds after halving the cap during which
+                              further throttling is taken to be caused by
+                              the same burst and ignored.
+        """
+        if max_concurrency < 1:
+            raise ValueError("Concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min(min_concurrency, max_concurrency)
+        self.cooldown = cooldown
+        self._limit = float(max_concurrency)
+        self._active = 0
+        self._decreased_at = float("-inf")
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def __enter__(self) -> "ConcurrencyLimiter":
+        with self._condition:
+            while self._active >= self.limit:
+                self._condition.wait()
+            self._active += 1
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        with self._condition:
+            self._active -= 1
+            self._condition.notify()
+
+    def record_success(self) -> None:
+        with self._condition:
+            limit = self.limit
+            self._limit = min(self.max_concurrency, self._limit + 1 / self._limit)
+            if self.limit > limit:
+                self._condition.notify()
+
+    def record_throttle(self) -> None:
+        with self._condition:
+            now = time.monotonic()
+            if now - self._decreased_at < self.cooldown:
+                return
+            self._decreased_at = now
+            self._limit = max(self.min_concurrency, self._limit / 2)
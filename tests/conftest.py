@@ -0,0 +1,28 @@
+import sys
+
+import pytest
+
+from helpers import API_URL
+from notia import cache, config, download_manager, prefetch  # noqa: F401
+from notia.metadata_cache import METADATA_DIR, MetadataCache
+
+
+@pytest.fixture(scope="session")
+def base_config():
+    return {"API_URL": API_URL}
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Points the dataset and metadata caches at tmp_path, so tests neither
+    read nor leave entries in the user's cache"""
+    cache_dir = str(tmp_path / "notia-cache")
+    # notia.prefetch names the function, not the module defining it
+    prefetch_module = sys.modules["notia.prefetch"]
+    for module in (config, cache, download_manager, prefetch_module):
+        monkeypatch.setattr(module, "NOTIA_CACHE", cache_dir)
+    metadata = MetadataCache(f"{cache_dir}/{METADATA_DIR}", config.NOTIA_METADATA_TTL)
+    monkeypatch.setattr(config.Api, "_metadata", metadata)
+    monkeypatch.setattr(config.Api, "_presigned", {})
+    monkeypatch.setattr(config.Api, "_search_index", None)
+    return cache_dir
@@ -0,0 +1,37 @@
+"""Mocked API and storage responses shared by the tests"""
+
+import json
+import os
+
+import responses
+from responses import matchers
+
+API_URL = os.environ.get("NOTIA_ENDPOINT", "https://notia.api.notia.ai")
+
+
+def dataset_url(slug: str) -> str:
+    """The presigned url slug is mocked to download from"""
+    return f"https://s3.eu-west-2.amazonaws.com/example-bucket/{slug}"
+
+
+def mock_presign(rsps, slug: str, url: str = None, **kwargs):
+    """Mocks the API presigning slug as url, by default dataset_url(slug).
+    kwargs are passed to rsps.add."""
+    return rsps.add(
+        responses.GET,
+        f"{API_URL}/api/datasets/presign",
+        body=json.dumps({"url": url or dataset_url(slug)}),
+        match=[matchers.query_param_matcher({"slug": slug})],
+        content_type="application/json",
+        **kwargs,
+    )
+
+
+def mock_dataset(rsps, slug: str, url: str = None):
+    """Mocks presigning slug and downloading resources/test.zip from the
+    presigned url. Returns the mocked presign response."""
+    url = url or dataset_url(slug)
+    presign = mock_presign(rsps, slug, url)
+    with open("./resources/test.zip", "rb") as f:
+        rsps.add(responses.GET, url, body=f.read(), auto_calculate_content_length=True)
+    return presign
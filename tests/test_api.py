@@ -2,12 +2,13 @@ import notia
 import pytest
 import responses
 from responses import matchers
-import os
-
-
-@pytest.fixture(scope="module")
-def base_config():
-    return {"API_URL": os.environ.get("NOTIA_ENDPOINT", "https://notia.api.notia.ai")}
+import json
+import requests
+from datetime import datetime, timezone
+from notia.api import API
+from notia.retry import RetryPolicy
+from notia.metadata_cache import MetadataCache
+from helpers import mock_presign
 
 
 @pytest.fixture(scope="session")
@@ -42,3 +43,168 @@ def test_orders(base_config, mocked_responses):
     )
 
     notia.my_datasets()
+
+
+def test_search_metadata_cache(base_config, tmp_path):
+    API_URL = base_config["API_URL"]
+    dataset = {
+        "slug": "cached-dataset",
+        "name": "Cached",
+        "description": "A dataset",
+        "size": 1024,
+        "created_at": "2022-01-01T00:00:00",
+        "price": None,
+        "status": "confirmed",
+        "license": None,
+    }
+    metadata_cache = MetadataCache(str(tmp_path), ttl=60)
+    api = API(api_url=API_URL, metadata_cache=metadata_cache)
+    with responses.RequestsMock() as rsps:
+        search = rsps.add(
+            responses.GET,
+            f"{API_URL}/datasets/filter",
+            json={"results": [{"dataset": dataset}]},
+            headers={"ETag": '"v1"'},
+        )
+        api.Search("cached")
+        api.Search("cached")
+        assert search.call_count == 1
+    assert metadata_cache.declared_size("cached-dataset") == 1024
+
+    # once expired the cached results are revalidated
+    metadata_cache.ttl = 0
+    with responses.RequestsMock() as rsps:
+        revalidate = rsps.add(
+            responses.GET,
+            f"{API_URL}/datasets/filter",
+            status=304,
+            match=[matchers.header_matcher({"If-None-Match": '"v1"'})],
+        )
+        api.Search("cached")
+        assert revalidate.call_count == 1
+
+    # and still used from disk when the API is unreachable or offline
+    api = API(api_url=API_URL, metadata_cache=MetadataCache(str(tmp_path), ttl=0))
+    with responses.RequestsMock():
+        api._RequestCached(f"{API_URL}/datasets/filter", {"search_query": "cached"})
+        api._offline = True
+        body = api._RequestCached(
+            f"{API_URL}/datasets/filter", {"search_query": "cached"}
+        )
+    assert body["results"][0]["dataset"]["slug"] == "cached-dataset"
+
+
+def _dataset(slug, name, description):
+    return {
+        "slug": slug,
+        "name": name,
+        "description": description,
+        "size": 1024,
+        "created_at": "2022-01-01T00:00:00",
+        "price": None,
+        "status": "confirmed",
+        "license": None,
+    }
+
+
+def test_iter_search_pages(base_config, tmp_path):
+    API_URL = base_config["API_URL"]
+    catalog = [
+        _dataset("weather", "Weather stations", "Hourly temperature readings"),
+        _dataset("taxi", "Taxi trips", "Fares and pickup locations in London"),
+        _dataset("housing", "House prices", "Sale prices of London property"),
+    ]
+
+    def callback(request):
+        page = int(request.params["page"])
+        page_size = int(request.params["page_size"])
+        start, end = (page - 1) * page_size, page * page_size
+        results = catalog[start:end]
+        return (200, {}, json.dumps({"results": [{"dataset": d} for d in results]}))
+
+    api = API(api_url=API_URL, metadata_cache=MetadataCache(str(tmp_path)))
+    with responses.RequestsMock() as rsps:
+        rsps.add_callback(responses.GET, f"{API_URL}/datasets/filter", callback)
+        datasets = api.IterSearch(page_size=2)
+        assert next(datasets).slug == "weather"
+        assert len(rsps.calls) == 1
+        assert [dataset.slug for dataset in datasets] == ["taxi", "housing"]
+        assert len(rsps.calls) == 2
+
+        index = api.LocalIndex()
+        assert len(index) == 3
+
+    # answered from the catalog snapshot without requests
+    api = API(
+        api_url=API_URL, metadata_cache=MetadataCache(str(tmp_path)), offline=True
+    )
+    with responses.RequestsMock():
+        index = api.LocalIndex()
+    assert [d.slug for d in index.search("london")] == ["housing", "taxi"]
+    assert [d.slug for d in index.search("london tax")] == ["taxi"]
+    assert [d.slug for d in index.search("temperture")] == ["weather"]
+    assert index.search("london weather") == []
+
+
+def test_request_retries_throttled_responses(base_config):
+    API_URL = base_config["API_URL"]
+    api = API(api_url=API_URL, retry_policy=RetryPolicy(max_retries=2))
+    url = f"{API_URL}/api/datasets/presign"
+    with responses.RequestsMock() as rsps:
+        throttled = rsps.add(
+            responses.GET, url, status=429, headers={"Retry-After": "0"}
+        )
+        rsps.add(responses.GET, url, status=503, headers={"Retry-After": "0"})
+        rsps.add(responses.GET, url, json={"url": "https://example.com/a.zip"})
+        assert api.GetPresigned("slug") == "https://example.com/a.zip"
+        assert throttled.call_count == 1
+        assert len(rsps.calls) == 3
+
+        # the last response is returned once the retries run out
+        rsps.add(responses.GET, url, status=503, headers={"Retry-After": "0"})
+        response = api._RequestUrl(url, "GET")
+        assert response.status_code == 503
+        assert len(rsps.calls) == 6
+
+
+def test_retry_policy_wait_time():
+    policy = RetryPolicy(base_wait_time=1, max_wait_time=4)
+    for tries, cap in [(1, 1), (2, 2), (3, 4), (6, 4)]:
+        assert all(0 <= policy.wait_time(tries) <= cap for _ in range(50))
+
+    response = requests.Response()
+    response.headers["Retry-After"] = "7"
+    assert policy.wait_time(1, response) == 7
+    response.headers["Retry-After"] = "Wed, 21 Oct 2015 07:28:00 GMT"
+    assert policy.wait_time(1, response) == 0
+
+
+def test_presigned_urls_are_cached(base_config, tmp_path):
+    API_URL = base_config["API_URL"]
+    signed = datetime.now(timezone.utc)
+    url = (
+        "https://example-bucket.s3.eu-west-2.amazonaws.com/cached.zip"
+        f"?X-Amz-Date={signed:%Y%m%dT%H%M%SZ}&X-Amz-Expires=3600"
+    )
+    metadata = MetadataCache(str(tmp_path))
+    api = API(api_url=API_URL, metadata_cache=metadata)
+    with responses.RequestsMock() as rsps:
+        presign = mock_presign(rsps, "cached", url)
+        assert api.GetPresigned("cached") == url
+        assert api.GetPresigned("cached") == url
+        # kept on disk for the next process
+        assert API(api_url=API_URL, metadata_cache=metadata).GetPresigned("cached")
+        assert presign.call_count == 1
+
+        # a rejected url is replaced
+        assert api.GetPresigned("cached", refresh=True) == url
+        assert presign.call_count == 2
+
+        # urls are only reused for the API key they were presigned for
+        api.api_key = "another-key"
+        assert api.GetPresigned("cached") == url
+        assert presign.call_count == 3
+        other = API(api_url=API_URL, metadata_cache=metadata)
+        other.api_key = "a-third-key"
+        assert other.GetPresigned("cached") == url
+        assert presign.call_count == 4
@@ -0,0 +1,50 @@
+import asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from notia.async_api import AsyncAPI
+
+DATASET = {
+    "slug": "XXXXXXXX",
+    "name": "Example",
+    "description": "An example dataset",
+    "size": 1024,
+    "created_at": "2022-03-24T21:02:00",
+    "price": None,
+    "status": "confirmed",
+}
+
+
+def _app(connections):
+    async def search(request):
+        connections.add(id(request.transport))
+        assert request.query["search_query"] == "example"
+        return web.json_response({"results": [{"dataset": DATASET}]})
+
+    async def presign(request):
+        connections.add(id(request.transport))
+        return web.json_response({"url": f"https://s3/{request.query['slug']}"})
+
+    app = web.Application()
+    app.router.add_get("/datasets/filter", search)
+    app.router.add_get("/api/datasets/presign", presign)
+    return app
+
+
+def test_async_api_reuses_connections():
+    connections = set()
+
+    async def run():
+        async with TestServer(_app(connections)) as server:
+            api_url = str(server.make_url("")).rstrip("/")
+            async with AsyncAPI(api_url=api_url, limit_per_host=2) as api:
+                datasets = await api.Search("example")
+                urls = await asyncio.gather(
+                    *(api.GetPresigned(f"slug-{i}") for i in range(10))
+                )
+        return datasets, urls
+
+    datasets, urls = asyncio.run(run())
+    assert [dataset.slug for dataset in datasets] == ["XXXXXXXX"]
+    assert urls == [f"https://s3/slug-{i}" for i in range(10)]
+    # eleven requests over at most two pooled connections
+    assert len(connections) <= 2
@@ -0,0 +1,104 @@
+import os
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from notia import manifest
+from notia.cache import CacheManager, parse_size
+from notia.cli import cli
+
+
+def make_entry(cache_dir, slug, size):
+    path = os.path.join(cache_dir, slug)
+    os.makedirs(path)
+    with open(os.path.join(path, "train.csv"), "wb") as f:
+        f.write(b"x" * size)
+    manifest.write(path, slug)
+    return path
+
+
+def test_parse_size():
+    assert parse_size("500") == 500
+    assert parse_size("2K") == 2048
+    assert parse_size("1.5GB") == int(1.5 * 1024**3)
+    assert parse_size("20GiB") == 20 * 1024**3
+    assert parse_size(None) is None
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_prune_least_recently_used(tmp_path):
+    cache_manager = CacheManager(tmp_path)
+    for slug in ["old", "pinned", "recent"]:
+        make_entry(tmp_path, slug, 1000)
+        cache_manager.touch(slug)
+        time.sleep(0.01)
+    cache_manager.pin("pinned")
+    cache_manager.touch("old")
+
+    assert cache_manager.prune(2500, dry_run=True)[0].slug == "recent"
+    assert os.path.isdir(tmp_path / "recent")
+
+    evicted = cache_manager.prune(1500)
+    assert [entry.slug for entry in evicted] == ["recent", "old"]
+    assert [entry.slug for entry in cache_manager.entries()] == ["pinned"]
+
+
+def test_prune_least_frequently_used(tmp_path):
+    cache_manager = CacheManager(tmp_path, policy="lfu")
+    for slug, hits in [("popular", 3), ("rare", 1)]:
+        make_entry(tmp_path, slug, 1000)
+        for _ in range(hits):
+            cache_manager.touch(slug)
+    cache_manager.touch("rare")
+    cache_manager.touch("popular")
+
+    assert [entry.slug for entry in cache_manager.prune(1500)] == ["rare"]
+
+
+def test_prune_to_zero(tmp_path):
+    cache_manager = CacheManager(tmp_path, max_size=0)
+    assert cache_manager.max_size == 0
+    for slug in ["first", "second"]:
+        make_entry(tmp_path, slug, 1000)
+    assert len(cache_manager.prune(dry_run=True)) == 2
+    assert len(CacheManager(tmp_path).prune("0")) == 2
+    assert cache_manager.entries() == []
+
+
+def test_gc_removes_stale_partial_files(tmp_path):
+    cache_manager = CacheManager(tmp_path)
+    os.makedirs(cache_manager.downloads_dir)
+    stale = os.path.join(cache_manager.downloads_dir, "crashed.part")
+    fresh = os.path.join(cache_manager.downloads_dir, "running.part")
+    for path in (stale, fresh):
+        open(path, "w").close()
+    os.utime(stale, (time.time() - 3600, time.time() - 3600))
+
+    assert cache_manager.gc(max_age=60) == [stale]
+    assert os.path.exists(fresh)
+
+
+def test_cli(tmp_path):
+    make_entry(tmp_path, "first", 1000)
+    make_entry(tmp_path, "second", 1000)
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["cache", "--cache-dir", str(tmp_path), "list"])
+    assert result.exit_code == 0
+    assert "first" in result.output and "second" in result.output
+
+    result = runner.invoke(cli, ["cache", "--cache-dir", str(tmp_path), "pin", "first"])
+    assert result.exit_code == 0
+    result = runner.invoke(
+        cli, ["cache", "--cache-dir", str(tmp_path), "prune", "--max-size", "1.5K"]
+    )
+    assert result.exit_code == 0
+    assert not os.path.exists(tmp_path / "second")
+    assert os.path.exists(tmp_path / "first")
+
+    result = runner.invoke(
+        cli, ["cache", "--cache-dir", str(tmp_path), "remove", "second"]
+    )
+    assert result.exit_code != 0
@@ -1,15 +1,22 @@
 import notia
 import pytest
 import responses
-from responses import matchers
 import os
 import json
 import uuid
-
-
-@pytest.fixture(scope="module")
-def base_config():
-    return {"API_URL": os.environ.get("NOTIA_ENDPOINT", "https://notia.api.notia.ai")}
+import zipfile
+import zlib
+import hashlib
+import io
+import types
+from notia.errors import IntegrityError, InsufficientDiskSpaceError
+from notia import archive, arrow_cache, manifest, memory_cache
+from notia import schema as dataset_schema
+from concurrent.futures import ThreadPoolExecutor
+from notia.download_manager import DownloadManager, _handle_split, _iter_into
+from notia.models import Dataset
+from notia.throttle import ConcurrencyLimiter
+from helpers import dataset_url, mock_dataset, mock_presign
 
 
 @pytest.fixture(scope="session")
@@ -18,28 +25,534 @@ def mocked_responses():
         yield rsps
 
 
-def test_load_datasets(base_config, mocked_responses):
-    API_URL = base_config["API_URL"]
+def test_load_datasets(mocked_responses):
     AWS_URL = (
         f"https://s3.eu-west-2.amazonaws.com/example-bucket/example/{uuid.uuid4()}"
     )
-    params = {"slug": "XXXXXXXX"}
-
-    mocked_responses.add(
-        responses.GET,
-        f"{API_URL}/api/datasets/presign",
-        body=json.dumps({"url": AWS_URL}),
-        status=200,
-        match=[matchers.query_param_matcher(params)],
-        content_type="application/json",
+    mock_dataset(mocked_responses, "XXXXXXXX", AWS_URL)
+
+    notia.load_dataset("XXXXXXXX", load=False)
+
+
+def _range_callback(payload: bytes, honour_range: bool = True):
+    def callback(request):
+        byte_range = request.headers.get("Range")
+        if not honour_range or byte_range is None:
+            return (200, {"Content-Length": str(len(payload))}, payload)
+        start, end = (int(x) for x in byte_range.split("=")[1].split("-"))
+        stop = min(end + 1, len(payload))
+        body = payload[start:stop]
+        headers = {
+            "Content-Range": f"bytes {start}-{start + len(body) - 1}/{len(payload)}",
+            "Content-Length": str(len(body)),
+        }
+        return (206, headers, body)
+
+    return callback
+
+
+@pytest.mark.parametrize("honour_range", [True, False])
+def test_http_get_parallel(tmp_path, honour_range):
+    url = f"https://s3.eu-west-2.amazonaws.com/example-bucket/{uuid.uuid4()}"
+    payload = os.urandom(10_000)
+    manager = DownloadManager(max_workers=4, part_size=1024)
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add_callback(
+            responses.GET, url, callback=_range_callback(payload, honour_range)
+        )
+        with open(tmp_path / "download", "w+b") as temp_file:
+            manager.http_get(url, temp_file)
+    assert (tmp_path / "download").read_bytes() == payload
+
+
+def test_http_get_backs_off_when_throttled(tmp_path, monkeypatch):
+    url = f"https://s3.eu-west-2.amazonaws.com/example-bucket/{uuid.uuid4()}"
+    payload = os.urandom(10_000)
+    throttled = []
+
+    def callback(request):
+        if request.headers["Range"] != "bytes=0-0" and len(throttled) < 3:
+            throttled.append(request.headers["Range"])
+            return (429, {"Retry-After": "0"}, b"")
+        return _range_callback(payload)(request)
+
+    limiter = ConcurrencyLimiter(4, cooldown=60)
+    limits = []
+    record_throttle = limiter.record_throttle
+    monkeypatch.setattr(
+        limiter,
+        "record_throttle",
+        lambda: (record_throttle(), limits.append(limiter.limit)),
     )
-    mocked_responses.add(
-        responses.GET,
-        f"{AWS_URL}",
-        body=open("./resources/test.zip", "rb").read(),
-        status=200,
-        auto_calculate_content_length=True,
-        content_type="multipart-form/data",
+    manager = DownloadManager(
+        max_workers=4, part_size=1024, concurrency_limiter=limiter
     )
+    with responses.RequestsMock() as rsps:
+        rsps.add_callback(responses.GET, url, callback=callback)
+        with open(tmp_path / "download", "w+b") as temp_file:
+            manager.http_get(url, temp_file, max_retries=3)
+    assert (tmp_path / "download").read_bytes() == payload
+    assert len(throttled) == 3
+    # halved once for the burst, then regrown by the successful parts
+    assert limits[0] == 2 and set(limits) <= {2, 3}
+    assert limiter.limit > 2
 
-    notia.load_dataset("XXXXXXXX", load=False)
+
+def test_iter_into_reuses_buffer():
+    payload = os.urandom(3 * 1024 * 1024)
+    response = types.SimpleNamespace(raw=io.BytesIO(payload))
+    buffer = bytearray(1024 * 1024)
+    sizes, received = [], bytearray()
+    for chunk in _iter_into(response, buffer):
+        assert chunk.obj is buffer
+        sizes.append(len(chunk))
+        received += chunk
+    assert received == payload
+    # reads grow from 64KiB to the size of the buffer on a fast source
+    assert sizes[:5] == [2**16, 2**17, 2**18, 2**19, 2**20]
+
+
+def test_http_get_resumes_from_sidecar(tmp_path):
+    url = f"https://s3.eu-west-2.amazonaws.com/example-bucket/{uuid.uuid4()}"
+    payload = os.urandom(4096)
+    path = tmp_path / "download.part"
+    # first part fully written, second part half written, the rest missing
+    path.write_bytes(payload[:1536] + bytes(4096 - 1536))
+    ranges = [[0, 1023, 1024], [1024, 2047, 512], [2048, 3071, 0], [3072, 4095, 0]]
+    (tmp_path / "download.part.json").write_text(
+        json.dumps({"url": url, "etag": None, "size": 4096, "ranges": ranges})
+    )
+
+    manager = DownloadManager(max_workers=4, part_size=1024)
+    with responses.RequestsMock() as rsps:
+        rsps.add_callback(responses.GET, url, callback=_range_callback(payload))
+        with open(path, "a+b") as temp_file:
+            manager.http_get(url, temp_file)
+        requested = sorted(call.request.headers["Range"] for call in rsps.calls)
+
+    assert path.read_bytes() == payload
+    assert requested == [
+        "bytes=0-0",
+        "bytes=1536-2047",
+        "bytes=2048-3071",
+        "bytes=3072-4095",
+    ]
+    assert not (tmp_path / "download.part.json").exists()
+
+
+def test_http_get_refreshes_expired_url(tmp_path):
+    expired_url = f"https://s3.eu-west-2.amazonaws.com/example-bucket/{uuid.uuid4()}"
+    fresh_url = f"https://s3.eu-west-2.amazonaws.com/example-bucket/{uuid.uuid4()}"
+    payload = os.urandom(2048)
+    manager = DownloadManager(max_workers=2, part_size=1024)
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, expired_url, status=403)
+        rsps.add_callback(responses.GET, fresh_url, callback=_range_callback(payload))
+        with open(tmp_path / "download", "w+b") as temp_file:
+            manager.http_get(expired_url, temp_file, refresh_url=lambda: fresh_url)
+    assert (tmp_path / "download").read_bytes() == payload
+
+
+def _make_zip(path, files):
+    with zipfile.ZipFile(path, "w") as zip_file:
+        for index, (name, data) in enumerate(files.items()):
+            compression = zipfile.ZIP_STORED if index % 2 else zipfile.ZIP_DEFLATED
+            zip_file.writestr(name, data, compress_type=compression)
+    return path.read_bytes()
+
+
+def test_stream_extract(tmp_path):
+    url = f"https://s3.eu-west-2.amazonaws.com/example-bucket/{uuid.uuid4()}"
+    files = {
+        "train.csv": b"a,b\n" + b"1,2\n" * 5000,
+        "nested/test.csv": os.urandom(3000),
+        "valid.csv": b"a,b\n3,4\n",
+    }
+    payload = _make_zip(tmp_path / "archive.zip", files)
+    manager = DownloadManager(max_workers=3, part_size=1024)
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add_callback(responses.GET, url, callback=_range_callback(payload))
+        assert manager.stream_extract(url, str(tmp_path / "out"))
+    for name, data in files.items():
+        assert (tmp_path / "out" / name).read_bytes() == data
+
+
+def test_stream_extract_without_range_support(tmp_path):
+    url = f"https://s3.eu-west-2.amazonaws.com/example-bucket/{uuid.uuid4()}"
+    payload = _make_zip(tmp_path / "archive.zip", {"train.csv": b"a,b\n1,2\n"})
+    manager = DownloadManager()
+    with responses.RequestsMock() as rsps:
+        rsps.add_callback(
+            responses.GET, url, callback=_range_callback(payload, honour_range=False)
+        )
+        assert not manager.stream_extract(url, str(tmp_path / "out"))
+    assert not (tmp_path / "out").exists()
+
+
+def test_stream_extract_leaves_large_members_to_partial_downloads(
+    tmp_path, monkeypatch
+):
+    monkeypatch.setattr("notia.download_manager.NOTIA_STREAM_MAX_MEMBER_SIZE", 1000)
+    url = f"https://s3.eu-west-2.amazonaws.com/example-bucket/{uuid.uuid4()}"
+    payload = _make_zip(tmp_path / "archive.zip", {"train.csv": os.urandom(3000)})
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add_callback(responses.GET, url, callback=_range_callback(payload))
+        # resumed from the last byte if interrupted, rather than the member's first
+        assert not DownloadManager().stream_extract(url, str(tmp_path / "out"))
+    assert not (tmp_path / "out" / "train.csv").exists()
+
+
+def test_stream_extract_replaces_changed_members(tmp_path):
+    url = f"https://s3.eu-west-2.amazonaws.com/example-bucket/{uuid.uuid4()}"
+    files = {"train.csv": b"a,b\n1,2\n", "valid.csv": b"a,b\n3,4\n"}
+    payload = _make_zip(tmp_path / "archive.zip", files)
+    # left by an attempt at an earlier version of the archive, of the same size
+    (tmp_path / "out").mkdir()
+    (tmp_path / "out" / "train.csv").write_bytes(b"a,b\n5,6\n")
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add_callback(responses.GET, url, callback=_range_callback(payload))
+        assert DownloadManager().stream_extract(url, str(tmp_path / "out"))
+    for name, data in files.items():
+        assert (tmp_path / "out" / name).read_bytes() == data
+
+
+@pytest.mark.parametrize(
+    "filename,content",
+    [
+        ("train.csv", "a,b\n" + "1,2\n" * 5),
+        ("train.tsv", "a\tb\n" + "1\t2\n" * 5),
+        ("train.jsonl", '{"a": 1, "b": 2}\n' * 5),
+        ("train.json", '{"a": 1, "b": 2}\n' * 5),
+        ("train.json", json.dumps([{"a": 1, "b": 2}] * 5, indent=2)),
+    ],
+)
+def test_handle_split_chunksize(tmp_path, filename, content):
+    (tmp_path / filename).write_text(content)
+    chunks = list(_handle_split(str(tmp_path), "", "train", chunksize=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert list(chunks[0].columns) == ["a", "b"]
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        json.dumps([{"a": 1, "b": "x"}, {"a": 2, "b": "y"}]),
+        json.dumps({"data": [{"a": 1, "b": "x"}, {"a": 2, "b": "y"}]}, indent=2),
+        json.dumps({"a": [1, 2], "b": ["x", "y"]}),
+        '{"a": 1, "b": "x"}\n\n{"a": 2, "b": "y"}\n',
+    ],
+)
+def test_handle_split_json(tmp_path, content):
+    (tmp_path / "train.json").write_text(content)
+    frame = _handle_split(str(tmp_path), "", "train")
+    assert frame.to_dict("list") == {"a": [1, 2], "b": ["x", "y"]}
+
+
+def test_handle_split_schema(tmp_path, monkeypatch):
+    monkeypatch.setattr("notia.download_manager.NOTIA_ARROW_CACHE", False)
+    (tmp_path / "train.csv").write_text("a,b,c\n1,x,2022-01-01\n2,y,2022-01-02\n")
+    schema = {"a": "int32", "b": "category", "c": "datetime64[ns]", "d": "int8"}
+    frame = _handle_split(str(tmp_path), "", "train", schema=schema)
+    assert str(frame["a"].dtype) == "int32"
+    assert str(frame["b"].dtype) == "category"
+    assert str(frame["c"].dtype).startswith("datetime64")
+
+    # inferred types are recorded, and used by the next parse
+    frame = _handle_split(str(tmp_path), "", "train")
+    recorded = dataset_schema.recorded(str(tmp_path / "train.csv"))
+    assert recorded == dataset_schema.infer(frame)
+    assert list(_handle_split(str(tmp_path), "", "train", columns=["b"])) == ["b"]
+
+    assert dataset_schema.for_split({"train": {"a": "int8"}}, "test") is None
+    assert dataset_schema.for_split({"a": "int8"}, "test") == {"a": "int8"}
+
+
+def test_handle_split_arrow_cache(tmp_path):
+    pytest.importorskip("pyarrow")
+    (tmp_path / "train.csv").write_text("a,b\n1,x\n2,y\n3,z\n")
+    frame = _handle_split(str(tmp_path), "", "train")
+    assert len(frame) == 3
+    cached = list((tmp_path / arrow_cache.ARROW_CACHE_DIR).iterdir())
+    assert [path.name.split(".")[0] for path in cached] == ["train"]
+
+    subset = _handle_split(
+        str(tmp_path), "", "train", columns=["b"], filters=[("a", ">=", 2)]
+    )
+    assert list(subset.columns) == ["b"]
+    assert list(subset["b"]) == ["y", "z"]
+
+    # a modified source replaces its converted copy
+    (tmp_path / "train.csv").write_text("a,b\n1,x\n")
+    assert len(_handle_split(str(tmp_path), "", "train")) == 1
+    assert len(list((tmp_path / arrow_cache.ARROW_CACHE_DIR).iterdir())) == 1
+
+
+def test_dataset_split_views_without_arrow_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr("notia.download_manager.NOTIA_ARROW_CACHE", False)
+    (tmp_path / "train.csv").write_text("a,b\n1,x\n2,y\n3,z\n")
+    dataset = Dataset(path=str(tmp_path), columns=["b"], filters=[("a", ">=", 2)])
+    train = dataset["train"]
+    assert len(train) == 2
+    assert train.columns == ["b"]
+    assert train.to_pandas()["b"].tolist() == ["y", "z"]
+
+
+def test_load_dataset_meta(isolated_cache):
+    slug = f"listed-{uuid.uuid4().hex[:8]}"
+    path = os.path.join(isolated_cache, slug)
+    os.makedirs(path)
+    with open(os.path.join(path, "train.csv"), "w") as f:
+        f.write("a\n1\n")
+    manifest.write(path, slug)
+    listing = {
+        "slug": slug,
+        "name": "Listed",
+        "description": "A dataset found by search",
+        "size": 4,
+        "created_at": "2022-01-01T00:00:00",
+        "price": None,
+        "status": "confirmed",
+        "license": None,
+    }
+    assert notia.load_dataset(slug).meta is None
+    notia.config.Api._ParseDatasets({"results": [{"dataset": listing}]})
+    meta = notia.load_dataset(slug).meta
+    assert (meta.slug, meta.name) == (slug, "Listed")
+
+
+def test_dataset_splits_are_lazy(tmp_path):
+    pytest.importorskip("pyarrow")
+    (tmp_path / "train.csv").write_text("a,b\n1,x\n2,y\n3,z\n")
+    (tmp_path / "train.json").write_text("{}")
+    (tmp_path / "test.tsv").write_text("a\tb\n4\tw\n")
+    dataset = Dataset(path=str(tmp_path))
+    assert sorted(dataset) == ["test", "train"]
+    assert not (tmp_path / arrow_cache.ARROW_CACHE_DIR).exists()
+
+    train = dataset["train"]
+    assert len(train) == 3
+    assert train.columns == ["a", "b"]
+    assert list(train.select(["b"]).head(2)["b"]) == ["x", "y"]
+    assert train.to_numpy().shape == (3, 2)
+    # only the accessed split was parsed
+    converted = list((tmp_path / arrow_cache.ARROW_CACHE_DIR).iterdir())
+    assert [path.name.split(".")[0] for path in converted] == ["train"]
+
+
+def test_dataset_split_schema_with_arrow_cache(tmp_path):
+    pytest.importorskip("pyarrow")
+    (tmp_path / "train.csv").write_text("a,b\n1,x\n2,y\n3,x\n")
+    Dataset(path=str(tmp_path))["train"].to_pandas()
+    assert (tmp_path / arrow_cache.ARROW_CACHE_DIR).exists()
+
+    schema = {"a": "int8", "b": "category"}
+    train = Dataset(path=str(tmp_path), schema=schema)["train"]
+    for frame in (train.to_pandas(), train.head(2), train.to_arrow().to_pandas()):
+        assert frame.dtypes.astype(str).to_dict() == schema
+    batches = list(train.iter_batches(2))
+    assert batches[0].dtypes.astype(str).to_dict() == schema
+
+
+def test_dataset_to_pandas(tmp_path):
+    for shard in range(12):
+        (tmp_path / f"shard-{shard:02}.csv").write_text(f"a,b\n{shard},x\n")
+    # the same split in another format is only loaded once
+    (tmp_path / "shard-00.jsonl").write_text('{"a": 0, "b": "x"}\n')
+    frames = Dataset(path=str(tmp_path)).to_pandas(num_workers=4)
+    assert list(frames) == [f"shard-{shard:02}" for shard in range(12)]
+    assert [frame["a"][0] for frame in frames.values()] == list(range(12))
+
+
+def test_get_from_cache_single_fetch_per_slug():
+    slug = f"locked-{uuid.uuid4().hex[:8]}"
+    with responses.RequestsMock() as rsps:
+        presign = mock_dataset(rsps, slug)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            paths = list(
+                executor.map(lambda _: DownloadManager().get_from_cache(slug), range(4))
+            )
+        assert presign.call_count == 1
+
+    assert len(set(paths)) == 1
+    assert manifest.read(paths[0])["files"]["pytest.csv"]["size"] == 8
+
+
+def test_get_from_cache_ignores_incomplete_entries():
+    slug = f"incomplete-{uuid.uuid4().hex[:8]}"
+    manager = DownloadManager()
+    # left behind by a process that died mid extraction
+    os.makedirs(os.path.join(manager.cache_dir, slug))
+    with responses.RequestsMock() as rsps:
+        mock_dataset(rsps, slug)
+        path = manager.get_from_cache(slug)
+    assert os.path.exists(os.path.join(path, "pytest.csv"))
+    assert manifest.is_complete(path)
+
+
+def test_http_get_rejects_corrupt_download(tmp_path):
+    url = f"https://s3.eu-west-2.amazonaws.com/example-bucket/{uuid.uuid4()}"
+    payload = os.urandom(2048)
+    etag = f'"{hashlib.md5(payload).hexdigest()}"'
+    corrupt = bytes(1) + payload[1:]
+
+    def callback(request):
+        status, headers, body = _range_callback(corrupt)(request)
+        return status, dict(headers, ETag=etag), body
+
+    manager = DownloadManager()
+    with responses.RequestsMock() as rsps:
+        rsps.add_callback(responses.GET, url, callback=callback)
+        with open(tmp_path / "download", "w+b") as temp_file:
+            with pytest.raises(IntegrityError):
+                manager.http_get(url, temp_file)
+    assert (tmp_path / "download").stat().st_size == 0
+    assert not (tmp_path / "download.json").exists()
+
+
+def test_manifest_verify(tmp_path):
+    (tmp_path / "train.csv").write_text("a,b\n1,2\n")
+    crc = zlib.crc32(b"a,b\n1,2\n")
+    manifest.write(str(tmp_path), "slug", checksums={"train.csv": crc})
+    assert manifest.verify(str(tmp_path), deep=True) == []
+
+    # same size and mtime, different content, only a deep check notices
+    stat = (tmp_path / "train.csv").stat()
+    (tmp_path / "train.csv").write_text("a,b\n1,3\n")
+    os.utime(tmp_path / "train.csv", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert manifest.verify(str(tmp_path)) == []
+    assert manifest.verify(str(tmp_path), deep=True) == ["train.csv"]
+
+    (tmp_path / "train.csv").write_text("a,b\n")
+    assert manifest.verify(str(tmp_path)) == ["train.csv"]
+
+
+def test_load_dataset_memoized():
+    slug = f"memoized-{uuid.uuid4().hex[:8]}"
+    with responses.RequestsMock() as rsps:
+        mock_dataset(rsps, slug)
+        first = notia.load_dataset(slug, split="pytest")
+    path = os.path.join(DownloadManager().cache_dir, slug)
+
+    # served from memory without touching the disk cache
+    os.remove(manifest.manifest_path(path))
+    with responses.RequestsMock():
+        second = notia.load_dataset(slug, split="pytest")
+        assert second is not first
+        assert second.equals(first)
+        # changes by one caller are not seen by the next
+        second["extra"] = 1
+        assert notia.load_dataset(slug, split="pytest").equals(first)
+
+        with pytest.raises(ValueError):
+            notia.load_dataset(slug, split="pytest", memoize=False)
+        notia.clear_memory_cache()
+        with pytest.raises(ValueError):
+            notia.load_dataset(slug, split="pytest")
+
+
+def test_load_dataset_memoized_without_copy_on_write(isolated_cache, monkeypatch):
+    # as on pandas before 3, unless mode.copy_on_write is set
+    monkeypatch.setattr(memory_cache, "_copy_on_write", lambda: False)
+    slug = f"aliased-{uuid.uuid4().hex[:8]}"
+    path = os.path.join(isolated_cache, slug)
+    os.makedirs(path)
+    with open(os.path.join(path, "train.csv"), "w") as f:
+        f.write("a\n1\n")
+    manifest.write(path, slug)
+
+    # parsed again by default rather than shared between callers
+    first = notia.load_dataset(slug, split="train")
+    assert notia.load_dataset(slug, split="train") is not first
+    assert len(memory_cache.frames) == 0
+
+    # shared as is, without a copy, when asked for
+    first = notia.load_dataset(slug, split="train", memoize=True)
+    assert notia.load_dataset(slug, split="train", memoize=True) is first
+    notia.clear_memory_cache()
+
+
+def test_get_from_cache_checks_disk_space():
+    slug = f"huge-{uuid.uuid4().hex[:8]}"
+    notia.config.Api.metadata.record_sizes({slug: 2**62})
+    with responses.RequestsMock():
+        with pytest.raises(InsufficientDiskSpaceError):
+            DownloadManager().get_from_cache(slug)
+
+
+def test_load_dataset_without_extraction(tmp_path):
+    slug = f"archived-{uuid.uuid4().hex[:8]}"
+    with zipfile.ZipFile(tmp_path / "archive.zip", "w") as zip_file:
+        zip_file.writestr("train.csv", "a,b\n1,x\n2,y\n", zipfile.ZIP_STORED)
+        zip_file.writestr("valid.jsonl", '{"a": 3}\n', zipfile.ZIP_DEFLATED)
+    payload = (tmp_path / "archive.zip").read_bytes()
+    with responses.RequestsMock() as rsps:
+        mock_presign(rsps, slug)
+        rsps.add_callback(
+            responses.GET, dataset_url(slug), callback=_range_callback(payload)
+        )
+        path = notia.load_dataset(slug, load=False, extract=False)
+        assert manifest.read(path)["mode"] == "archive"
+        assert not os.path.exists(os.path.join(path, "train.csv"))
+
+        train = notia.load_dataset(slug, split="train", extract=False, memoize=False)
+        assert train["a"].tolist() == [1, 2]
+        assert train["b"].tolist() == ["x", "y"]
+        assert notia.load_dataset(slug, extract=False)["valid"].to_pandas()[
+            "a"
+        ].tolist() == [3]
+    # copies would take more space than the archive saves
+    assert not os.path.exists(os.path.join(path, arrow_cache.ARROW_CACHE_DIR))
+    assert not os.path.exists(os.path.join(path, dataset_schema.SCHEMA_DIR))
+
+    # extracted from the cached archive, without downloading it again
+    with responses.RequestsMock():
+        path = notia.load_dataset(slug, load=False, extract=True)
+    assert "mode" not in manifest.read(path)
+    assert not os.path.exists(os.path.join(path, ".notia-archive.zip"))
+    with open(os.path.join(path, "train.csv")) as f:
+        assert f.read() == "a,b\n1,x\n2,y\n"
+
+
+def test_force_download_replaces_cached_archive(tmp_path):
+    slug = f"archived-{uuid.uuid4().hex[:8]}"
+    manager = DownloadManager()
+
+    def fetch(content, **kwargs):
+        payload = _make_zip(tmp_path / "archive.zip", {"train.csv": content})
+        with responses.RequestsMock() as rsps:
+            mock_presign(rsps, slug)
+            rsps.add_callback(
+                responses.GET, dataset_url(slug), callback=_range_callback(payload)
+            )
+            return manager.get_from_cache(slug, **kwargs)
+
+    path = fetch(b"a\n1\n", extract=False)
+    # left by an interrupted extraction
+    os.makedirs(os.path.join(manager.extract_dir, slug))
+    open(os.path.join(manager.extract_dir, slug, "stale.csv"), "w").close()
+    # downloaded again rather than extracted from the stale archive
+    path = fetch(b"a\n2\n", force_download=True, extract=True)
+    assert not os.path.exists(archive.archive_path(path))
+    assert not os.path.exists(os.path.join(path, "stale.csv"))
+    with open(os.path.join(path, "train.csv"), "rb") as f:
+        assert f.read() == b"a\n2\n"
+
+
+def test_stored_json_lines_member(tmp_path, monkeypatch):
+    monkeypatch.setattr("notia.download_manager.NOTIA_ARROW_CACHE", False)
+    lines = [json.dumps({"a": i, "b": "x" * 50}) + "\n" for i in range(2000)]
+    with zipfile.ZipFile(archive.archive_path(str(tmp_path)), "w") as zip_file:
+        zip_file.writestr("train.jsonl", "".join(lines), zipfile.ZIP_STORED)
+    reads = []
+    readinto = archive._MappedMember.readinto
+    monkeypatch.setattr(
+        archive._MappedMember,
+        "readinto",
+        lambda self, buffer: reads.append(len(buffer)) or readinto(self, buffer),
+    )
+    with archive.open_source(str(tmp_path / "train.jsonl")) as f:
+        assert [line.decode() for line in f] == lines
+    # buffered, rather than a read per byte of each line
+    assert len(reads) < 100
+    chunks = list(_handle_split(str(tmp_path), "", "train", chunksize=500))
+    assert [len(chunk) for chunk in chunks] == [500] * 4
@@ -0,0 +1,25 @@
+import subprocess
+import sys
+
+import notia
+
+
+def test_import_is_lazy():
+    code = (
+        "import sys, notia\n"
+        "from notia.config import NOTIA_CACHE\n"
+        "print(' '.join(m for m in ('pandas', 'requests', 'rich') if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    assert output.strip() == ""
+
+
+def test_lazy_attributes():
+    from notia.download_manager import load_dataset
+
+    assert notia.load_dataset is load_dataset
+    assert callable(notia.login)
+    assert notia.config.Api is notia.config.Api
+    assert set(notia.__all__) <= set(dir(notia))
@@ -0,0 +1,47 @@
+import uuid
+
+import pytest
+import responses
+
+import notia
+from notia import config, instrumentation
+
+from helpers import mock_dataset
+
+
+@pytest.fixture
+def collector():
+    collector = instrumentation.MetricsCollector()
+    instrumentation.add_hook(collector)
+    yield collector
+    instrumentation.remove_hook(collector)
+
+
+def test_span_reports_errors(collector):
+    with pytest.raises(ValueError):
+        with instrumentation.span("stage", slug="x") as span:
+            span.set_attribute("bytes", 10)
+            raise ValueError("failed")
+    instrumentation.count("stage.retries", 2)
+    summary = collector.summary()
+    assert summary["spans"]["stage"]["errors"] == 1
+    assert summary["spans"]["stage"]["bytes"] == 10
+    assert summary["counters"] == {"stage.retries": 2}
+
+
+def test_load_dataset_metrics(collector, monkeypatch, capsys):
+    monkeypatch.setattr(config, "NOTIA_QUIET", True)
+    slug = f"metrics-{uuid.uuid4().hex[:8]}"
+    with responses.RequestsMock() as rsps:
+        mock_dataset(rsps, slug)
+        notia.load_dataset(slug, split="pytest", memoize=False)
+    notia.load_dataset(slug, split="pytest", memoize=False)
+
+    summary = collector.summary()
+    assert summary["cache_hit_rate"] == 0.5
+    assert summary["counters"]["download.bytes"] > 0
+    for stage in ["load_dataset", "get_from_cache", "presign", "connect", "parse"]:
+        assert stage in summary["spans"]
+    assert summary["spans"]["load_dataset"]["count"] == 2
+    # nothing is printed in quiet mode
+    assert capsys.readouterr().out == ""
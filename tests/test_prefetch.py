@@ -0,0 +1,57 @@
+import notia
+import responses
+import os
+import sys
+import time
+import uuid
+from notia.throttle import BandwidthLimiter, ConcurrencyLimiter
+from helpers import mock_dataset, mock_presign
+
+
+def test_prefetch(monkeypatch):
+    slugs = [f"prefetch-{uuid.uuid4().hex[:8]}" for _ in range(3)]
+    limiters = []
+    prefetch_module = sys.modules["notia.prefetch"]
+    monkeypatch.setattr(prefetch_module, "NOTIA_POOL_PER_HOST", 3)
+    monkeypatch.setattr(
+        prefetch_module,
+        "ConcurrencyLimiter",
+        lambda limit: limiters.append(ConcurrencyLimiter(limit)) or limiters[-1],
+    )
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        for slug in slugs[:2]:
+            mock_dataset(rsps, slug)
+        mock_presign(rsps, slugs[2], status=403)
+        paths = notia.prefetch(slugs, max_concurrency=2)
+
+    assert sorted(paths) == sorted(slugs[:2])
+    # capped at the connections pooled per host
+    assert [limiter.max_concurrency for limiter in limiters] == [3]
+    for path in paths.values():
+        assert os.path.exists(os.path.join(path, "pytest.csv"))
+
+
+def test_bandwidth_limiter():
+    limiter = BandwidthLimiter(rate=1000, burst=100)
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.consume(100)
+    # the burst is free, the remaining 200 bytes take 0.2s at 1000 B/s
+    assert time.monotonic() - start >= 0.18
+
+
+def test_concurrency_limiter():
+    limiter = ConcurrencyLimiter(8, cooldown=60)
+    limiter.record_throttle()
+    assert limiter.limit == 4
+    # a burst of throttled requests only halves the cap once
+    limiter.record_throttle()
+    assert limiter.limit == 4
+    # grows by one after a cap's worth of successes
+    for _ in range(5):
+        limiter.record_success()
+    assert limiter.limit == 5
+
+    with limiter, limiter, limiter, limiter, limiter:
+        assert limiter._active == 5
+    assert limiter._active == 0
@@ -0,0 +1,65 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from notia import presign
+
+
+def _presigned_url(lifetime: int, signed_at: float = None) -> str:
+    signed = datetime.fromtimestamp(signed_at or time.time(), timezone.utc)
+    return (
+        "https://example-bucket.s3.eu-west-2.amazonaws.com/example.zip"
+        "?X-Amz-Algorithm=AWS4-HMAC-SHA256"
+        f"&X-Amz-Date={signed:%Y%m%dT%H%M%SZ}&X-Amz-Expires={lifetime}"
+        "&X-Amz-Signature=abc"
+    )
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        (
+            "https://s3.amazonaws.com/b/k?X-Amz-Date=20240101T000000Z&X-Amz-Expires=3600",
+            1704070800.0,
+        ),
+        (
+            "https://storage.googleapis.com/b/k?x-goog-date=20240101T000000Z"
+            "&x-goog-expires=60",
+            1704067260.0,
+        ),
+        (
+            "https://s3.amazonaws.com/b/k?AWSAccessKeyId=a&Expires=1704067200",
+            1704067200,
+        ),
+        ("https://s3.amazonaws.com/b/k", None),
+        ("https://s3.amazonaws.com/b/k?X-Amz-Date=yesterday&X-Amz-Expires=60", None),
+    ],
+)
+def test_expires_at(url, expected):
+    assert presign.expires_at(url) == expected
+
+
+def test_is_fresh():
+    assert presign.is_fresh(_presigned_url(3600))
+    assert not presign.is_fresh(_presigned_url(60))
+    assert not presign.is_fresh("https://s3.amazonaws.com/b/k")
+
+
+def test_refresh_ahead():
+    class Transfer:
+        url = _presigned_url(2)
+
+    replaced = threading.Event()
+    fresh_url = _presigned_url(3600)
+
+    def set_url(url):
+        Transfer.url = url
+        replaced.set()
+
+    with presign.refresh_ahead(
+        lambda: Transfer.url, set_url, lambda: fresh_url, margin=1.9
+    ):
+        assert replaced.wait(5)
+    assert Transfer.url == fresh_url
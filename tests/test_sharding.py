@@ -0,0 +1,158 @@
+import json
+import pickle
+import sys
+import types
+import zipfile
+
+import pandas as pd
+import pytest
+
+import notia
+from notia import archive, sharding
+from notia.sharding import ShardedReader
+
+
+def _write_dataset(path):
+    path.mkdir()
+    train = pd.DataFrame({"id": range(500), "text": [f"row {i}" for i in range(500)]})
+    train.to_csv(path / "train.csv", index=False)
+    with open(path / "valid.jsonl", "w") as f:
+        for i in range(200):
+            f.write(json.dumps({"id": 1000 + i, "text": f"line {i}"}) + "\n")
+    with open(path / "test.json", "w") as f:
+        json.dump([{"id": 2000, "text": "doc"}], f)
+    return str(path)
+
+
+def _ids(reader):
+    frame = reader.to_pandas()
+    return frame["id"].tolist() if len(frame) else []
+
+
+@pytest.mark.parametrize("world_size,num_workers", [(1, 1), (2, 1), (3, 2), (4, 3)])
+def test_shards_cover_every_row_once(tmp_path, world_size, num_workers):
+    path = _write_dataset(tmp_path / "dataset")
+    ids = []
+    for rank in range(world_size):
+        for worker_id in range(num_workers):
+            reader = ShardedReader(
+                path, rank, world_size, worker_id, num_workers, block_size=256
+            )
+            ids.extend(_ids(reader))
+    assert sorted(ids) == list(range(500)) + list(range(1000, 1200)) + [2000]
+
+
+def test_shuffle_is_deterministic_per_epoch(tmp_path):
+    path = _write_dataset(tmp_path / "dataset")
+
+    def blocks(epoch, rank=0):
+        reader = ShardedReader(
+            path,
+            rank,
+            2,
+            split=["train", "valid"],
+            shuffle=True,
+            seed=7,
+            block_size=256,
+        )
+        reader.set_epoch(epoch)
+        return reader.blocks()
+
+    assert blocks(0) == blocks(0)
+    assert blocks(0) != blocks(1)
+    # both ranks draw from the same shuffle
+    assert not set(blocks(1)) & set(blocks(1, rank=1))
+    splits = {block.split for block in blocks(0) + blocks(0, rank=1)}
+    assert splits == {"train", "valid"}
+
+
+def test_sharded_reader_options(tmp_path):
+    path = _write_dataset(tmp_path / "dataset")
+    reader = ShardedReader(
+        path,
+        split="train",
+        columns=["text"],
+        filters=[("id", "<", 3)],
+        block_size=256,
+    )
+    assert reader.to_pandas()["text"].tolist() == ["row 0", "row 1", "row 2"]
+    with pytest.raises(ValueError):
+        ShardedReader(path, split="missing")
+    with pytest.raises(ValueError):
+        ShardedReader(path, rank=2, world_size=2)
+
+
+def test_sharded_reader_from_archive(tmp_path):
+    source = _write_dataset(tmp_path / "source")
+    path = tmp_path / "dataset"
+    path.mkdir()
+    with zipfile.ZipFile(archive.archive_path(str(path)), "w") as zip_file:
+        zip_file.write(f"{source}/train.csv", "train.csv", zipfile.ZIP_DEFLATED)
+        zip_file.write(f"{source}/valid.jsonl", "valid.jsonl", zipfile.ZIP_STORED)
+    ids = []
+    for rank in range(3):
+        ids.extend(_ids(ShardedReader(str(path), rank, 3, block_size=512)))
+    assert sorted(ids) == list(range(500)) + list(range(1000, 1200))
+
+
+@pytest.fixture
+def fake_torch(monkeypatch):
+    """Just enough of torch for ShardedIterableDataset, which is defined
+    against it on first access"""
+    torch = types.ModuleType("torch")
+    utils = types.ModuleType("torch.utils")
+    data = types.ModuleType("torch.utils.data")
+    distributed = types.ModuleType("torch.distributed")
+    data.IterableDataset = type("IterableDataset", (), {})
+    data.worker_info = None
+    data.get_worker_info = lambda: data.worker_info
+    distributed.rank = None
+    distributed.is_available = lambda: True
+    distributed.is_initialized = lambda: distributed.rank is not None
+    distributed.get_rank = lambda: distributed.rank
+    distributed.get_world_size = lambda: 2
+    torch.utils, torch.distributed, utils.data = utils, distributed, data
+    modules = {
+        "torch": torch,
+        "torch.utils": utils,
+        "torch.utils.data": data,
+        "torch.distributed": distributed,
+    }
+    for name, module in modules.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    yield data, distributed
+    for module in (notia, sharding):
+        vars(module).pop("ShardedIterableDataset", None)
+
+
+def test_sharded_iterable_dataset(tmp_path, monkeypatch, fake_torch):
+    data, distributed = fake_torch
+    path = _write_dataset(tmp_path / "dataset")
+    manager = types.SimpleNamespace(get_from_cache=lambda ID, extract: path)
+    monkeypatch.setattr(sharding, "DownloadManager", lambda: manager)
+
+    dataset_class = notia.ShardedIterableDataset
+    assert dataset_class is sharding.ShardedIterableDataset
+    assert issubclass(dataset_class, data.IterableDataset)
+    dataset = dataset_class("dataset", split="train", block_size=256)
+    # DataLoader workers receive the dataset pickled
+    dataset = pickle.loads(pickle.dumps(dataset))
+
+    assert [row["id"] for row in dataset] == list(range(500))
+    ids = []
+    for rank in range(2):
+        distributed.rank = rank
+        for worker_id in range(3):
+            data.worker_info = types.SimpleNamespace(id=worker_id, num_workers=3)
+            shard = [row["id"] for row in dataset]
+            assert 0 < len(shard) < 500
+            ids.extend(shard)
+    assert sorted(ids) == list(range(500))
+
+    # an explicit rank, with the world size and worker from torch
+    dataset = dataset_class("dataset", "valid", rank=0, batch_size=4, block_size=256)
+    batches = list(dataset)
+    assert batches
+    assert all(0 < len(batch["id"]) <= 4 for batch in batches)
+    expected = _ids(ShardedReader(path, 0, 2, 2, 3, split="valid", block_size=256))
+    assert [i for batch in batches for i in batch["id"].tolist()] == expected